@@ -2,12 +2,14 @@ import sys
 import uuid
 import signal
 import asyncio
+import argparse
 from aioconsole import ainput
 from config.settings import load_config
 from config.logger import setup_logging
 from core.utils.util import get_local_ip, validate_mcp_endpoint
 from core.http_server import SimpleHttpServer
 from core.websocket_server import WebSocketServer
+from core.worker_supervisor import WorkerSupervisor, is_multi_worker_supported
 from core.utils.util import check_ffmpeg_installed
 
 TAG = __name__
@@ -42,7 +44,7 @@ async def monitor_stdin():
         await ainput()  # 异步等待输入，消费回车
 
 
-async def main():
+def prepare_config():
     check_ffmpeg_installed()
     config = load_config()
 
@@ -54,14 +56,47 @@ async def main():
         auth_key = str(uuid.uuid4().hex)
     config["server"]["auth_key"] = auth_key
 
+    mcp_endpoint = config.get("mcp_endpoint", None)
+    if mcp_endpoint is not None and "你" not in mcp_endpoint:
+        # 校验MCP接入点格式
+        if validate_mcp_endpoint(mcp_endpoint):
+            logger.bind(tag=TAG).info("mcp接入点是\t{}", mcp_endpoint)
+            # 将mcp计入点地址转成调用点
+            mcp_endpoint = mcp_endpoint.replace("/mcp/", "/call/")
+            config["mcp_endpoint"] = mcp_endpoint
+        else:
+            logger.bind(tag=TAG).error("mcp接入点不符合规范")
+            config["mcp_endpoint"] = "你的接入点 websocket地址"
+    return config
+
+
+def start_supervisor(config, workers=None):
+    """多进程模式下启动 worker，需在启动事件循环、创建其他线程和连接之前调用"""
+    if workers is None:
+        workers = int((config.get("workers", {}) or {}).get("count", 1))
+    if workers > 1 and not is_multi_worker_supported():
+        logger.bind(tag=TAG).warning("当前平台不支持多进程worker模式，使用单进程运行")
+        workers = 1
+    if workers <= 1:
+        return None
+    supervisor = WorkerSupervisor(config, workers)
+    supervisor.start()
+    return supervisor
+
+
+async def main(config, supervisor=None):
+    if supervisor is not None:
+        ws_task = asyncio.create_task(supervisor.monitor())
+    else:
+        # 启动 WebSocket 服务器
+        ws_server = WebSocketServer(config)
+        ws_task = asyncio.create_task(ws_server.start())
+
     # 添加 stdin 监控任务
     stdin_task = asyncio.create_task(monitor_stdin())
 
-    # 启动 WebSocket 服务器
-    ws_server = WebSocketServer(config)
-    ws_task = asyncio.create_task(ws_server.start())
     # 启动 Simple http 服务器
-    ota_server = SimpleHttpServer(config)
+    ota_server = SimpleHttpServer(config, worker_supervisor=supervisor)
     ota_task = asyncio.create_task(ota_server.start())
 
     read_config_from_api = config.get("read_config_from_api", False)
@@ -77,17 +112,6 @@ async def main():
         get_local_ip(),
         port,
     )
-    mcp_endpoint = config.get("mcp_endpoint", None)
-    if mcp_endpoint is not None and "你" not in mcp_endpoint:
-        # 校验MCP接入点格式
-        if validate_mcp_endpoint(mcp_endpoint):
-            logger.bind(tag=TAG).info("mcp接入点是\t{}", mcp_endpoint)
-            # 将mcp计入点地址转成调用点
-            mcp_endpoint = mcp_endpoint.replace("/mcp/", "/call/")
-            config["mcp_endpoint"] = mcp_endpoint
-        else:
-            logger.bind(tag=TAG).error("mcp接入点不符合规范")
-            config["mcp_endpoint"] = "你的接入点 websocket地址"
 
     # 获取WebSocket配置，使用安全的默认值
     websocket_port = 8000
@@ -100,6 +124,13 @@ async def main():
         get_local_ip(),
         websocket_port,
     )
+    if supervisor is not None:
+        logger.bind(tag=TAG).info(
+            "已启动{}个worker进程，worker状态接口是\thttp://{}:{}/workers/stats",
+            supervisor.workers,
+            get_local_ip(),
+            port,
+        )
 
     logger.bind(tag=TAG).info(
         "=======上面的地址是websocket协议地址，请勿用浏览器访问======="
@@ -121,6 +152,8 @@ async def main():
         ws_task.cancel()
         if ota_task:
             ota_task.cancel()
+        if supervisor is not None:
+            supervisor.stop()
 
         # 等待任务终止（必须加超时）
         await asyncio.wait(
@@ -132,7 +165,18 @@ async def main():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="小智ESP32服务端")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="worker进程数，大于1时启用多进程模式（仅Linux），默认读取配置workers.count",
+    )
+    args = parser.parse_args()
+    config = prepare_config()
+    # 多进程模式需在启动事件循环之前fork出worker孵化进程
+    supervisor = start_supervisor(config, args.workers)
     try:
-        asyncio.run(main())
+        asyncio.run(main(config, supervisor))
     except KeyboardInterrupt:
         print("手动中断，程序终止。")
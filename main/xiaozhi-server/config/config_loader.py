@@ -1,7 +1,24 @@
 import os
+import copy
+import time
 import yaml
+import asyncio
+import functools
 from collections.abc import Mapping
-from config.manage_api_client import init_service, get_server_config, get_agent_models
+from config.manage_api_client import (
+    init_service,
+    get_server_config,
+    get_agent_models,
+    get_agent_models_async,
+    get_agent_config_cache_options,
+    DeviceNotFoundException,
+    DeviceBindException,
+)
+
+# 正在进行中的差异化配置请求，同一设备并发连接时共享同一个请求
+_agent_config_inflight = {}
+# 缓存版本号，配置失效后递增，丢弃失效前发出的请求结果
+_agent_config_generation = 0
 
 
 def get_project_dir():
@@ -76,6 +93,108 @@ def get_private_config_from_api(config, device_id, client_id):
     return get_agent_models(device_id, client_id, config["selected_module"])
 
 
+async def get_private_config_from_api_async(config, device_id, client_id):
+    """异步从Java API获取私有配置，带 stale-while-revalidate 缓存
+
+    - 缓存未过期：直接返回缓存
+    - 缓存已过期但仍在容忍期内：立即返回旧配置，并在后台刷新
+    - 无缓存或超过容忍期：等待接口返回（同一设备的并发请求只发一次）
+    设备未绑定等异常不缓存，保证绑定后能立即生效
+    """
+    from core.utils.cache.manager import cache_manager, CacheType
+
+    key = f"{device_id}:{client_id}"
+    options = get_agent_config_cache_options()
+    cached = cache_manager.get(CacheType.AGENT_CONFIG, key)
+    if cached is not None:
+        private_config, fetched_at = cached
+        age = time.time() - fetched_at
+        if age < options["ttl"]:
+            return copy.deepcopy(private_config)
+        if age < options["ttl"] + options["stale_ttl"]:
+            task = _fetch_agent_config(config, device_id, client_id, key)
+            task.add_done_callback(functools.partial(_consume_background_result, key))
+            return copy.deepcopy(private_config)
+
+    private_config = await asyncio.shield(
+        _fetch_agent_config(config, device_id, client_id, key)
+    )
+    return copy.deepcopy(private_config)
+
+
+def _fetch_agent_config(config, device_id, client_id, key):
+    """获取（或复用进行中的）差异化配置请求任务"""
+    task = _agent_config_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(
+            _request_agent_config(
+                device_id, client_id, dict(config["selected_module"]), key
+            )
+        )
+        _agent_config_inflight[key] = task
+
+        def _remove_inflight(done_task):
+            if _agent_config_inflight.get(key) is done_task:
+                del _agent_config_inflight[key]
+
+        task.add_done_callback(_remove_inflight)
+    return task
+
+
+async def _request_agent_config(device_id, client_id, selected_module, key):
+    from core.utils.cache.manager import cache_manager, CacheType
+
+    generation = _agent_config_generation
+    try:
+        private_config = await get_agent_models_async(
+            device_id, client_id, selected_module
+        )
+    except (DeviceNotFoundException, DeviceBindException):
+        # 设备未绑定或绑定已变更，旧配置不再有效，下一次连接走同步请求进入绑定流程
+        cache_manager.delete(CacheType.AGENT_CONFIG, key)
+        raise
+    if private_config is not None and generation == _agent_config_generation:
+        cache_manager.set(
+            CacheType.AGENT_CONFIG, key, (private_config, time.time())
+        )
+    return private_config
+
+
+def _consume_background_result(key, task):
+    """后台刷新因网络或服务端错误失败时保留旧缓存，记录告警和失败次数"""
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is None:
+        return
+    from config.logger import setup_logging
+
+    if isinstance(exc, (DeviceNotFoundException, DeviceBindException)):
+        setup_logging().bind(tag=__name__).info(
+            f"设备未绑定或绑定已变更，已清除差异化配置缓存 {key}: {exc}"
+        )
+        return
+    from core.utils.metrics import get_metrics_registry
+
+    get_metrics_registry().counter(
+        "xiaozhi_agent_config_refresh_failures_total",
+        "差异化配置后台刷新失败次数（失败时继续使用旧缓存）",
+    ).inc()
+    setup_logging().bind(tag=__name__).warning(
+        f"差异化配置后台刷新失败，继续使用旧缓存 {key}: {exc}"
+    )
+
+
+def invalidate_private_config_cache():
+    """清空差异化配置缓存，在智控台下发 update_config 时调用"""
+    from core.utils.cache.manager import cache_manager, CacheType
+
+    global _agent_config_generation
+    _agent_config_generation += 1
+    _agent_config_inflight.clear()
+    cache_manager.clear(CacheType.AGENT_CONFIG)
+
+
 def ensure_directories(config):
     """确保所有配置路径存在"""
     dirs_to_create = set()
@@ -0,0 +1,155 @@
+"""
+连接级分层配置
+
+每个连接不再深拷贝完整的全局配置，而是使用「共享基础配置 + 连接私有覆盖层」的视图：
+- 读取时优先返回覆盖层中的值，否则返回共享基础配置中的值
+- 写入顶层键时只写入覆盖层，不影响共享配置
+- 从基础配置读出的字典和列表在首次读取时浅拷贝一份放入覆盖层，嵌套的每一层都按同样方式逐层拷贝：
+  只有实际读到的路径会被拷贝，且每次只拷贝一层，连接在任意一层原地修改都只改到自己的副本
+
+拷贝出的字典是 dict 的子类，isinstance(x, dict)、json 序列化等用法与原配置一致。
+"""
+
+from collections.abc import ItemsView, Mapping, MutableMapping, ValuesView
+from typing import Any, Dict
+
+_DELETED = object()
+_MISSING = object()
+
+
+def _copy_on_read(value):
+    """基础配置中的字典和列表浅拷贝一层，其余值原样返回"""
+    if type(value) is dict:
+        return _CopyOnReadDict(value)
+    if type(value) is list:
+        return [_copy_on_read(item) for item in value]
+    return value
+
+
+class _CopyOnReadDict(dict):
+    """从共享配置浅拷贝出的一层字典，下一层的字典和列表在首次读取时再拷贝"""
+
+    __slots__ = ("_owned",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 已拷贝或由连接写入的键，读取时不再拷贝
+        self._owned = set()
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if key not in self._owned:
+            self._owned.add(key)
+            copied = _copy_on_read(value)
+            if copied is not value:
+                super().__setitem__(key, copied)
+                value = copied
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._owned.add(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._owned.discard(key)
+
+    def __iter__(self):
+        # 重写后 dict(x)、{**x} 等会改为通过 keys() 和 __getitem__ 读取，不会绕过拷贝
+        return super().__iter__()
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, default=_MISSING):
+        if key not in self:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self):
+        if not self:
+            raise KeyError("popitem(): dictionary is empty")
+        key = next(reversed(self))
+        return key, self.pop(key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def items(self):
+        return ItemsView(self)
+
+    def values(self):
+        return ValuesView(self)
+
+    def copy(self):
+        return _CopyOnReadDict(self.items())
+
+    def __reduce__(self):
+        # 序列化（如传给子进程）时还原为普通字典
+        return dict, (dict(self.items()),)
+
+    def __reduce_ex__(self, protocol):
+        return self.__reduce__()
+
+
+class LayeredConfig(MutableMapping):
+    def __init__(self, base: Mapping):
+        self._base = base
+        self._overrides: Dict[str, Any] = {}
+
+    def __getitem__(self, key):
+        if key in self._overrides:
+            value = self._overrides[key]
+            if value is _DELETED:
+                raise KeyError(key)
+            return value
+        value = self._base[key]
+        copied = _copy_on_read(value)
+        if copied is not value:
+            self._overrides[key] = copied
+        return copied
+
+    def __setitem__(self, key, value):
+        self._overrides[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._overrides[key] = _DELETED
+
+    def __contains__(self, key):
+        if key in self._overrides:
+            return self._overrides[key] is not _DELETED
+        return key in self._base
+
+    def __iter__(self):
+        for key in self._base:
+            if self._overrides.get(key) is not _DELETED:
+                yield key
+        for key, value in self._overrides.items():
+            if key not in self._base and value is not _DELETED:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"LayeredConfig(overrides={list(self.overrides().keys())})"
+
+    def overrides(self) -> Dict[str, Any]:
+        """返回连接私有覆盖层（含已读取拷贝的键，不含已删除的键）"""
+        return {k: v for k, v in self._overrides.items() if v is not _DELETED}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """合并为普通字典（顶层浅拷贝），用于需要真实dict的场景，如序列化"""
+        return {key: self[key] for key in self}
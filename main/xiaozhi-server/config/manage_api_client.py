@@ -1,6 +1,7 @@
 import os
 import time
 import base64
+import asyncio
 from typing import Optional, Dict
 
 import httpx
@@ -21,6 +22,7 @@ class DeviceBindException(Exception):
 class ManageApiClient:
     _instance = None
     _client = None
+    _async_client = None
     _secret = None
 
     def __new__(cls, config):
@@ -49,7 +51,7 @@ class ManageApiClient:
         cls.retry_delay = cls.config.get("retry_delay", 10)  # 初始重试延迟(秒)
         # NOTE(goody): 2025/4/16 http相关资源统一管理，后续可以增加线程池或者超时
         # 后续也可以统一配置apiToken之类的走通用的Auth
-        cls._client = httpx.Client(
+        client_kwargs = dict(
             base_url=cls.config.get("url"),
             headers={
                 "User-Agent": f"PythonClient/2.0 (PID:{os.getpid()})",
@@ -58,12 +60,27 @@ class ManageApiClient:
             },
             timeout=cls.config.get("timeout", 30),  # 默认超时时间30秒
         )
+        cls._client = httpx.Client(**client_kwargs)
+        # 异步客户端，供事件循环中的调用使用，避免阻塞其他连接
+        cls._async_client = httpx.AsyncClient(**client_kwargs)
 
     @classmethod
     def _request(cls, method: str, endpoint: str, **kwargs) -> Dict:
         """发送单次HTTP请求并处理响应"""
         endpoint = endpoint.lstrip("/")
         response = cls._client.request(method, endpoint, **kwargs)
+        return cls._handle_response(response)
+
+    @classmethod
+    async def _request_async(cls, method: str, endpoint: str, **kwargs) -> Dict:
+        """异步发送单次HTTP请求并处理响应"""
+        endpoint = endpoint.lstrip("/")
+        response = await cls._async_client.request(method, endpoint, **kwargs)
+        return cls._handle_response(response)
+
+    @classmethod
+    def _handle_response(cls, response) -> Dict:
+        """处理响应和业务错误码"""
         response.raise_for_status()
 
         result = response.json()
@@ -117,6 +134,25 @@ class ManageApiClient:
                     # 不重试，直接抛出异常
                     raise
 
+    @classmethod
+    async def _execute_request_async(cls, method: str, endpoint: str, **kwargs) -> Dict:
+        """带重试机制的异步请求执行器，重试等待不阻塞事件循环"""
+        retry_count = 0
+
+        while retry_count <= cls.max_retries:
+            try:
+                return await cls._request_async(method, endpoint, **kwargs)
+            except Exception as e:
+                if retry_count < cls.max_retries and cls._should_retry(e):
+                    retry_count += 1
+                    print(
+                        f"{method} {endpoint} 请求失败，将在 {cls.retry_delay:.1f} 秒后进行第 {retry_count} 次重试"
+                    )
+                    await asyncio.sleep(cls.retry_delay)
+                    continue
+                else:
+                    raise
+
     @classmethod
     def safe_close(cls):
         """安全关闭连接池"""
@@ -145,6 +181,30 @@ def get_agent_models(
     )
 
 
+async def get_agent_models_async(
+    mac_address: str, client_id: str, selected_module: Dict
+) -> Optional[Dict]:
+    """异步获取代理模型配置"""
+    return await ManageApiClient._instance._execute_request_async(
+        "POST",
+        "/config/agent-models",
+        json={
+            "macAddress": mac_address,
+            "clientId": client_id,
+            "selectedModule": selected_module,
+        },
+    )
+
+
+def get_agent_config_cache_options() -> Dict:
+    """获取差异化配置缓存参数（读取本地manager-api配置）"""
+    config = getattr(ManageApiClient, "config", None) or {}
+    return {
+        "ttl": float(config.get("agent_config_ttl", 60)),
+        "stale_ttl": float(config.get("agent_config_stale_ttl", 600)),
+    }
+
+
 def save_mem_local_short(mac_address: str, short_momery: str) -> Optional[Dict]:
     try:
         return ManageApiClient._instance._execute_request(
@@ -0,0 +1,42 @@
+from aiohttp import web
+from config.logger import setup_logging
+from core.utils.admission import get_admission_controller
+from core.utils.executor import get_shared_executor
+
+TAG = __name__
+
+
+class AdmissionHandler:
+    """准入控制状态API处理器"""
+
+    def __init__(self, config: dict, supervisor=None):
+        self.config = config
+        self.supervisor = supervisor
+        self.logger = setup_logging()
+
+    async def handle_get(self, request):
+        """处理GET请求 - 获取准入上限、当前占用和线程池状态"""
+        try:
+            if self.supervisor is not None:
+                # 多进程模式下会话在各worker中，返回各worker上报的统计
+                workers = [
+                    {
+                        "worker": w["worker"],
+                        "pid": w["pid"],
+                        "admission": (w["stats"] or {}).get("admission"),
+                        "executor": (w["stats"] or {}).get("executor"),
+                    }
+                    for w in self.supervisor.get_stats()["per_worker"]
+                ]
+                return web.json_response({"status": "success", "workers": workers})
+
+            return web.json_response(
+                {
+                    "status": "success",
+                    "admission": get_admission_controller(self.config).get_stats(),
+                    "executor": get_shared_executor(self.config).get_stats(),
+                }
+            )
+        except Exception as e:
+            self.logger.bind(tag=TAG).error(f"获取准入控制状态失败: {str(e)}")
+            return web.json_response({"error": str(e), "status": "error"}, status=500)
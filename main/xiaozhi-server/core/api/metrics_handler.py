@@ -0,0 +1,55 @@
+from aiohttp import web
+from config.logger import setup_logging
+from core.utils.metrics import (
+    MetricFamily,
+    MetricType,
+    get_metrics_registry,
+    render_text,
+    with_labels,
+)
+
+TAG = __name__
+
+
+class MetricsHandler:
+    """Prometheus 指标API处理器"""
+
+    def __init__(self, config: dict, supervisor=None):
+        self.config = config
+        self.supervisor = supervisor
+        self.logger = setup_logging()
+
+    def _collect_workers(self):
+        """多进程模式下汇总各worker最近一次上报的指标，并加上worker标签"""
+        stats = self.supervisor.get_stats()
+        alive = MetricFamily("xiaozhi_workers_alive", MetricType.GAUGE, "存活的worker进程数")
+        alive.add(stats["alive"])
+        restarts = MetricFamily(
+            "xiaozhi_worker_restarts_total", MetricType.COUNTER, "worker进程重启次数"
+        )
+        families = [alive, restarts]
+        for worker in stats["per_worker"]:
+            labels = {"worker": str(worker["worker"])}
+            restarts.add(worker["restarts"], labels)
+            worker_metrics = (worker["stats"] or {}).get("metrics") or []
+            families.extend(
+                with_labels(
+                    [MetricFamily.from_dict(data) for data in worker_metrics], labels
+                )
+            )
+        return families
+
+    async def handle_get(self, request):
+        """处理GET请求 - 以Prometheus文本格式输出指标"""
+        try:
+            if self.supervisor is not None:
+                families = self._collect_workers()
+            else:
+                families = get_metrics_registry().collect()
+            return web.Response(
+                text=render_text(families),
+                headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+            )
+        except Exception as e:
+            self.logger.bind(tag=TAG).error(f"获取指标失败: {str(e)}")
+            return web.Response(text=f"# error: {e}\n", status=500)
@@ -0,0 +1,40 @@
+from aiohttp import web
+from config.logger import setup_logging
+from core.utils.turn_trace import get_trace_recorder
+
+TAG = __name__
+
+
+class TraceHandler:
+    """单轮对话延迟追踪API处理器"""
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.logger = setup_logging()
+
+    async def handle_get_recent(self, request):
+        """处理GET请求 - 查询最近的追踪记录，可按device_id、session_id过滤"""
+        try:
+            limit = int(request.query.get("limit", 50))
+            records = get_trace_recorder(self.config).get_recent(
+                limit=limit,
+                device_id=request.query.get("device_id"),
+                session_id=request.query.get("session_id"),
+            )
+            return web.json_response({"status": "success", "traces": records})
+        except Exception as e:
+            self.logger.bind(tag=TAG).error(f"获取延迟追踪记录失败: {str(e)}")
+            return web.json_response({"error": str(e), "status": "error"}, status=500)
+
+    async def handle_get_histograms(self, request):
+        """处理GET请求 - 获取各阶段耗时分布"""
+        try:
+            return web.json_response(
+                {
+                    "status": "success",
+                    "histograms": get_trace_recorder(self.config).get_histograms(),
+                }
+            )
+        except Exception as e:
+            self.logger.bind(tag=TAG).error(f"获取延迟分布失败: {str(e)}")
+            return web.json_response({"error": str(e), "status": "error"}, status=500)
@@ -0,0 +1,28 @@
+from aiohttp import web
+from config.logger import setup_logging
+
+TAG = __name__
+
+
+class WorkerHandler:
+    """多进程worker状态API处理器"""
+
+    def __init__(self, config: dict, supervisor=None):
+        self.config = config
+        self.supervisor = supervisor
+        self.logger = setup_logging()
+
+    async def handle_get(self, request):
+        """处理GET请求 - 获取各worker汇总统计"""
+        if self.supervisor is None:
+            return web.json_response(
+                {"error": "未启用多进程worker模式", "status": "not_enabled"},
+                status=404,
+            )
+        try:
+            return web.json_response(
+                {"status": "success", "worker_stats": self.supervisor.get_stats()}
+            )
+        except Exception as e:
+            self.logger.bind(tag=TAG).error(f"获取worker状态失败: {str(e)}")
+            return web.json_response({"error": str(e), "status": "error"}, status=500)
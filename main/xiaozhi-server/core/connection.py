@@ -1,6 +1,5 @@
 import os
 import sys
-import copy
 import json
 import uuid
 import time
@@ -27,7 +26,11 @@ from core.utils.modules_initialize import (
 )
 from core.handle.reportHandle import report
 from core.providers.tts.default import DefaultTTS
-from concurrent.futures import ThreadPoolExecutor
+from core.utils.executor import (
+    ConnectionExecutor,
+    WorkloadClass,
+    get_shared_executor,
+)
 from core.utils.dialogue import Message, Dialogue
 from core.providers.asr.dto.dto import InterfaceType
 from core.handle.textHandle import handleTextMessage
@@ -35,11 +38,23 @@ from core.providers.tools.unified_tool_handler import UnifiedToolHandler
 from plugins_func.loadplugins import auto_import_modules
 from plugins_func.register import Action, ActionResponse
 from core.auth import AuthMiddleware, AuthenticationError
-from config.config_loader import get_private_config_from_api
+from config.config_loader import get_private_config_from_api_async
+from config.layered_config import LayeredConfig
 from core.providers.tts.dto.dto import ContentType, TTSMessageDTO, SentenceType
 from config.logger import setup_logging, build_module_string, create_connection_logger
 from config.manage_api_client import DeviceNotFoundException, DeviceBindException
 from core.utils.prompt_manager import PromptManager
+from core.utils.async_queue import LoopQueue, DropPolicy
+from core.utils.pcm_buffer import PCMRingBuffer
+from core.utils.audio_decoder import AudioDecoder
+from core.utils.turn_trace import (
+    TraceStage,
+    TraceStatus,
+    mark_turn,
+    finish_turn_trace,
+)
+from core.utils.metrics import audio_frames_received, observe_provider_call
+from core.utils.session_recorder import start_session_recording, record_llm_stream
 from core.utils.voiceprint_provider import VoiceprintProvider
 from core.utils import textUtils
 
@@ -64,7 +79,8 @@ class ConnectionHandler:
         server=None,
     ):
         self.common_config = config
-        self.config = copy.deepcopy(config)
+        # 共享全局配置，连接私有的修改只写入覆盖层（写时复制），避免每次连接深拷贝
+        self.config = LayeredConfig(config)
         self.session_id = str(uuid.uuid4())
         self.logger = setup_logging()
         self.server = server  # 保存server实例的引用
@@ -92,7 +108,10 @@ class ConnectionHandler:
         # 线程任务相关
         self.loop = asyncio.get_event_loop()
         self.stop_event = threading.Event()
-        self.executor = ThreadPoolExecutor(max_workers=5)
+        # 所有连接共用进程级线程池，按任务类型和连接做准入控制
+        self.executor = ConnectionExecutor(
+            get_shared_executor(config), self.session_id
+        )
 
         # 添加上报线程池
         self.report_queue = queue.Queue()
@@ -114,19 +133,31 @@ class ConnectionHandler:
         # 为每个连接单独管理声纹识别
         self.voiceprint_provider = None
 
+        # 接收音频时解码一次，PCM供VAD、ASR、声纹和上报共用
+        self.audio_decoder = AudioDecoder()
+
         # vad相关变量
-        self.client_audio_buffer = bytearray()
+        self.client_audio_buffer = PCMRingBuffer()
         self.client_have_voice = False
         self.last_activity_time = 0.0  # 统一的活动时间戳（毫秒）
         self.client_voice_stop = False
         self.client_voice_window = deque(maxlen=5)
         self.last_is_voice = False
+        # 批量VAD推理时该连接的模型循环状态
+        self.vad_model_state = None
+        # VAD能量门限的噪声底估计
+        self.vad_energy_gate = None
 
         # asr相关变量
         # 因为实际部署时可能会用到公共的本地ASR，不能把变量暴露给公共ASR
         # 所以涉及到ASR的变量，需要在这里定义，属于connection的私有变量
         self.asr_audio = []
-        self.asr_audio_queue = queue.Queue()
+        self.asr_audio_queue = self._create_asr_audio_queue()
+        self.asr_ingest_task = None
+        # 当前轮次的延迟追踪，说话结束时创建
+        self.turn_trace = None
+        # 会话录制，开启 session_record 时创建
+        self.recorder = None
 
         # llm相关变量
         self.llm_finish_task = True
@@ -161,11 +192,25 @@ class ConnectionHandler:
         self.features = None
         
         # 初始化消息拦截器
-        self.message_interceptor = get_interceptor(self.config)
+        self.message_interceptor = get_interceptor(self.common_config)
 
         # 初始化提示词管理器
         self.prompt_manager = PromptManager(config, self.logger)
 
+    def _create_asr_audio_queue(self):
+        """根据配置创建音频接收队列
+
+        async模式下由连接自身的协程消费，thread模式下由ASR线程消费
+        """
+        ingest_config = self.config.get("audio_ingest", {}) or {}
+        if ingest_config.get("mode", "async") == "thread":
+            return queue.Queue()
+        return LoopQueue(
+            self.loop,
+            maxsize=int(ingest_config.get("max_queue_size", 100)),
+            drop_policy=ingest_config.get("drop_policy", DropPolicy.DROP_OLDEST),
+        )
+
     async def handle_connection(self, ws):
         try:
             # 获取并验证headers
@@ -207,6 +252,11 @@ class ConnectionHandler:
             self.websocket = ws
             self.device_id = self.headers.get("device-id", None)
 
+            # 按配置录制会话，供回放测试使用
+            self.recorder = start_session_recording(self)
+            if self.recorder is not None:
+                self.websocket = self.recorder.wrap(ws)
+
             # 初始化活动时间戳
             self.last_activity_time = time.time() * 1000
 
@@ -217,9 +267,9 @@ class ConnectionHandler:
             self.welcome_msg["session_id"] = self.session_id
 
             # 获取差异化配置
-            self._initialize_private_config()
+            await self._initialize_private_config()
             # 异步初始化
-            self.executor.submit(self._initialize_components)
+            self.executor.submit_as(WorkloadClass.INIT, self._initialize_components)
 
             try:
                 async for message in self.websocket:
@@ -296,6 +346,7 @@ class ConnectionHandler:
         if isinstance(message, str):
             await handleTextMessage(self, message)
         elif isinstance(message, bytes):
+            audio_frames_received.inc()
             if self.vad is None:
                 return
             if self.asr is None:
@@ -458,14 +509,14 @@ class ConnectionHandler:
         except Exception as e:
             self.logger.bind(tag=TAG).warning(f"声纹识别初始化失败: {str(e)}")
 
-    def _initialize_private_config(self):
+    async def _initialize_private_config(self):
         """如果是从配置文件获取，则进行二次实例化"""
         if not self.read_config_from_api:
             return
         """从接口获取差异化的配置进行二次实例化，非全量重新实例化"""
         try:
             begin_time = time.time()
-            private_config = get_private_config_from_api(
+            private_config = await get_private_config_from_api_async(
                 self.config,
                 self.headers.get("device-id"),
                 self.headers.get("client-id", self.headers.get("device-id")),
@@ -557,15 +608,20 @@ class ConnectionHandler:
         if private_config.get("mcp_endpoint", None) is not None:
             self.config["mcp_endpoint"] = private_config["mcp_endpoint"]
         try:
-            modules = initialize_modules(
-                self.logger,
-                private_config,
-                init_vad,
-                init_asr,
-                init_llm,
-                init_tts,
-                init_memory,
-                init_intent,
+            # 模块实例化可能涉及模型加载等耗时操作，放到共享线程池执行，避免阻塞事件循环
+            modules = await asyncio.wrap_future(
+                self.executor.submit_as(
+                    WorkloadClass.INIT,
+                    initialize_modules,
+                    self.logger,
+                    private_config,
+                    init_vad,
+                    init_asr,
+                    init_llm,
+                    init_tts,
+                    init_memory,
+                    init_intent,
+                )
             )
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"初始化组件失败: {e}")
@@ -714,14 +770,21 @@ class ConnectionHandler:
             self.logger.bind(tag=TAG).warning(f"🚫 无法获取函数: intent_type={self.intent_type}, has_func_handler={hasattr(self, 'func_handler')}")
         response_message = []
 
+        memory_start = llm_start = None
         try:
             # 使用带记忆的对话
             memory_str = None
             if self.memory is not None:
+                memory_start = time.monotonic()
                 future = asyncio.run_coroutine_threadsafe(
                     self.memory.query_memory(query), self.loop
                 )
                 memory_str = future.result()
+                observe_provider_call(
+                    "memory", self.memory, time.monotonic() - memory_start
+                )
+
+            llm_start = time.monotonic()
 
             if self.intent_type == "function_call" and functions is not None:
                 # 🔍 调试打印：准备调用LLM with functions
@@ -745,8 +808,18 @@ class ConnectionHandler:
                 )
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"LLM 处理出错 {query}: {e}")
+            if llm_start is not None:
+                observe_provider_call(
+                    "llm", self.llm, time.monotonic() - llm_start, error=True
+                )
+            elif memory_start is not None:
+                observe_provider_call(
+                    "memory", self.memory, time.monotonic() - memory_start, error=True
+                )
             return None
 
+        llm_responses = record_llm_stream(self, llm_responses)
+
         # 处理流式响应
         tool_call_flag = False
         function_name = None
@@ -755,7 +828,13 @@ class ConnectionHandler:
         content_arguments = ""
         self.client_abort = False
         emotion_flag = True
+        first_response = True
         for response in llm_responses:
+            if first_response:
+                # 大模型调用耗时以首个token返回为准
+                first_response = False
+                mark_turn(self, TraceStage.LLM_FIRST_TOKEN)
+                observe_provider_call("llm", self.llm, time.monotonic() - llm_start)
             if self.client_abort:
                 break
             if self.intent_type == "function_call" and functions is not None:
@@ -848,14 +927,6 @@ class ConnectionHandler:
                     "arguments": function_arguments,
                 }
 
-                # 使用统一工具处理器处理所有工具调用
-                result = asyncio.run_coroutine_threadsafe(
-                    self.func_handler.handle_llm_function_call(
-                        self, function_call_data
-                    ),
-                    self.loop,
-                ).result()
-                self._handle_function_result(result, function_call_data, depth=depth)
                 # 🔍 调试打印：检查func_handler状态
                 if hasattr(self, 'func_handler') and self.func_handler:
                     self.logger.bind(tag=TAG).info(f"✅ func_handler 可用，开始执行...")
@@ -867,7 +938,7 @@ class ConnectionHandler:
                         self.loop,
                     ).result()
                     self.logger.bind(tag=TAG).info(f"🎯 函数执行结果: {result.action if hasattr(result, 'action') else 'Unknown'}")
-                    self._handle_function_result(result, function_call_data)
+                    self._handle_function_result(result, function_call_data, depth=depth)
                 else:
                     self.logger.bind(tag=TAG).error(f"❌ func_handler 不可用! hasattr={hasattr(self, 'func_handler')}, is_none={getattr(self, 'func_handler', None) is None}")
 
@@ -952,7 +1023,9 @@ class ConnectionHandler:
                     if self.executor is None:
                         continue
                     # 提交任务到线程池
-                    self.executor.submit(self._process_report, *item)
+                    self.executor.submit_as(
+                        WorkloadClass.REPORT, self._process_report, *item
+                    )
                 except Exception as e:
                     self.logger.bind(tag=TAG).error(f"聊天记录上报线程异常: {e}")
             except queue.Empty:
@@ -980,6 +1053,10 @@ class ConnectionHandler:
     async def close(self, ws=None):
         """资源清理方法"""
         try:
+            finish_turn_trace(self, TraceStatus.CLOSED)
+            if self.recorder is not None:
+                self.recorder.close()
+
             # 取消超时任务
             if self.timeout_task and not self.timeout_task.done():
                 self.timeout_task.cancel()
@@ -1002,6 +1079,15 @@ class ConnectionHandler:
             if self.stop_event:
                 self.stop_event.set()
 
+            # 取消音频接收协程（若close由该协程自身触发，则等待其检查停止事件后自行退出）
+            if (
+                self.asr_ingest_task
+                and not self.asr_ingest_task.done()
+                and self.asr_ingest_task is not asyncio.current_task()
+            ):
+                self.asr_ingest_task.cancel()
+            self.asr_ingest_task = None
+
             # 清空任务队列
             self.clear_queues()
             
@@ -1049,6 +1135,7 @@ class ConnectionHandler:
                 self.logger.bind(tag=TAG).error(f"关闭WebSocket连接时出错: {ws_error}")
 
             if self.tts:
+                self.tts.close_audio_channels()
                 await self.tts.close()
 
             # 最后关闭线程池（避免阻塞）
@@ -1095,7 +1182,7 @@ class ConnectionHandler:
             )
 
     def reset_vad_states(self):
-        self.client_audio_buffer = bytearray()
+        self.client_audio_buffer.clear()
         self.client_have_voice = False
         self.client_voice_stop = False
         self.logger.bind(tag=TAG).debug("VAD states reset.")
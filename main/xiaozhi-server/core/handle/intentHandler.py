@@ -1,4 +1,5 @@
 import json
+import time
 import asyncio
 import uuid
 from core.handle.sendAudioHandle import send_stt_message
@@ -6,6 +7,8 @@ from core.handle.helloHandle import checkWakeupWords
 from core.utils.util import remove_punctuation_and_length
 from core.providers.tts.dto.dto import ContentType
 from core.utils.dialogue import Message
+from core.utils.admission import submit_chat_turn
+from core.utils.metrics import observe_provider_call
 from plugins_func.register import Action, ActionResponse
 from core.providers.tts.dto.dto import TTSMessageDTO, SentenceType
 
@@ -65,10 +68,15 @@ async def analyze_intent_with_llm(conn, text):
 
     # 对话历史记录
     dialogue = conn.dialogue
+    start_time = time.monotonic()
     try:
         intent_result = await conn.intent.detect_intent(conn, dialogue.dialogue, text)
+        observe_provider_call("intent", conn.intent, time.monotonic() - start_time)
         return intent_result
     except Exception as e:
+        observe_provider_call(
+            "intent", conn.intent, time.monotonic() - start_time, error=True
+        )
         conn.logger.bind(tag=TAG).error(f"意图识别失败: {str(e)}")
 
     return None
@@ -154,8 +162,8 @@ async def process_intent_result(conn, intent_result, original_text):
                         if text is not None:
                             speak_txt(conn, text)
 
-            # 将函数执行放在线程池中
-            conn.executor.submit(process_function_call)
+            # 经过准入检查后将函数执行放在线程池中
+            await submit_chat_turn(conn, process_function_call)
             return True
         return False
     except json.JSONDecodeError as e:
@@ -7,13 +7,19 @@ import asyncio
 import json
 from core.handle.sendAudioHandle import SentenceType
 from core.utils.util import audio_to_data
+from core.utils.admission import submit_chat_turn
+from core.utils.turn_trace import TraceStage, mark_turn
 
 TAG = __name__
 
 
 async def handleAudioMessage(conn, audio):
+    # 每个音频包只在这里解码一次，之后VAD、ASR、声纹和上报都使用PCM
+    audio = conn.audio_decoder.decode(audio, conn.audio_format)
+    if audio is None:
+        return
     # 当前片段是否有人说话
-    have_voice = conn.vad.is_vad(conn, audio)
+    have_voice = await conn.vad.is_vad_async(conn, audio)
     # 如果设备刚刚被唤醒，短暂忽略VAD检测
     if have_voice and hasattr(conn, "just_woken_up") and conn.just_woken_up:
         have_voice = False
@@ -80,6 +86,7 @@ async def startToChat(conn, text):
 
     # 首先进行意图分析，使用实际文本内容
     intent_handled = await handle_user_intent(conn, actual_text)
+    mark_turn(conn, TraceStage.INTENT_DONE)
 
     if intent_handled:
         # 如果意图已被处理，不再进行聊天
@@ -87,7 +94,7 @@ async def startToChat(conn, text):
 
     # 意图未被处理，继续常规聊天流程，使用实际文本内容
     await send_stt_message(conn, actual_text)
-    conn.executor.submit(conn.chat, actual_text)
+    await submit_chat_turn(conn, conn.chat, actual_text)
 
 
 async def no_voice_close_connect(conn, have_voice):
@@ -18,21 +18,23 @@ from config.manage_api_client import report as manage_report
 TAG = __name__
 
 
-def report(conn, type, text, opus_data, report_time):
+def report(conn, type, text, audio_frames, report_time):
     """执行聊天记录上报操作
 
     Args:
         conn: 连接对象
         type: 上报类型，1为用户，2为智能体
         text: 合成文本
-        opus_data: opus音频数据
+        audio_frames: 音频数据，用户为接收时已解码的PCM帧，智能体为opus帧
         report_time: 上报时间
     """
     try:
-        if opus_data:
-            audio_data = opus_to_wav(conn, opus_data)
-        else:
+        if not audio_frames:
             audio_data = None
+        elif type == 1:
+            audio_data = pcm_to_wav(b"".join(audio_frames))
+        else:
+            audio_data = opus_to_wav(conn, audio_frames)
         # 执行上报
         manage_report(
             mac_address=conn.device_id,
@@ -69,9 +71,20 @@ def opus_to_wav(conn, opus_data):
     if not pcm_data:
         raise ValueError("没有有效的PCM数据")
 
-    # 创建WAV文件头
-    pcm_data_bytes = b"".join(pcm_data)
-    num_samples = len(pcm_data_bytes) // 2  # 16-bit samples
+    return pcm_to_wav(b"".join(pcm_data))
+
+
+def pcm_to_wav(pcm_data_bytes):
+    """为16kHz单声道16位PCM数据加上WAV文件头
+
+    Args:
+        pcm_data_bytes: PCM数据
+
+    Returns:
+        bytes: WAV格式的音频数据
+    """
+    if not pcm_data_bytes:
+        raise ValueError("没有有效的PCM数据")
 
     # WAV文件头
     wav_header = bytearray()
@@ -121,7 +134,7 @@ def enqueue_tts_report(conn, text, opus_data):
         conn.logger.bind(tag=TAG).error(f"加入TTS上报队列失败: {text}, {e}")
 
 
-def enqueue_asr_report(conn, text, opus_data):
+def enqueue_asr_report(conn, text, pcm_data):
     if not conn.read_config_from_api or conn.need_bind or not conn.report_asr_enable:
         return
     if conn.chat_history_conf == 0:
@@ -131,14 +144,14 @@ def enqueue_asr_report(conn, text, opus_data):
     Args:
         conn: 连接对象
         text: 合成文本
-        opus_data: opus音频数据
+        pcm_data: 接收时已解码的PCM音频帧
     """
     try:
         # 使用连接对象的队列，传入文本和二进制数据而非文件路径
         if conn.chat_history_conf == 2:
-            conn.report_queue.put((1, text, opus_data, int(time.time())))
+            conn.report_queue.put((1, text, pcm_data, int(time.time())))
             conn.logger.bind(tag=TAG).debug(
-                f"ASR数据已加入上报队列: {conn.device_id}, 音频大小: {len(opus_data)} "
+                f"ASR数据已加入上报队列: {conn.device_id}, 音频大小: {len(pcm_data)} "
             )
         else:
             conn.report_queue.put((1, text, None, int(time.time())))
@@ -4,6 +4,8 @@ import time
 from core.providers.tts.dto.dto import SentenceType
 from core.utils import textUtils
 from config.logger import setup_logging
+from core.utils.turn_trace import TraceStage, mark_turn, finish_turn_trace
+from core.utils.metrics import audio_frames_sent
 
 TAG = __name__
 logger = setup_logging()
@@ -13,8 +15,11 @@ async def sendAudioMessage(conn, sentenceType, audios, text):
     # 过滤空音频数据，避免播放中断
     if audios is None or len(audios) == 0:
         conn.logger.bind(tag=TAG).warning(f"跳过空音频数据: {sentenceType}, {text}")
+        if sentenceType == SentenceType.LAST:
+            # 最后一段没有音频时，之前的音频已全部发出，本轮结束
+            finish_turn_trace(conn)
         return
-    
+
     # 发送句子开始消息
     conn.logger.bind(tag=TAG).info(f"发送音频消息: {sentenceType}, {text}, 音频帧数: {len(audios)}")
 
@@ -30,6 +35,9 @@ async def sendAudioMessage(conn, sentenceType, audios, text):
 
     await send_tts_message(conn, "sentence_end", text)
 
+    if sentenceType == SentenceType.LAST:
+        finish_turn_trace(conn)
+
     # 发送结束消息（如果是最后一个文本）
     if conn.llm_finish_task and sentenceType == SentenceType.LAST:
         await send_tts_message(conn, "stop", None)
@@ -69,7 +77,7 @@ async def _sendAudio_hardware_optimized(conn, audios, pre_buffer=True):
         for i in range(pre_buffer_frames):
             if conn.client_abort:
                 break
-            await conn.websocket.send(audios[i])
+            await _send_audio_frame(conn, audios[i])
             
             if i < pre_buffer_frames - 1:
                 # 渐进式间隔：从快到标准，保持语调一致
@@ -88,7 +96,7 @@ async def _sendAudio_hardware_optimized(conn, audios, pre_buffer=True):
             break
             
         conn.last_activity_time = time.time() * 1000
-        await conn.websocket.send(opus_packet)
+        await _send_audio_frame(conn, opus_packet)
         
         # 使用标准间隔，保持语调自然
         if i < len(remaining_audios) - 1:  # 最后一帧不需要延迟
@@ -118,7 +126,7 @@ async def _sendAudio_web_optimized(conn, audios, pre_buffer=True):
             if i > 0:  # 第一帧立即发送
                 await asyncio.sleep(0.003)  # 3ms间隔
             
-            await conn.websocket.send(audios[i])
+            await _send_audio_frame(conn, audios[i])
             play_position += frame_duration
             
         remaining_audios = audios[pre_buffer_frames:]
@@ -145,10 +153,17 @@ async def _sendAudio_web_optimized(conn, audios, pre_buffer=True):
         elif delay < -max_cumulative_drift:
             conn.logger.bind(tag=TAG).warning(f"音频发送延迟过大: {delay*1000:.1f}ms，跳过延迟")
 
-        await conn.websocket.send(opus_packet)
+        await _send_audio_frame(conn, opus_packet)
         play_position += frame_duration
 
 
+async def _send_audio_frame(conn, opus_packet):
+    """发送一帧音频，并记录首帧时间和下行帧数"""
+    await conn.websocket.send(opus_packet)
+    mark_turn(conn, TraceStage.FIRST_FRAME_SENT)
+    audio_frames_sent.inc()
+
+
 def _is_hardware_device(conn):
     """检测是否为硬件设备"""
     try:
@@ -5,18 +5,26 @@ from core.api.ota_handler import OTAHandler
 from core.api.vision_handler import VisionHandler
 from core.api.interceptor_handler import InterceptorHandler
 from core.api.user_handler import UserHandler
+from core.api.worker_handler import WorkerHandler
+from core.api.admission_handler import AdmissionHandler
+from core.api.trace_handler import TraceHandler
+from core.api.metrics_handler import MetricsHandler
 
 TAG = __name__
 
 
 class SimpleHttpServer:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, worker_supervisor=None):
         self.config = config
         self.logger = setup_logging()
         self.ota_handler = OTAHandler(config)
         self.vision_handler = VisionHandler(config)
         self.interceptor_handler = InterceptorHandler(config)
         self.user_handler = UserHandler(config)
+        self.worker_handler = WorkerHandler(config, worker_supervisor)
+        self.admission_handler = AdmissionHandler(config, worker_supervisor)
+        self.trace_handler = TraceHandler(config)
+        self.metrics_handler = MetricsHandler(config, worker_supervisor)
 
     def _get_websocket_url(self, local_ip: str, port: int) -> str:
         """获取websocket地址
@@ -64,6 +72,15 @@ class SimpleHttpServer:
                     # 添加拦截器监控接口
                     web.get("/interceptor/status", self.interceptor_handler.handle_get),
                     web.post("/interceptor/control", self.interceptor_handler.handle_post),
+                    # 多进程worker汇总统计
+                    web.get("/workers/stats", self.worker_handler.handle_get),
+                    # 准入控制上限与当前占用
+                    web.get("/admission/status", self.admission_handler.handle_get),
+                    # 单轮对话延迟追踪
+                    web.get("/traces/recent", self.trace_handler.handle_get_recent),
+                    web.get("/traces/histograms", self.trace_handler.handle_get_histograms),
+                    # Prometheus 指标
+                    web.get("/metrics", self.metrics_handler.handle_get),
                     # 🔥 添加用户管理接口
                     web.get("/users", self.user_handler.handle_get_all_users),
                     web.get("/users/stats", self.user_handler.handle_get_stats),
@@ -7,13 +7,13 @@ import hashlib
 import asyncio
 import requests
 import websockets
-import opuslib_next
 import random
 from typing import Optional, Tuple, List
 from urllib import parse
 from datetime import datetime
 from config.logger import setup_logging
 from core.providers.asr.base import ASRProviderBase
+from core.utils.turn_trace import start_turn_trace
 from core.providers.asr.dto.dto import InterfaceType
 
 TAG = __name__
@@ -67,12 +67,13 @@ class AccessToken:
 
 
 class ASRProvider(ASRProviderBase):
+    runs_in_loop = True
+
     def __init__(self, config, delete_audio_file):
         super().__init__()
         self.interface_type = InterfaceType.STREAM
         self.config = config
         self.text = ""
-        self.decoder = opuslib_next.Decoder(16000, 1)
         self.asr_ws = None
         self.forward_task = None
         self.is_processing = False
@@ -148,8 +149,7 @@ class ASRProvider(ASRProviderBase):
 
         if self.asr_ws and self.is_processing and self.server_ready:
             try:
-                pcm_frame = self.decoder.decode(audio, 960)
-                await self.asr_ws.send(pcm_frame)
+                await self.asr_ws.send(audio)
             except Exception as e:
                 logger.bind(tag=TAG).warning(f"发送音频失败: {str(e)}")
                 await self._cleanup(conn)
@@ -231,8 +231,8 @@ class ASRProvider(ASRProviderBase):
                         if conn.asr_audio:
                             for cached_audio in conn.asr_audio[-10:]:
                                 try:
-                                    pcm_frame = self.decoder.decode(cached_audio, 960)
-                                    await self.asr_ws.send(pcm_frame)
+                                    # 缓存的音频在接收时已解码为PCM
+                                    await self.asr_ws.send(cached_audio)
                                 except Exception as e:
                                     logger.bind(tag=TAG).warning(f"发送缓存音频失败: {e}")
                                     break
@@ -251,6 +251,7 @@ class ASRProvider(ASRProviderBase):
                             conn.reset_vad_states()
                             # 传递缓存的音频数据
                             audio_data = getattr(conn, 'asr_audio_for_voiceprint', [])
+                            start_turn_trace(conn)
                             await self.handle_voice_stop(conn, audio_data)
                             # 清空缓存
                             conn.asr_audio_for_voiceprint = []
@@ -10,29 +10,78 @@ import json
 import io
 import time
 import concurrent.futures
+import numpy as np
 from abc import ABC, abstractmethod
 from config.logger import setup_logging
 from typing import Optional, Tuple, List, Dict, Any
 from core.handle.receiveAudioHandle import startToChat
 from core.handle.reportHandle import enqueue_asr_report
 from core.utils.util import remove_punctuation_and_length
+from core.utils.async_queue import LoopQueue
 from core.handle.receiveAudioHandle import handleAudioMessage
+from core.utils.turn_trace import TraceStage, mark_turn, start_turn_trace
+from core.utils.metrics import observe_provider_call
+from core.utils.session_recorder import record_event
+from core.utils.executor import WorkloadClass, get_shared_executor, run_coroutine_sync
+from core.providers.asr.dto.dto import InterfaceType
 
 TAG = __name__
 logger = setup_logging()
 
+# 本地ASR保留音频文件时使用的写入线程，不占用识别的关键路径
+_audio_writer: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_audio_writer_lock = threading.Lock()
+
+
+def _get_audio_writer() -> concurrent.futures.ThreadPoolExecutor:
+    global _audio_writer
+    with _audio_writer_lock:
+        if _audio_writer is None:
+            _audio_writer = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="asr-audio-writer"
+            )
+        return _audio_writer
+
 
 class ASRProviderBase(ABC):
+    # speech_to_text 内部没有同步阻塞调用时设为True，直接在连接的事件循环中执行；
+    # 否则在共享线程池中执行
+    runs_in_loop = False
+
     def __init__(self):
         pass
 
     # 打开音频通道
     async def open_audio_channels(self, conn):
+        if isinstance(conn.asr_audio_queue, LoopQueue):
+            # async模式：在连接所在的事件循环中用一个协程顺序消费音频
+            conn.asr_ingest_task = asyncio.create_task(
+                self.asr_audio_ingest_task(conn)
+            )
+            return
         conn.asr_priority_thread = threading.Thread(
             target=self.asr_text_priority_thread, args=(conn,), daemon=True
         )
         conn.asr_priority_thread.start()
 
+    # 有序处理ASR音频（协程版本，无跨线程切换）
+    async def asr_audio_ingest_task(self, conn):
+        while not conn.stop_event.is_set():
+            try:
+                message = await conn.asr_audio_queue.get()
+                await handleAudioMessage(conn, message)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.bind(tag=TAG).error(
+                    f"处理ASR音频失败: {str(e)}, 类型: {type(e).__name__}, 堆栈: {traceback.format_exc()}"
+                )
+                continue
+        if conn.asr_audio_queue.dropped > 0:
+            logger.bind(tag=TAG).info(
+                f"音频接收协程退出，队列溢出丢弃帧数: {conn.asr_audio_queue.dropped}"
+            )
+
     # 有序处理ASR音频
     def asr_text_priority_thread(self, conn):
         while not conn.stop_event.is_set():
@@ -69,6 +118,7 @@ class ASRProviderBase(ABC):
             conn.asr_audio.clear()
             conn.reset_vad_states()
             if len(asr_audio_task) > 15:
+                start_turn_trace(conn)
                 await self.handle_voice_stop(conn, asr_audio_task)
             return
         
@@ -84,6 +134,7 @@ class ASRProviderBase(ABC):
                 conn.reset_vad_states()
                 conn.last_voice_start_time = time.time()  # 重置时间
                 if len(asr_audio_task) > 15:
+                    start_turn_trace(conn)
                     await self.handle_voice_stop(conn, asr_audio_task)
                 return
         elif not have_voice:
@@ -104,6 +155,8 @@ class ASRProviderBase(ABC):
                 delattr(conn, 'last_voice_start_time')
 
             if len(asr_audio_task) > 15:
+                # 说话结束，开始本轮延迟追踪
+                start_turn_trace(conn)
                 await self.handle_voice_stop(conn, asr_audio_task)
 
     # 处理语音停止
@@ -112,13 +165,8 @@ class ASRProviderBase(ABC):
         try:
             total_start_time = time.monotonic()
             
-            # 准备音频数据
-            if conn.audio_format == "pcm":
-                pcm_data = asr_audio_task
-            else:
-                pcm_data = self.decode_opus(asr_audio_task)
-            
-            combined_pcm_data = b"".join(pcm_data)
+            # 音频在接收时已解码为PCM，这里直接拼接
+            combined_pcm_data = b"".join(asr_audio_task)
             
             # 预先准备WAV数据
             wav_data = None
@@ -127,67 +175,22 @@ class ASRProviderBase(ABC):
                 wav_data = self._pcm_to_wav(combined_pcm_data)
             
             
-            # 定义ASR任务
-            def run_asr():
-                start_time = time.monotonic()
-                try:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        result = loop.run_until_complete(
-                            self.speech_to_text(asr_audio_task, conn.session_id, conn.audio_format)
-                        )
-                        end_time = time.monotonic()
-                        logger.bind(tag=TAG).info(f"ASR耗时: {end_time - start_time:.3f}s")
-                        return result
-                    finally:
-                        loop.close()
-                except Exception as e:
-                    end_time = time.monotonic()
-                    logger.bind(tag=TAG).error(f"ASR失败: {e}")
-                    return ("", None)
-            
-            # 定义声纹识别任务
-            def run_voiceprint():
-                if not wav_data:
-                    return None
-                try:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        # 使用连接的声纹识别提供者
-                        result = loop.run_until_complete(
-                            conn.voiceprint_provider.identify_speaker(wav_data, conn.session_id)
-                        )
-                        return result
-                    finally:
-                        loop.close()
-                except Exception as e:
-                    logger.bind(tag=TAG).error(f"声纹识别失败: {e}")
-                    return None
-            
-            # 使用线程池执行器并行运行
+            # ASR和声纹识别在连接的事件循环中并行执行
             parallel_start_time = time.monotonic()
-            
-            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as thread_executor:
-                asr_future = thread_executor.submit(run_asr)
-                
-                if conn.voiceprint_provider and wav_data:
-                    voiceprint_future = thread_executor.submit(run_voiceprint)
-                    
-                    # 等待两个线程都完成
-                    asr_result = asr_future.result(timeout=15)
-                    voiceprint_result = voiceprint_future.result(timeout=15)
-                    
-                    results = {"asr": asr_result, "voiceprint": voiceprint_result}
-                else:
-                    asr_result = asr_future.result(timeout=15)
-                    results = {"asr": asr_result, "voiceprint": None}
-            
-            
+            (raw_text, file_path), speaker_name = await self.run_asr_and_voiceprint(
+                conn, asr_audio_task, wav_data
+            )
+
+            mark_turn(conn, TraceStage.ASR_DONE)
+
             # 处理结果
-            raw_text, file_path = results.get("asr", ("", None))
-            speaker_name = results.get("voiceprint", None)
+            record_event(
+                conn,
+                "asr",
+                text=raw_text,
+                speaker=speaker_name,
+                latency_ms=round((time.monotonic() - parallel_start_time) * 1000, 1),
+            )
             
             # 记录识别结果
             if raw_text:
@@ -216,6 +219,68 @@ class ASRProviderBase(ABC):
             import traceback
             logger.bind(tag=TAG).debug(f"异常详情: {traceback.format_exc()}")
 
+    async def run_asr_and_voiceprint(self, conn, asr_audio_task: List[bytes], wav_data):
+        """并行执行ASR和声纹识别，返回 ((识别文本, 文件路径), 说话人)"""
+        results = await asyncio.gather(
+            self._run_asr(conn, asr_audio_task),
+            self._run_voiceprint(conn, wav_data),
+        )
+        return results[0], results[1]
+
+    async def _run_asr(self, conn, asr_audio_task: List[bytes]):
+        start_time = time.monotonic()
+        try:
+            if self.runs_in_loop:
+                coro = self.speech_to_text(asr_audio_task, conn.session_id, "pcm")
+            else:
+                # 内部有同步调用的提供者在共享线程池中执行，线程复用各自的事件循环
+                coro = asyncio.wrap_future(
+                    conn.executor.submit_as(
+                        WorkloadClass.ASR,
+                        run_coroutine_sync,
+                        self.speech_to_text,
+                        asr_audio_task,
+                        conn.session_id,
+                        "pcm",
+                    )
+                )
+            result = await asyncio.wait_for(coro, timeout=15)
+            end_time = time.monotonic()
+            logger.bind(tag=TAG).info(f"ASR耗时: {end_time - start_time:.3f}s")
+            observe_provider_call("asr", self, end_time - start_time)
+            return result
+        except Exception as e:
+            end_time = time.monotonic()
+            logger.bind(tag=TAG).error(f"ASR失败: {e!r}")
+            observe_provider_call("asr", self, end_time - start_time, error=True)
+            return ("", None)
+
+    async def _run_voiceprint(self, conn, wav_data):
+        if not conn.voiceprint_provider or not wav_data:
+            return None
+        start_time = time.monotonic()
+        try:
+            # 使用连接的声纹识别提供者
+            result = await asyncio.wait_for(
+                conn.voiceprint_provider.identify_speaker(wav_data, conn.session_id),
+                timeout=15,
+            )
+            observe_provider_call(
+                "voiceprint",
+                conn.voiceprint_provider,
+                time.monotonic() - start_time,
+            )
+            return result
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"声纹识别失败: {e!r}")
+            observe_provider_call(
+                "voiceprint",
+                conn.voiceprint_provider,
+                time.monotonic() - start_time,
+                error=True,
+            )
+            return None
+
     def _build_enhanced_text(self, text: str, speaker_name: Optional[str]) -> str:
         """构建包含说话人信息的文本"""
         if speaker_name and speaker_name.strip():
@@ -304,3 +369,85 @@ class ASRProviderBase(ABC):
         except Exception as e:
             logger.bind(tag=TAG).error(f"音频解码过程发生错误: {e}")
             return []
+
+
+class LocalASRProviderBase(ASRProviderBase):
+    """
+    本地模型ASR的公共逻辑：整句音频以16kHz单声道的numpy数组在内存中交给模型，不经过临时文件。
+    子类实现 transcribe。只有关闭 delete_audio（保留音频）时才把音频写入 output_dir，
+    写入在后台线程中进行，不影响识别耗时。
+    speech_to_text 在连接的事件循环中执行，同步的模型推理放到共享线程池。
+    """
+
+    runs_in_loop = True
+
+    def __init__(self, config: dict, delete_audio_file: bool):
+        super().__init__()
+        self.interface_type = InterfaceType.LOCAL
+        self.output_dir = config.get("output_dir")
+        self.delete_audio_file = delete_audio_file
+        if not self.delete_audio_file:
+            os.makedirs(self.output_dir, exist_ok=True)
+
+    @abstractmethod
+    def transcribe(self, samples: np.ndarray) -> str:
+        """识别整句音频，samples 为 int16 或 float32（-1~1）的一维数组，返回识别文本"""
+        pass
+
+    async def transcribe_async(self, samples: np.ndarray, session_id: str = "") -> str:
+        """识别入口：默认在共享线程池中调用 transcribe，支持批量识别或进程池的提供者可重写"""
+        return await asyncio.wrap_future(
+            get_shared_executor().submit(
+                WorkloadClass.ASR, session_id, self.transcribe, samples
+            )
+        )
+
+    @staticmethod
+    def to_float32(samples: np.ndarray) -> np.ndarray:
+        """int16 采样转换为模型需要的 -1~1 float32"""
+        if samples.dtype == np.int16:
+            return samples.astype(np.float32) / 32768
+        return samples
+
+    async def speech_to_text(
+        self, opus_data: List[bytes], session_id: str, audio_format="opus"
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """语音转文本主处理逻辑"""
+        file_path = None
+        try:
+            if audio_format == "pcm":
+                pcm_data = opus_data
+            else:
+                pcm_data = self.decode_opus(opus_data)
+            if not self.delete_audio_file:
+                file_path = self.save_audio_async(pcm_data, session_id)
+
+            start_time = time.time()
+            samples = np.frombuffer(b"".join(pcm_data), dtype=np.int16)
+            text = await self.transcribe_async(samples, session_id)
+            logger.bind(tag=TAG).debug(
+                f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text}"
+            )
+            return text, file_path
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"语音识别失败: {e}", exc_info=True)
+            return "", file_path
+
+    def save_audio_async(self, pcm_data: List[bytes], session_id: str) -> str:
+        """在后台线程中把音频保存为WAV文件，立即返回文件路径"""
+        module_name = type(self).__module__.split(".")[-1]
+        file_name = f"asr_{module_name}_{session_id}_{uuid.uuid4()}.wav"
+        file_path = os.path.join(self.output_dir, file_name)
+        _get_audio_writer().submit(self._write_wav, file_path, b"".join(pcm_data))
+        return file_path
+
+    @staticmethod
+    def _write_wav(file_path: str, pcm_bytes: bytes):
+        try:
+            with wave.open(file_path, "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)  # 2 bytes = 16-bit
+                wf.setframerate(16000)
+                wf.writeframes(pcm_bytes)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"音频文件保存失败: {file_path} | 错误: {e}")
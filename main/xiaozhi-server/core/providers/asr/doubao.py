@@ -81,6 +81,8 @@ def parse_response(res):
 
 
 class ASRProvider(ASRProviderBase):
+    runs_in_loop = True
+
     def __init__(self, config: dict, delete_audio_file: bool):
         super().__init__()
         self.interface_type = InterfaceType.NON_STREAM
@@ -1,10 +1,12 @@
+import copy
 import json
 import gzip
 import uuid
 import asyncio
 import websockets
-import opuslib_next
 from core.providers.asr.base import ASRProviderBase
+from core.utils.turn_trace import start_turn_trace
+from core.utils.ws_pool import WebSocketSessionPool, get_ws_session_pool
 from config.logger import setup_logging
 from core.providers.asr.dto.dto import InterfaceType
 
@@ -12,7 +14,74 @@ TAG = __name__
 logger = setup_logging()
 
 
+async def open_session(ws_url, headers, request_params):
+    """建立WebSocket连接并完成初始化请求，返回可以直接发送音频的连接"""
+    logger.bind(tag=TAG).debug(f"正在连接ASR服务，headers: {headers}")
+
+    ws = await websockets.connect(
+        ws_url,
+        additional_headers=headers,
+        max_size=1000000000,
+        ping_interval=None,
+        ping_timeout=None,
+        close_timeout=10,
+    )
+
+    # 发送初始化请求
+    try:
+        payload_bytes = str.encode(json.dumps(request_params))
+        payload_bytes = gzip.compress(payload_bytes)
+        full_client_request = ASRProvider.generate_header()
+        full_client_request.extend((len(payload_bytes)).to_bytes(4, "big"))
+        full_client_request.extend(payload_bytes)
+
+        logger.bind(tag=TAG).debug(f"发送初始化请求: {request_params}")
+        await ws.send(full_client_request)
+
+        # 等待初始化响应
+        init_res = await ws.recv()
+        result = ASRProvider.parse_response(init_res)
+        logger.bind(tag=TAG).debug(f"收到初始化响应: {result}")
+
+        # 检查初始化响应
+        if "code" in result and result["code"] != 1000:
+            error_msg = f"ASR服务初始化失败: {result.get('payload_msg', {}).get('error', '未知错误')}"
+            logger.bind(tag=TAG).error(error_msg)
+            raise Exception(error_msg)
+
+    except Exception as e:
+        logger.bind(tag=TAG).error(f"发送初始化请求失败: {str(e)}")
+        if hasattr(e, "__cause__") and e.__cause__:
+            logger.bind(tag=TAG).error(f"错误原因: {str(e.__cause__)}")
+        await ws.close()
+        raise e
+    return ws
+
+
+def session_opener(ws_url, headers, request_params):
+    """
+    按配置生成的连接参数返回 open_session 协程函数，每次建立连接时更新连接ID和请求ID。
+    只持有这些参数本身，不引用任何连接的 ASR 实例，可以放进进程级的会话池。
+    """
+    headers = dict(headers) if headers else None
+    request_params = copy.deepcopy(request_params)
+
+    async def _open():
+        session_headers = (
+            dict(headers, **{"X-Api-Connect-Id": str(uuid.uuid4())})
+            if headers
+            else None
+        )
+        session_params = copy.deepcopy(request_params)
+        session_params["request"]["reqid"] = str(uuid.uuid4())
+        return await open_session(ws_url, session_headers, session_params)
+
+    return _open
+
+
 class ASRProvider(ASRProviderBase):
+    runs_in_loop = True
+
     def __init__(self, config, delete_audio_file):
         super().__init__()
         self.interface_type = InterfaceType.STREAM
@@ -20,7 +89,6 @@ class ASRProvider(ASRProviderBase):
         self.text = ""
         self.max_retries = 3
         self.retry_delay = 2
-        self.decoder = opuslib_next.Decoder(16000, 1)
         self.asr_ws = None
         self.forward_task = None
         self.is_processing = False  # 添加处理状态标志
@@ -35,7 +103,9 @@ class ASRProvider(ASRProviderBase):
         self.delete_audio_file = delete_audio_file
 
         # 火山引擎ASR配置
-        self.ws_url = "wss://openspeech.bytedance.com/api/v3/sauc/bigmodel"
+        self.ws_url = config.get(
+            "ws_url", "wss://openspeech.bytedance.com/api/v3/sauc/bigmodel"
+        )
         self.uid = config.get("uid", "streaming_asr_service")
         self.workflow = config.get(
             "workflow", "audio_in,resample,partition,vad,fe,decode,itn,nlu_punctuate"
@@ -50,6 +120,35 @@ class ASRProvider(ASRProviderBase):
         self.auth_method = config.get("auth_method", "token")
         self.secret = config.get("secret", "access_secret")
 
+        self._open_session = session_opener(
+            self.ws_url,
+            self.token_auth() if self.auth_method == "token" else None,
+            self.construct_request(""),
+        )
+
+        # 预热会话池：配置相同的连接在进程内共用
+        self.session_pool = None
+        pool_size = int(config.get("session_pool_size", 0))
+        if pool_size > 0:
+            key = ("doubao_stream",) + tuple(
+                sorted((k, str(v)) for k, v in config.items())
+            )
+            # 会话池只持有按配置生成的 open_session，不引用本实例
+            pool_name = f"doubao_stream:{self.appid}"
+            open_pooled = self._open_session
+            max_idle_s = config.get("session_max_idle_s", 15)
+            keep_warm_s = config.get("session_keep_warm_s", 300)
+            self.session_pool = get_ws_session_pool(
+                key,
+                lambda: WebSocketSessionPool(
+                    pool_name,
+                    open_pooled,
+                    size=pool_size,
+                    max_idle_s=max_idle_s,
+                    keep_warm_s=keep_warm_s,
+                ),
+            )
+
     async def open_audio_channels(self, conn):
         await super().open_audio_channels(conn)
 
@@ -64,6 +163,7 @@ class ASRProvider(ASRProviderBase):
         
         # 当没有音频数据时处理完整语音片段
         if not audio and len(conn.asr_audio_for_voiceprint) > 0:
+            start_turn_trace(conn)
             await self.handle_voice_stop(conn, conn.asr_audio_for_voiceprint)
             conn.asr_audio_for_voiceprint = []
 
@@ -71,47 +171,7 @@ class ASRProvider(ASRProviderBase):
         if audio_have_voice and self.asr_ws is None and not self.is_processing:
             try:
                 self.is_processing = True
-                # 建立新的WebSocket连接
-                headers = self.token_auth() if self.auth_method == "token" else None
-                logger.bind(tag=TAG).info(f"正在连接ASR服务，headers: {headers}")
-
-                self.asr_ws = await websockets.connect(
-                    self.ws_url,
-                    additional_headers=headers,
-                    max_size=1000000000,
-                    ping_interval=None,
-                    ping_timeout=None,
-                    close_timeout=10,
-                )
-
-                # 发送初始化请求
-                request_params = self.construct_request(str(uuid.uuid4()))
-                try:
-                    payload_bytes = str.encode(json.dumps(request_params))
-                    payload_bytes = gzip.compress(payload_bytes)
-                    full_client_request = self.generate_header()
-                    full_client_request.extend((len(payload_bytes)).to_bytes(4, "big"))
-                    full_client_request.extend(payload_bytes)
-
-                    logger.bind(tag=TAG).info(f"发送初始化请求: {request_params}")
-                    await self.asr_ws.send(full_client_request)
-
-                    # 等待初始化响应
-                    init_res = await self.asr_ws.recv()
-                    result = self.parse_response(init_res)
-                    logger.bind(tag=TAG).info(f"收到初始化响应: {result}")
-
-                    # 检查初始化响应
-                    if "code" in result and result["code"] != 1000:
-                        error_msg = f"ASR服务初始化失败: {result.get('payload_msg', {}).get('error', '未知错误')}"
-                        logger.bind(tag=TAG).error(error_msg)
-                        raise Exception(error_msg)
-
-                except Exception as e:
-                    logger.bind(tag=TAG).error(f"发送初始化请求失败: {str(e)}")
-                    if hasattr(e, "__cause__") and e.__cause__:
-                        logger.bind(tag=TAG).error(f"错误原因: {str(e.__cause__)}")
-                    raise e
+                self.asr_ws = await self._acquire_session()
 
                 # 启动接收ASR结果的异步任务
                 self.forward_task = asyncio.create_task(self._forward_asr_results(conn))
@@ -120,8 +180,8 @@ class ASRProvider(ASRProviderBase):
                 if conn.asr_audio and len(conn.asr_audio) > 0:
                     for cached_audio in conn.asr_audio[-10:]:
                         try:
-                            pcm_frame = self.decoder.decode(cached_audio, 960)
-                            payload = gzip.compress(pcm_frame)
+                            # 缓存的音频在接收时已解码为PCM
+                            payload = gzip.compress(cached_audio)
                             audio_request = bytearray(
                                 self.generate_audio_default_header()
                             )
@@ -146,8 +206,7 @@ class ASRProvider(ASRProviderBase):
         # 发送当前音频数据
         if self.asr_ws and self.is_processing:
             try:
-                pcm_frame = self.decoder.decode(audio, 960)
-                payload = gzip.compress(pcm_frame)
+                payload = gzip.compress(audio)
                 audio_request = bytearray(self.generate_audio_default_header())
                 audio_request.extend(len(payload).to_bytes(4, "big"))
                 audio_request.extend(payload)
@@ -155,6 +214,18 @@ class ASRProvider(ASRProviderBase):
             except Exception as e:
                 logger.bind(tag=TAG).info(f"发送音频数据时发生错误: {e}")
 
+    async def _acquire_session(self):
+        if self.session_pool:
+            return await self.session_pool.acquire()
+        return await self._open_session()
+
+    async def _release_session(self, ws):
+        # 一个连接只对应一次识别会话，结束后关闭，由会话池在后台补充新的预热会话
+        if self.session_pool:
+            await self.session_pool.release(ws)
+        else:
+            await ws.close()
+
     async def _forward_asr_results(self, conn):
         try:
             while self.asr_ws and not conn.stop_event.is_set():
@@ -184,6 +255,7 @@ class ASRProvider(ASRProviderBase):
                                 self.text = ""
                                 conn.reset_vad_states()
                                 if len(audio_data) > 15:  # 确保有足够音频数据
+                                    start_turn_trace(conn)
                                     await self.handle_voice_stop(conn, audio_data)
                                 break
 
@@ -195,6 +267,7 @@ class ASRProvider(ASRProviderBase):
                                     )
                                     conn.reset_vad_states()
                                     if len(audio_data) > 15:  # 确保有足够音频数据
+                                        start_turn_trace(conn)
                                         await self.handle_voice_stop(conn, audio_data)
                                     break
                         elif "error" in payload:
@@ -219,7 +292,7 @@ class ASRProvider(ASRProviderBase):
                 logger.bind(tag=TAG).error(f"错误原因: {str(e.__cause__)}")
         finally:
             if self.asr_ws:
-                await self.asr_ws.close()
+                await self._release_session(self.asr_ws)
                 self.asr_ws = None
             self.is_processing = False
             if conn:
@@ -232,7 +305,7 @@ class ASRProvider(ASRProviderBase):
 
     def stop_ws_connection(self):
         if self.asr_ws:
-            asyncio.create_task(self.asr_ws.close())
+            asyncio.create_task(self._release_session(self.asr_ws))
             self.asr_ws = None
         self.is_processing = False
 
@@ -277,8 +350,8 @@ class ASRProvider(ASRProviderBase):
             "X-Api-Connect-Id": str(uuid.uuid4()),
         }
 
+    @staticmethod
     def generate_header(
-        self,
         version=0x01,
         message_type=0x01,
         message_type_specific_flags=0x00,
@@ -314,7 +387,8 @@ class ASRProvider(ASRProviderBase):
             compression_type=0x01,
         )
 
-    def parse_response(self, res: bytes) -> dict:
+    @staticmethod
+    def parse_response(res: bytes) -> dict:
         try:
             # 检查响应长度
             if len(res) < 4:
@@ -360,7 +434,7 @@ class ASRProvider(ASRProviderBase):
     async def close(self):
         """资源清理方法"""
         if self.asr_ws:
-            await self.asr_ws.close()
+            await self._release_session(self.asr_ws)
             self.asr_ws = None
         if self.forward_task:
             self.forward_task.cancel()
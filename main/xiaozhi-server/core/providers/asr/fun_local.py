@@ -1,22 +1,16 @@
-import time
-import os
 import sys
 import io
 import psutil
+import numpy as np
 from config.logger import setup_logging
-from typing import Optional, Tuple, List
-from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.base import LocalASRProviderBase
+from core.utils.asr_batcher import ASRBatcher
 from funasr import AutoModel
 from funasr.utils.postprocess_utils import rich_transcription_postprocess
-import shutil
-from core.providers.asr.dto.dto import InterfaceType
 
 TAG = __name__
 logger = setup_logging()
 
-MAX_RETRIES = 2
-RETRY_DELAY = 1  # 重试延迟（秒）
-
 
 # 捕获标准输出
 class CaptureOutput:
@@ -35,9 +29,9 @@ class CaptureOutput:
             logger.bind(tag=TAG).info(self.output.strip())
 
 
-class ASRProvider(ASRProviderBase):
+class ASRProvider(LocalASRProviderBase):
     def __init__(self, config: dict, delete_audio_file: bool):
-        super().__init__()
+        super().__init__(config, delete_audio_file)
         
         # 内存检测，要求大于2G
         min_mem_bytes = 2 * 1024 * 1024 * 1024
@@ -45,13 +39,7 @@ class ASRProvider(ASRProviderBase):
         if total_mem < min_mem_bytes:
             logger.bind(tag=TAG).error(f"可用内存不足2G，当前仅有 {total_mem / (1024*1024):.2f} MB，可能无法启动FunASR")
         
-        self.interface_type = InterfaceType.LOCAL
         self.model_dir = config.get("model_dir")
-        self.output_dir = config.get("output_dir")  # 修正配置键名
-        self.delete_audio_file = delete_audio_file
-
-        # 确保输出目录存在
-        os.makedirs(self.output_dir, exist_ok=True)
         with CaptureOutput():
             self.model = AutoModel(
                 model=self.model_dir,
@@ -61,74 +49,35 @@ class ASRProvider(ASRProviderBase):
                 # device="cuda:0",  # 启用GPU加速
             )
 
-    async def speech_to_text(
-        self, opus_data: List[bytes], session_id: str, audio_format="opus"
-    ) -> Tuple[Optional[str], Optional[str]]:
-        """语音转文本主处理逻辑"""
-        file_path = None
-        retry_count = 0
-
-        while retry_count < MAX_RETRIES:
-            try:
-                # 合并所有opus数据包
-                if audio_format == "pcm":
-                    pcm_data = opus_data
-                else:
-                    pcm_data = self.decode_opus(opus_data)
-
-                combined_pcm_data = b"".join(pcm_data)
-
-                # 检查磁盘空间
-                if not self.delete_audio_file:
-                    free_space = shutil.disk_usage(self.output_dir).free
-                    if free_space < len(combined_pcm_data) * 2:  # 预留2倍空间
-                        raise OSError("磁盘空间不足")
-
-                # 判断是否保存为WAV文件
-                if self.delete_audio_file:
-                    pass
-                else:
-                    file_path = self.save_audio_to_file(pcm_data, session_id)
-
-                # 语音识别
-                start_time = time.time()
-                result = self.model.generate(
-                    input=combined_pcm_data,
-                    cache={},
-                    language="auto",
-                    use_itn=True,
-                    batch_size_s=60,
-                )
-                text = rich_transcription_postprocess(result[0]["text"])
-                logger.bind(tag=TAG).debug(
-                    f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text}"
-                )
-
-                return text, file_path
-
-            except OSError as e:
-                retry_count += 1
-                if retry_count >= MAX_RETRIES:
-                    logger.bind(tag=TAG).error(
-                        f"语音识别失败（已重试{retry_count}次）: {e}", exc_info=True
-                    )
-                    return "", file_path
-                logger.bind(tag=TAG).warning(
-                    f"语音识别失败，正在重试（{retry_count}/{MAX_RETRIES}）: {e}"
-                )
-                time.sleep(RETRY_DELAY)
-
-            except Exception as e:
-                logger.bind(tag=TAG).error(f"语音识别失败: {e}", exc_info=True)
-                return "", file_path
+        # 跨连接批量识别：各连接的整句音频在攒批窗口内合并为一次generate
+        self.batcher = None
+        batch_enabled = config.get("batch_enabled", False)
+        if batch_enabled and str(batch_enabled).lower() not in ("false", "0"):
+            batch_window_ms = config.get("batch_window_ms", "20")
+            batch_max_size = config.get("batch_max_size", "8")
+            self.batcher = ASRBatcher(
+                self._transcribe_batch,
+                max_batch=int(batch_max_size) if batch_max_size else 8,
+                window_ms=float(batch_window_ms) if batch_window_ms else 20,
+                name="funasr",
+            )
 
-            finally:
-                # 文件清理逻辑
-                if self.delete_audio_file and file_path and os.path.exists(file_path):
-                    try:
-                        os.remove(file_path)
-                        logger.bind(tag=TAG).debug(f"已删除临时音频文件: {file_path}")
-                    except Exception as e:
-                        logger.bind(tag=TAG).error(
-                            f"文件删除失败: {file_path} | 错误: {e}"
-                        )
+    def transcribe(self, samples: np.ndarray) -> str:
+        return self._transcribe_batch([samples])[0]
+
+    async def transcribe_async(self, samples: np.ndarray, session_id: str = "") -> str:
+        if self.batcher is None:
+            return await super().transcribe_async(samples, session_id)
+        return await self.batcher.infer(samples)
+
+    def _transcribe_batch(self, samples_list) -> list:
+        """一次generate识别多句音频，返回顺序与输入一致的识别文本"""
+        result = self.model.generate(
+            input=[self.to_float32(samples) for samples in samples_list],
+            cache={},
+            language="auto",
+            use_itn=True,
+            batch_size=len(samples_list),
+            batch_size_s=60,
+        )
+        return [rich_transcription_postprocess(item["text"]) for item in result]
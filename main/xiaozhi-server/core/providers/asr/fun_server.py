@@ -13,6 +13,8 @@ logger = setup_logging()
 
 
 class ASRProvider(ASRProviderBase):
+    runs_in_loop = True
+
     def __init__(self, config: dict, delete_audio_file: bool):
         """
         Initialize the ASRProvider with server configuration.
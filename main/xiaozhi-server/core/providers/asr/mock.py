@@ -0,0 +1,57 @@
+"""
+离线模拟ASR，用于压测和回归测试
+
+不访问任何网络服务，按配置的延迟返回预设的识别文本：
+- 延迟 = delay_ms + 音频时长 × rtf（实时率），模拟识别耗时随音频长度增长
+- 识别文本按音频帧数从 transcripts 中取，同样的音频总是得到同样的文本
+"""
+
+import asyncio
+from typing import Optional, Tuple, List
+from config.logger import setup_logging
+from core.providers.asr.dto.dto import InterfaceType
+from core.providers.asr.base import ASRProviderBase
+
+TAG = __name__
+logger = setup_logging()
+
+FRAME_DURATION = 0.06  # 每个opus包60ms
+
+
+class ASRProvider(ASRProviderBase):
+    runs_in_loop = True
+
+    def __init__(self, config: dict, delete_audio_file: bool):
+        super().__init__()
+        self.interface_type = InterfaceType.NON_STREAM
+        transcripts = config.get("transcripts") or ["你好，今天天气怎么样"]
+        if isinstance(transcripts, str):
+            transcripts = [transcripts]
+        self.transcripts = [str(t) for t in transcripts]
+        self.delay_ms = float(config.get("delay_ms", 200))
+        self.rtf = float(config.get("rtf", 0))
+        # 是否真实解码opus，开启后可把解码开销计入压测结果
+        self.decode_audio = str(config.get("decode_audio", True)).lower() in (
+            "true",
+            "1",
+            "yes",
+        )
+        self.output_dir = config.get("output_dir", "tmp/")
+        self.delete_audio_file = delete_audio_file
+
+    async def speech_to_text(
+        self, opus_data: List[bytes], session_id: str, audio_format="opus"
+    ) -> Tuple[Optional[str], Optional[str]]:
+        if audio_format == "pcm":
+            audio_seconds = sum(len(chunk) for chunk in opus_data) / 2 / 16000
+        else:
+            if self.decode_audio:
+                self.decode_opus(opus_data)
+            audio_seconds = len(opus_data) * FRAME_DURATION
+
+        await asyncio.sleep((self.delay_ms / 1000) + audio_seconds * self.rtf)
+        text = self.transcripts[len(opus_data) % len(self.transcripts)]
+        logger.bind(tag=TAG).debug(
+            f"模拟识别完成，音频时长: {audio_seconds:.2f}s，结果: {text}"
+        )
+        return text, None
@@ -0,0 +1,34 @@
+"""
+回放ASR：按录制时的耗时返回录制的识别结果，配合 performance_tester_replay.py 使用
+"""
+
+import asyncio
+from typing import Optional, Tuple, List
+from config.logger import setup_logging
+from core.providers.asr.dto.dto import InterfaceType
+from core.providers.asr.base import ASRProviderBase
+from core.utils.session_replay import get_replay_store
+
+TAG = __name__
+logger = setup_logging()
+
+
+class ASRProvider(ASRProviderBase):
+    runs_in_loop = True
+
+    def __init__(self, config: dict, delete_audio_file: bool):
+        super().__init__()
+        self.interface_type = InterfaceType.NON_STREAM
+        self.output_dir = config.get("output_dir", "tmp/")
+        self.delete_audio_file = delete_audio_file
+
+    async def speech_to_text(
+        self, opus_data: List[bytes], session_id: str, audio_format="opus"
+    ) -> Tuple[Optional[str], Optional[str]]:
+        session = get_replay_store().get(session_id)
+        event = session.next_asr() if session is not None else None
+        if event is None:
+            logger.bind(tag=TAG).warning(f"录制中没有更多识别结果: {session_id}")
+            return "", None
+        await asyncio.sleep(event.get("latency_ms", 0) / 1000)
+        return event.get("text", ""), None
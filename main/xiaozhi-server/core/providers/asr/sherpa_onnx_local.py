@@ -1,12 +1,8 @@
-import time
-import wave
 import os
 import sys
 import io
 from config.logger import setup_logging
-from typing import Optional, Tuple, List
-from core.providers.asr.dto.dto import InterfaceType
-from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.base import LocalASRProviderBase
 
 import numpy as np
 import sherpa_onnx
@@ -34,16 +30,10 @@ class CaptureOutput:
             logger.bind(tag=TAG).info(self.output.strip())
 
 
-class ASRProvider(ASRProviderBase):
+class ASRProvider(LocalASRProviderBase):
     def __init__(self, config: dict, delete_audio_file: bool):
-        super().__init__()
-        self.interface_type = InterfaceType.LOCAL
+        super().__init__(config, delete_audio_file)
         self.model_dir = config.get("model_dir")
-        self.output_dir = config.get("output_dir")
-        self.delete_audio_file = delete_audio_file
-
-        # 确保输出目录存在
-        os.makedirs(self.output_dir, exist_ok=True)
 
         # 初始化模型文件路径
         model_files = {
@@ -84,68 +74,8 @@ class ASRProvider(ASRProviderBase):
                 use_itn=True,
             )
 
-    def read_wave(self, wave_filename: str) -> Tuple[np.ndarray, int]:
-        """
-        Args:
-        wave_filename:
-            Path to a wave file. It should be single channel and each sample should
-            be 16-bit. Its sample rate does not need to be 16kHz.
-        Returns:
-        Return a tuple containing:
-        - A 1-D array of dtype np.float32 containing the samples, which are
-        normalized to the range [-1, 1].
-        - sample rate of the wave file
-        """
-
-        with wave.open(wave_filename) as f:
-            assert f.getnchannels() == 1, f.getnchannels()
-            assert f.getsampwidth() == 2, f.getsampwidth()  # it is in bytes
-            num_samples = f.getnframes()
-            samples = f.readframes(num_samples)
-            samples_int16 = np.frombuffer(samples, dtype=np.int16)
-            samples_float32 = samples_int16.astype(np.float32)
-
-            samples_float32 = samples_float32 / 32768
-            return samples_float32, f.getframerate()
-
-    async def speech_to_text(
-        self, opus_data: List[bytes], session_id: str, audio_format="opus"
-    ) -> Tuple[Optional[str], Optional[str]]:
-        """语音转文本主处理逻辑"""
-        file_path = None
-        try:
-            # 保存音频文件
-            start_time = time.time()
-            if audio_format == "pcm":
-                pcm_data = opus_data
-            else:
-                pcm_data = self.decode_opus(opus_data)
-            file_path = self.save_audio_to_file(pcm_data, session_id)
-            logger.bind(tag=TAG).debug(
-                f"音频文件保存耗时: {time.time() - start_time:.3f}s | 路径: {file_path}"
-            )
-
-            # 语音识别
-            start_time = time.time()
-            s = self.model.create_stream()
-            samples, sample_rate = self.read_wave(file_path)
-            s.accept_waveform(sample_rate, samples)
-            self.model.decode_stream(s)
-            text = s.result.text
-            logger.bind(tag=TAG).debug(
-                f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text}"
-            )
-
-            return text, file_path
-
-        except Exception as e:
-            logger.bind(tag=TAG).error(f"语音识别失败: {e}", exc_info=True)
-            return "", file_path
-        finally:
-            # 文件清理逻辑
-            if self.delete_audio_file and file_path and os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    logger.bind(tag=TAG).debug(f"已删除临时音频文件: {file_path}")
-                except Exception as e:
-                    logger.bind(tag=TAG).error(f"文件删除失败: {file_path} | 错误: {e}")
+    def transcribe(self, samples: np.ndarray) -> str:
+        s = self.model.create_stream()
+        s.accept_waveform(16000, self.to_float32(samples))
+        self.model.decode_stream(s)
+        return s.result.text
@@ -0,0 +1,201 @@
+import os
+import threading
+from typing import Optional, Tuple, List
+
+import numpy as np
+import sherpa_onnx
+
+from config.logger import setup_logging
+from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.dto.dto import InterfaceType
+from core.utils.micro_batcher import BatchRequest, MicroBatcher
+from core.utils.turn_trace import start_turn_trace
+
+TAG = __name__
+logger = setup_logging()
+
+SAMPLE_RATE = 16000
+
+# 流式模型只读，进程内按配置共享一份；每个连接只持有自己的识别流
+_recognizers = {}
+_decoders = {}
+_recognizers_lock = threading.Lock()
+
+
+class _StreamDecoder:
+    """
+    在后台线程中为所有连接解码：各连接把新收到的音频连同自己的识别流提交进来，
+    攒批窗口内提交的识别流送入音频后，用 decode_streams 一次解码所有已就绪的流，
+    神经网络解码不在事件循环中进行。
+    """
+
+    def __init__(self, recognizer, max_batch=32, window_ms=5, name="sherpa-stream"):
+        self.recognizer = recognizer
+        self._batcher = MicroBatcher(self._process, max_batch, window_ms, name)
+
+    async def decode(self, stream, pcm_list, tail_padding=None):
+        """送入 PCM 音频并解码；tail_padding 不为空时补充尾部静音并结束输入"""
+        await self._batcher.submit((stream, pcm_list, tail_padding))
+
+    def _process(self, batch: List[BatchRequest]):
+        streams = []
+        for request in batch:
+            stream, pcm_list, tail_padding = request.payload
+            for pcm in pcm_list:
+                if pcm:
+                    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+                    stream.accept_waveform(SAMPLE_RATE, samples / 32768)
+            if tail_padding is not None:
+                stream.accept_waveform(SAMPLE_RATE, tail_padding)
+                stream.input_finished()
+            streams.append(stream)
+        ready = [stream for stream in streams if self.recognizer.is_ready(stream)]
+        while ready:
+            self.recognizer.decode_streams(ready)
+            ready = [stream for stream in ready if self.recognizer.is_ready(stream)]
+        for request in batch:
+            request.set_result(None)
+
+
+def _get_decoder(config: dict, recognizer) -> _StreamDecoder:
+    with _recognizers_lock:
+        decoder = _decoders.get(id(recognizer))
+        if decoder is None:
+            batch_window_ms = config.get("batch_window_ms", "5")
+            batch_max_size = config.get("batch_max_size", "32")
+            decoder = _StreamDecoder(
+                recognizer,
+                max_batch=int(batch_max_size) if batch_max_size else 32,
+                window_ms=float(batch_window_ms) if batch_window_ms else 5,
+            )
+            _decoders[id(recognizer)] = decoder
+        return decoder
+
+
+def _get_recognizer(config: dict):
+    model_dir = config.get("model_dir")
+    model_files = {
+        name: os.path.join(model_dir, config.get(name) or default)
+        for name, default in (
+            ("encoder", "encoder-epoch-99-avg-1.int8.onnx"),
+            ("decoder", "decoder-epoch-99-avg-1.onnx"),
+            ("joiner", "joiner-epoch-99-avg-1.int8.onnx"),
+            ("tokens", "tokens.txt"),
+        )
+    }
+    num_threads = int(config.get("num_threads", 2))
+    enable_endpoint = str(config.get("enable_endpoint_detection", True)).lower() in (
+        "true",
+        "1",
+        "yes",
+    )
+    rule1 = float(config.get("rule1_min_trailing_silence", 2.4))
+    rule2 = float(config.get("rule2_min_trailing_silence", 0.8))
+    rule3 = float(config.get("rule3_min_utterance_length", 20))
+    key = (
+        tuple(model_files.values()),
+        num_threads,
+        enable_endpoint,
+        rule1,
+        rule2,
+        rule3,
+    )
+    with _recognizers_lock:
+        recognizer = _recognizers.get(key)
+        if recognizer is None:
+            for file_path in model_files.values():
+                if not os.path.isfile(file_path):
+                    raise FileNotFoundError(f"模型文件不存在: {file_path}")
+            recognizer = sherpa_onnx.OnlineRecognizer.from_transducer(
+                tokens=model_files["tokens"],
+                encoder=model_files["encoder"],
+                decoder=model_files["decoder"],
+                joiner=model_files["joiner"],
+                num_threads=num_threads,
+                sample_rate=SAMPLE_RATE,
+                feature_dim=80,
+                decoding_method="greedy_search",
+                enable_endpoint_detection=enable_endpoint,
+                rule1_min_trailing_silence=rule1,
+                rule2_min_trailing_silence=rule2,
+                rule3_min_utterance_length=rule3,
+            )
+            _recognizers[key] = recognizer
+            logger.bind(tag=TAG).info(f"流式识别模型加载完成: {model_dir}")
+        return recognizer
+
+
+class ASRProvider(ASRProviderBase):
+    """
+    本地流式识别：音频在 receive_audio 中边收边送入 OnlineRecognizer 的识别流并解码，
+    语音结束（Silero VAD 判定静默，或模型自身的端点检测）时只需解码最后不足一个分块的音频即可得到最终结果。
+    解码由进程内共享的 _StreamDecoder 在后台线程中跨连接批量进行。
+    """
+
+    runs_in_loop = True
+
+    def __init__(self, config: dict, delete_audio_file: bool):
+        super().__init__()
+        # 流式接口：每个连接一个实例，持有自己的识别流；模型在实例之间共享
+        self.interface_type = InterfaceType.STREAM
+        self.config = config
+        self.output_dir = config.get("output_dir", "tmp/")
+        self.delete_audio_file = delete_audio_file
+        self.text = ""
+        self.tail_padding = np.zeros(
+            int(SAMPLE_RATE * int(config.get("tail_padding_ms", 500)) / 1000),
+            dtype=np.float32,
+        )
+        self.recognizer = _get_recognizer(config)
+        self.decoder = _get_decoder(config, self.recognizer)
+        self.stream = None
+
+    async def receive_audio(self, conn, audio, audio_have_voice):
+        if conn.client_listen_mode == "auto" or conn.client_listen_mode == "realtime":
+            have_voice = audio_have_voice
+        else:
+            have_voice = conn.client_have_voice
+
+        # 保留语音开始前的少量音频，开始识别时一并送入
+        conn.asr_audio.append(audio)
+        conn.asr_audio = conn.asr_audio[-10:]
+
+        if self.stream is None:
+            if not have_voice or not audio:
+                return
+            self.stream = self.recognizer.create_stream()
+            conn.asr_audio_for_voiceprint = list(conn.asr_audio)
+            await self.decoder.decode(self.stream, list(conn.asr_audio))
+        elif audio:
+            conn.asr_audio_for_voiceprint.append(audio)
+            await self.decoder.decode(self.stream, [audio])
+
+        # 手动模式下空音频包表示结束；自动模式以VAD或模型端点检测为准
+        endpoint = self.recognizer.is_endpoint(self.stream) and bool(
+            self.recognizer.get_result(self.stream).strip()
+        )
+        if conn.client_voice_stop or endpoint or not audio:
+            await self._finish_utterance(conn)
+
+    async def _finish_utterance(self, conn):
+        """送入尾部静音并结束输入，解码剩余音频得到最终结果"""
+        await self.decoder.decode(self.stream, [], self.tail_padding)
+        self.text = self.recognizer.get_result(self.stream).strip()
+        self.stream = None
+        logger.bind(tag=TAG).info(f"识别到文本: {self.text}")
+
+        audio_data = conn.asr_audio_for_voiceprint
+        conn.asr_audio_for_voiceprint = []
+        conn.asr_audio = []
+        conn.reset_vad_states()
+        if self.text:
+            start_turn_trace(conn)
+            await self.handle_voice_stop(conn, audio_data)
+
+    async def speech_to_text(
+        self, opus_data: List[bytes], session_id: str, audio_format="opus"
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """识别结果已在接收音频时得到，这里直接返回"""
+        result = self.text
+        self.text = ""
+        return result, None
@@ -0,0 +1,41 @@
+import json
+import asyncio
+from ..base import IntentProviderBase
+from typing import List, Dict
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+class IntentProvider(IntentProviderBase):
+    """离线模拟意图识别，用于压测和回归测试"""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.delay_ms = float(config.get("delay_ms", 100))
+        # 关键词触发的意图，格式: [{keyword, name, arguments}]，都不匹配时继续聊天
+        self.intents = config.get("intents") or []
+
+    def replyResult(self, text: str, original_text: str):
+        # 不再请求大模型润色，直接播报工具返回的结果
+        return None
+
+    async def detect_intent(self, conn, dialogue_history: List[Dict], text: str) -> str:
+        """
+        按配置的延迟返回意图识别结果
+        Args:
+            dialogue_history: 对话历史记录列表
+            text: 本次对话记录
+        Returns:
+            命中关键词时返回对应的函数调用，否则返回继续聊天
+        """
+        await asyncio.sleep(self.delay_ms / 1000)
+        for intent in self.intents:
+            keyword = intent.get("keyword")
+            if keyword and keyword in text:
+                function_call = {"name": intent["name"]}
+                if intent.get("arguments"):
+                    function_call["arguments"] = intent["arguments"]
+                return json.dumps({"function_call": function_call}, ensure_ascii=False)
+        return '{"function_call": {"name": "continue_chat"}}'
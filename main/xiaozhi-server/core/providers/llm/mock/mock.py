@@ -0,0 +1,110 @@
+"""
+离线模拟LLM，用于压测和回归测试
+
+不访问任何网络服务，按配置的首token延迟和输出速率流式返回预设回复：
+- 回复按用户最后一句话的哈希从 replies 中选取，同样的输入总是得到同样的输出
+- 用户的话包含 tool_calls 中配置的关键词时，以 OpenAI 流式格式返回工具调用，
+  工具执行结果返回后再输出预设回复，用于测试 function_call 链路
+"""
+
+import json
+import time
+import zlib
+from types import SimpleNamespace
+from config.logger import setup_logging
+from core.providers.llm.base import LLMProviderBase
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_REPLIES = [
+    "好的，我明白了。今天天气晴朗，气温二十五度左右，很适合出门散步。",
+    "这是一个很好的问题。简单来说，答案取决于具体情况，我们可以一步一步来分析。",
+    "没问题！我来帮你想想办法，先从最简单的开始吧。",
+]
+
+
+class LLMProvider(LLMProviderBase):
+    def __init__(self, config):
+        self.model_name = config.get("model_name", "mock")
+        replies = config.get("replies") or DEFAULT_REPLIES
+        if isinstance(replies, str):
+            replies = [replies]
+        self.replies = [str(r) for r in replies]
+        self.first_token_ms = float(config.get("first_token_ms", 300))
+        self.tokens_per_second = float(config.get("tokens_per_second", 30))
+        self.chars_per_token = max(1, int(config.get("chars_per_token", 2)))
+        # 关键词触发的工具调用，格式: [{keyword, name, arguments}]
+        self.tool_calls = config.get("tool_calls") or []
+        self.tool_reply = config.get("tool_reply", "")
+
+    @staticmethod
+    def _last_message(dialogue):
+        for message in reversed(dialogue):
+            if message.get("role") in ("user", "tool"):
+                return message
+        return {}
+
+    def _pick_reply(self, text: str) -> str:
+        return self.replies[zlib.crc32(text.encode("utf-8")) % len(self.replies)]
+
+    def _match_tool_call(self, text: str):
+        for tool in self.tool_calls:
+            keyword = tool.get("keyword")
+            if keyword and keyword in text:
+                return tool
+        return None
+
+    def _stream(self, text: str):
+        """按首token延迟和输出速率切分文本"""
+        time.sleep(self.first_token_ms / 1000)
+        interval = 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0
+        for i in range(0, len(text), self.chars_per_token):
+            if i > 0 and interval:
+                time.sleep(interval)
+            yield text[i : i + self.chars_per_token]
+
+    def response(self, session_id, dialogue, **kwargs):
+        last = self._last_message(dialogue)
+        yield from self._stream(self._pick_reply(str(last.get("content") or "")))
+
+    def response_with_functions(self, session_id, dialogue, functions=None):
+        last = self._last_message(dialogue)
+        text = str(last.get("content") or "")
+        tool = None
+        if last.get("role") == "user" and functions:
+            tool = self._match_tool_call(text)
+            available = {f.get("function", {}).get("name") for f in functions}
+            if tool is not None and tool.get("name") not in available:
+                logger.bind(tag=TAG).warning(f"模拟工具调用未注册: {tool.get('name')}")
+                tool = None
+
+        if tool is None:
+            reply = self.tool_reply if last.get("role") == "tool" and self.tool_reply else None
+            for token in self._stream(reply or self._pick_reply(text)):
+                yield token, None
+            return
+
+        # 与 OpenAI 流式返回一致：首个分片携带id和函数名，参数分多个分片返回
+        arguments = tool.get("arguments") or {}
+        if not isinstance(arguments, str):
+            arguments = json.dumps(arguments, ensure_ascii=False)
+        call_id = f"call_{zlib.crc32(text.encode('utf-8')):08x}"
+        chunks = [
+            SimpleNamespace(
+                id=call_id,
+                function=SimpleNamespace(name=tool["name"], arguments=""),
+            )
+        ]
+        for i in range(0, len(arguments), self.chars_per_token * 4):
+            chunks.append(
+                SimpleNamespace(
+                    id=None,
+                    function=SimpleNamespace(
+                        name=None, arguments=arguments[i : i + self.chars_per_token * 4]
+                    ),
+                )
+            )
+        time.sleep(self.first_token_ms / 1000)
+        for chunk in chunks:
+            yield None, [chunk]
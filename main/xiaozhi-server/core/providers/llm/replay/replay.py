@@ -0,0 +1,49 @@
+"""
+回放LLM：按录制时每个分片的时间点返回录制的流式结果（含工具调用），配合 performance_tester_replay.py 使用
+"""
+
+import time
+from types import SimpleNamespace
+from config.logger import setup_logging
+from core.providers.llm.base import LLMProviderBase
+from core.utils.session_replay import get_replay_store
+
+TAG = __name__
+logger = setup_logging()
+
+
+class LLMProvider(LLMProviderBase):
+    def __init__(self, config):
+        self.model_name = config.get("model_name", "replay")
+
+    def _replay(self, session_id):
+        session = get_replay_store().get(session_id)
+        event = session.next_llm() if session is not None else None
+        if event is None:
+            logger.bind(tag=TAG).warning(f"录制中没有更多大模型结果: {session_id}")
+            return
+        start = time.monotonic()
+        for offset_ms, content, tool_calls in event.get("chunks", []):
+            delay = start + offset_ms / 1000 - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            yield content, tool_calls
+
+    def response(self, session_id, dialogue, **kwargs):
+        for content, _ in self._replay(session_id):
+            if content:
+                yield content
+
+    def response_with_functions(self, session_id, dialogue, functions=None):
+        for content, tool_calls in self._replay(session_id):
+            if tool_calls:
+                tool_calls = [
+                    SimpleNamespace(
+                        id=call.get("id"),
+                        function=SimpleNamespace(
+                            name=call.get("name"), arguments=call.get("arguments")
+                        ),
+                    )
+                    for call in tool_calls
+                ]
+            yield content, tool_calls
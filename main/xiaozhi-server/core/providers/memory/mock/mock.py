@@ -0,0 +1,25 @@
+"""
+离线模拟记忆，用于压测和回归测试，按配置的延迟返回固定的记忆内容
+"""
+
+import asyncio
+from ..base import MemoryProviderBase, logger
+
+TAG = __name__
+
+
+class MemoryProvider(MemoryProviderBase):
+    def __init__(self, config, summary_memory=None):
+        super().__init__(config)
+        self.memory = config.get("memory", "")
+        self.query_delay_ms = float(config.get("query_delay_ms", 50))
+        self.save_delay_ms = float(config.get("save_delay_ms", 100))
+
+    async def save_memory(self, msgs):
+        await asyncio.sleep(self.save_delay_ms / 1000)
+        logger.bind(tag=TAG).debug(f"模拟保存记忆，消息数: {len(msgs)}")
+        return None
+
+    async def query_memory(self, query: str) -> str:
+        await asyncio.sleep(self.query_delay_ms / 1000)
+        return self.memory
@@ -14,6 +14,7 @@ from datetime import datetime
 from urllib import parse
 from core.providers.tts.base import TTSProviderBase
 from core.providers.tts.dto.dto import SentenceType, ContentType, InterfaceType
+from core.utils.turn_trace import TraceStage, mark_turn
 from core.utils.tts import MarkdownCleaner
 from core.utils import opus_encoder_utils, textUtils
 from config.logger import setup_logging
@@ -478,6 +479,7 @@ class TTSProvider(TTSProviderBase):
                     elif isinstance(msg, (bytes, bytearray)):
                         logger.bind(tag=TAG).debug(f"推送数据到队列里面～～")
                         opus_datas = self.opus_encoder.encode_pcm_to_opus(msg, False)
+                        mark_turn(self.conn, TraceStage.TTS_FIRST_SEGMENT)
                         logger.bind(tag=TAG).debug(
                             f"推送数据到队列里面帧数～～{len(opus_datas)}"
                         )
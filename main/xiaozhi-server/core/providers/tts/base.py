@@ -1,9 +1,11 @@
 import os
 import re
+import time
 import queue
 import uuid
 import asyncio
 import threading
+from contextlib import contextmanager
 from core.utils import p3
 from datetime import datetime
 from core.utils import textUtils
@@ -14,6 +16,11 @@ from core.utils.tts import MarkdownCleaner
 from core.utils.output_counter import add_device_output
 from core.handle.reportHandle import enqueue_tts_report
 from core.handle.sendAudioHandle import sendAudioMessage
+from core.utils.async_queue import LoopQueue
+from core.utils.executor import TrackedThreadPoolExecutor
+from core.utils.metrics import observe_provider_call
+from core.utils.session_recorder import record_tts
+from core.utils.turn_trace import TraceStage, mark_turn
 from core.providers.tts.dto.dto import (
     TTSMessageDTO,
     SentenceType,
@@ -26,6 +33,28 @@ import traceback
 TAG = __name__
 logger = setup_logging()
 
+# 进程级共享的语音合成线程池，所有连接共用，限制同时进行的合成数量
+_synthesis_executor = None
+_synthesis_executor_lock = threading.Lock()
+
+
+def get_synthesis_executor(max_workers=32):
+    """获取进程级共享的语音合成线程池（首次调用时创建）"""
+    global _synthesis_executor
+    if _synthesis_executor is None:
+        with _synthesis_executor_lock:
+            if _synthesis_executor is None:
+                _synthesis_executor = TrackedThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix="tts-synthesis"
+                )
+    return _synthesis_executor
+
+
+def get_synthesis_stats():
+    """语音合成线程池的执行中和排队任务数，线程池尚未创建时返回 None"""
+    executor = _synthesis_executor
+    return executor.get_stats() if executor is not None else None
+
 
 class TTSProviderBase(ABC):
     def __init__(self, config, delete_audio_file):
@@ -39,6 +68,8 @@ class TTSProviderBase(ABC):
         self.tts_audio_queue = queue.Queue()
         self.tts_audio_first_sentence = True
         self.before_stop_play_files = []
+        # 已切分出来、尚未合成完成的句子数，供准入控制统计合成积压
+        self.pending_segments = 0
 
         self.tts_text_buff = []
         self.punctuations = (
@@ -71,12 +102,34 @@ class TTSProviderBase(ABC):
         self.processed_chars = 0
         self.is_first_sentence = True
 
+        # async管道模式下的协程任务
+        self.tts_text_task = None
+        self.audio_play_task = None
+
     def generate_filename(self, extension=".wav"):
         return os.path.join(
             self.output_file,
             f"tts-{datetime.now().date()}@{uuid.uuid4().hex}{extension}",
         )
 
+    def _timed_text_to_speak(self, text, output_file):
+        """调用一次语音合成接口，并记录耗时和失败次数"""
+        start_time = time.monotonic()
+        try:
+            result = asyncio.run(self.text_to_speak(text, output_file))
+        except Exception:
+            observe_provider_call("tts", self, time.monotonic() - start_time, error=True)
+            raise
+        observe_provider_call("tts", self, time.monotonic() - start_time)
+        record_tts(
+            self.conn,
+            text,
+            time.monotonic() - start_time,
+            result if output_file is None else output_file,
+            self.audio_file_type,
+        )
+        return result
+
     def to_tts(self, text):
         text = MarkdownCleaner.clean_markdown(text)
         max_repeat_time = 5
@@ -84,11 +137,13 @@ class TTSProviderBase(ABC):
             # 需要删除文件的直接转为音频数据
             while max_repeat_time > 0:
                 try:
-                    audio_bytes = asyncio.run(self.text_to_speak(text, None))
+                    audio_bytes = self._timed_text_to_speak(text, None)
                     if audio_bytes:
                         audio_datas, _ = audio_bytes_to_data(
                             audio_bytes, file_type=self.audio_file_type, is_opus=True
                         )
+                        # 本轮第一段合成成功的时间点，只记录第一次
+                        mark_turn(self.conn, TraceStage.TTS_FIRST_SEGMENT)
                         return audio_datas
                     else:
                         max_repeat_time -= 1
@@ -111,7 +166,7 @@ class TTSProviderBase(ABC):
             try:
                 while not os.path.exists(tmp_file) and max_repeat_time > 0:
                     try:
-                        asyncio.run(self.text_to_speak(text, tmp_file))
+                        self._timed_text_to_speak(text, tmp_file)
                     except Exception as e:
                         logger.bind(tag=TAG).warning(
                             f"语音生成失败{5 - max_repeat_time + 1}次: {text}，错误: {e}"
@@ -122,6 +177,7 @@ class TTSProviderBase(ABC):
                         max_repeat_time -= 1
 
                 if max_repeat_time > 0:
+                    mark_turn(self.conn, TraceStage.TTS_FIRST_SEGMENT)
                     logger.bind(tag=TAG).info(
                         f"语音生成成功: {text}:{tmp_file}，重试{5 - max_repeat_time}次"
                     )
@@ -178,6 +234,10 @@ class TTSProviderBase(ABC):
     async def open_audio_channels(self, conn):
         self.conn = conn
         self.tts_timeout = conn.config.get("tts_timeout", 10)
+        pipeline_config = conn.config.get("tts_pipeline", {}) or {}
+        if pipeline_config.get("mode", "async") == "async":
+            self._open_async_channels(conn, pipeline_config)
+            return
         # tts 消化线程
         self.tts_priority_thread = threading.Thread(
             target=self.tts_text_priority_thread, daemon=True
@@ -190,6 +250,45 @@ class TTSProviderBase(ABC):
         )
         self.audio_play_priority_thread.start()
 
+    def _open_async_channels(self, conn, pipeline_config):
+        """async管道：文本处理和音频播放都作为连接事件循环上的协程运行
+
+        重写了 tts_text_priority_thread 的流式TTS仍使用自己的文本线程，
+        但音频播放统一改为协程
+        """
+        self.synthesis_executor = get_synthesis_executor(
+            int(pipeline_config.get("max_workers", 32))
+        )
+        self.tts_audio_queue = self._to_loop_queue(self.tts_audio_queue, conn.loop)
+        if self._uses_default_text_pipeline():
+            self.tts_text_queue = self._to_loop_queue(self.tts_text_queue, conn.loop)
+            self.tts_text_task = asyncio.create_task(self.tts_text_priority_task())
+        else:
+            self.tts_priority_thread = threading.Thread(
+                target=self.tts_text_priority_thread, daemon=True
+            )
+            self.tts_priority_thread.start()
+        self.audio_play_task = asyncio.create_task(self.audio_play_priority_task())
+
+    def _uses_default_text_pipeline(self):
+        return (
+            type(self).tts_text_priority_thread
+            is TTSProviderBase.tts_text_priority_thread
+        )
+
+    @staticmethod
+    def _to_loop_queue(old_queue, loop):
+        """替换为LoopQueue，并迁移打开通道前已经放入的数据"""
+        if isinstance(old_queue, LoopQueue):
+            return old_queue
+        new_queue = LoopQueue(loop)
+        while True:
+            try:
+                new_queue.put(old_queue.get_nowait())
+            except queue.Empty:
+                break
+        return new_queue
+
     # 这里默认是非流式的处理方式
     # 流式处理方式请在子类中重写
     def tts_text_priority_thread(self):
@@ -212,19 +311,20 @@ class TTSProviderBase(ABC):
                     self.tts_text_buff.append(message.content_detail)
                     segment_text = self._get_segment_text()
                     if segment_text:
-                        if self.delete_audio_file:
-                            audio_datas = self.to_tts(segment_text)
-                            if audio_datas:
-                                self.tts_audio_queue.put(
-                                    (message.sentence_type, audio_datas, segment_text)
-                                )
-                        else:
-                            tts_file = self.to_tts(segment_text)
-                            if tts_file:
-                                audio_datas = self._process_audio_file(tts_file)
-                                self.tts_audio_queue.put(
-                                    (message.sentence_type, audio_datas, segment_text)
-                                )
+                        with self._pending_segment():
+                            if self.delete_audio_file:
+                                audio_datas = self.to_tts(segment_text)
+                                if audio_datas:
+                                    self.tts_audio_queue.put(
+                                        (message.sentence_type, audio_datas, segment_text)
+                                    )
+                            else:
+                                tts_file = self.to_tts(segment_text)
+                                if tts_file:
+                                    audio_datas = self._process_audio_file(tts_file)
+                                    self.tts_audio_queue.put(
+                                        (message.sentence_type, audio_datas, segment_text)
+                                    )
                 elif ContentType.FILE == message.content_type:
                     self._process_remaining_text()
                     tts_file = message.content_file
@@ -273,6 +373,117 @@ class TTSProviderBase(ABC):
                     f"audio_play_priority priority_thread: {text} {e}"
                 )
 
+    async def tts_text_priority_task(self):
+        """默认非流式TTS的文本处理协程，与 tts_text_priority_thread 逻辑一致"""
+        while not self.conn.stop_event.is_set():
+            try:
+                message = await self.tts_text_queue.get()
+                if message.sentence_type == SentenceType.FIRST:
+                    self.conn.client_abort = False
+                if self.conn.client_abort:
+                    logger.bind(tag=TAG).info("收到打断信息，终止TTS文本处理协程")
+                    continue
+                if message.sentence_type == SentenceType.FIRST:
+                    # 初始化参数
+                    self.tts_stop_request = False
+                    self.processed_chars = 0
+                    self.tts_text_buff = []
+                    self.is_first_sentence = True
+                    self.tts_audio_first_sentence = True
+                elif ContentType.TEXT == message.content_type:
+                    self.tts_text_buff.append(message.content_detail)
+                    segment_text = self._get_segment_text()
+                    if segment_text:
+                        with self._pending_segment():
+                            audio_datas = await self._synthesize_async(segment_text)
+                        if audio_datas:
+                            self.tts_audio_queue.put(
+                                (message.sentence_type, audio_datas, segment_text)
+                            )
+                elif ContentType.FILE == message.content_type:
+                    await self._process_remaining_text_async()
+                    tts_file = message.content_file
+                    if tts_file and os.path.exists(tts_file):
+                        audio_datas = await self._run_in_synthesis_executor(
+                            self._process_audio_file, tts_file
+                        )
+                        self.tts_audio_queue.put(
+                            (message.sentence_type, audio_datas, message.content_detail)
+                        )
+
+                if message.sentence_type == SentenceType.LAST:
+                    await self._process_remaining_text_async()
+                    self.tts_audio_queue.put(
+                        (message.sentence_type, [], message.content_detail)
+                    )
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.bind(tag=TAG).error(
+                    f"处理TTS文本失败: {str(e)}, 类型: {type(e).__name__}, 堆栈: {traceback.format_exc()}"
+                )
+                continue
+
+    async def audio_play_priority_task(self):
+        """音频播放协程，直接在连接的事件循环中按顺序发送音频"""
+        while not self.conn.stop_event.is_set():
+            text = None
+            try:
+                sentence_type, audio_datas, text = await self.tts_audio_queue.get()
+                await sendAudioMessage(self.conn, sentence_type, audio_datas, text)
+                if self.conn.max_output_size > 0 and text:
+                    add_device_output(self.conn.headers.get("device-id"), len(text))
+                enqueue_tts_report(self.conn, text, audio_datas)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.bind(tag=TAG).error(
+                    f"audio_play_priority task: {text} {e}"
+                )
+
+    @contextmanager
+    def _pending_segment(self):
+        """统计已切分、尚未合成完成的句子：切分出句子后进入，合成结束（含失败）后退出"""
+        self.pending_segments += 1
+        try:
+            yield
+        finally:
+            self.pending_segments -= 1
+
+    async def _run_in_synthesis_executor(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.synthesis_executor, func, *args
+        )
+
+    def _synthesize(self, segment_text):
+        """同步合成一段文本并转换为音频帧，在共享线程池中执行"""
+        if self.delete_audio_file:
+            return self.to_tts(segment_text)
+        tts_file = self.to_tts(segment_text)
+        if tts_file:
+            return self._process_audio_file(tts_file)
+        return None
+
+    async def _synthesize_async(self, segment_text):
+        return await self._run_in_synthesis_executor(self._synthesize, segment_text)
+
+    async def _process_remaining_text_async(self):
+        """_process_remaining_text 的协程版本，合成放到共享线程池执行"""
+        full_text = "".join(self.tts_text_buff)
+        remaining_text = full_text[self.processed_chars :]
+        if remaining_text:
+            segment_text = textUtils.get_string_no_punctuation_or_emoji(remaining_text)
+            if segment_text:
+                with self._pending_segment():
+                    audio_datas = await self._synthesize_async(segment_text)
+                if audio_datas:
+                    self.tts_audio_queue.put(
+                        (SentenceType.MIDDLE, audio_datas, segment_text)
+                    )
+                self.processed_chars += len(full_text)
+                return True
+        return False
+
     async def start_session(self, session_id):
         pass
 
@@ -284,6 +495,15 @@ class TTSProviderBase(ABC):
         if hasattr(self, "ws") and self.ws:
             await self.ws.close()
 
+    def close_audio_channels(self):
+        """取消async管道的协程（若由协程自身触发关闭，则等待其检查停止事件后自行退出）"""
+        current_task = asyncio.current_task()
+        for task in (self.tts_text_task, self.audio_play_task):
+            if task and not task.done() and task is not current_task:
+                task.cancel()
+        self.tts_text_task = None
+        self.audio_play_task = None
+
     def _get_segment_text(self):
         # 合并当前全部文本并处理未分割部分
         full_text = "".join(self.tts_text_buff)
@@ -366,18 +586,19 @@ class TTSProviderBase(ABC):
         if remaining_text:
             segment_text = textUtils.get_string_no_punctuation_or_emoji(remaining_text)
             if segment_text:
-                if self.delete_audio_file:
-                    audio_datas = self.to_tts(segment_text)
-                    if audio_datas:
+                with self._pending_segment():
+                    if self.delete_audio_file:
+                        audio_datas = self.to_tts(segment_text)
+                        if audio_datas:
+                            self.tts_audio_queue.put(
+                                (SentenceType.MIDDLE, audio_datas, segment_text)
+                            )
+                    else:
+                        tts_file = self.to_tts(segment_text)
+                        audio_datas = self._process_audio_file(tts_file)
                         self.tts_audio_queue.put(
                             (SentenceType.MIDDLE, audio_datas, segment_text)
                         )
-                else:
-                    tts_file = self.to_tts(segment_text)
-                    audio_datas = self._process_audio_file(tts_file)
-                    self.tts_audio_queue.put(
-                        (SentenceType.MIDDLE, audio_datas, segment_text)
-                    )
                 self.processed_chars += len(full_text)
                 return True
         return False
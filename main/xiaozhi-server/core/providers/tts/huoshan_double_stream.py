@@ -11,6 +11,7 @@ from core.utils import opus_encoder_utils
 from core.utils.util import check_model_key
 from core.providers.tts.base import TTSProviderBase
 from core.providers.tts.dto.dto import SentenceType, ContentType, InterfaceType
+from core.utils.turn_trace import TraceStage, mark_turn
 from asyncio import Task
 
 
@@ -453,6 +454,7 @@ class TTSProvider(TTSProviderBase):
                     ):
                         logger.bind(tag=TAG).debug(f"推送数据到队列里面～～")
                         opus_datas = self.wav_to_opus_data_audio_raw(res.payload)
+                        mark_turn(self.conn, TraceStage.TTS_FIRST_SEGMENT)
                         logger.bind(tag=TAG).debug(
                             f"推送数据到队列里面帧数～～{len(opus_datas)}"
                         )
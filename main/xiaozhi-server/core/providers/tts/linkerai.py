@@ -10,6 +10,7 @@ from core.utils.tts import MarkdownCleaner
 from core.providers.tts.base import TTSProviderBase
 from core.utils import opus_encoder_utils, textUtils
 from core.providers.tts.dto.dto import SentenceType, ContentType, InterfaceType
+from core.utils.turn_trace import TraceStage, mark_turn
 
 TAG = __name__
 logger = setup_logging()
@@ -188,6 +189,7 @@ class TTSProvider(TTSProviderBase):
 
                         # 拼到 buffer
                         self.pcm_buffer.extend(data)
+                        mark_turn(self.conn, TraceStage.TTS_FIRST_SEGMENT)
 
                         # 够一帧就编码
                         while len(self.pcm_buffer) >= frame_bytes:
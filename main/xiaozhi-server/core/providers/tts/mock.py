@@ -0,0 +1,54 @@
+"""
+离线模拟TTS，用于压测和回归测试
+
+不访问任何网络服务，按配置的延迟生成正弦波音频：
+- 音频时长与文本长度成正比（ms_per_char），使下发的音频帧数与真实合成接近
+- 延迟 = delay_ms + 音频时长 × rtf（实时率）
+"""
+
+import io
+import wave
+import asyncio
+import numpy as np
+from config.logger import setup_logging
+from core.providers.tts.base import TTSProviderBase
+
+TAG = __name__
+logger = setup_logging()
+
+SAMPLE_RATE = 16000
+
+
+class TTSProvider(TTSProviderBase):
+    def __init__(self, config, delete_audio_file):
+        super().__init__(config, delete_audio_file)
+        self.audio_file_type = "wav"
+        self.ms_per_char = float(config.get("ms_per_char", 200))
+        self.min_duration_ms = float(config.get("min_duration_ms", 300))
+        self.delay_ms = float(config.get("delay_ms", 150))
+        self.rtf = float(config.get("rtf", 0))
+        self.frequency = float(config.get("frequency", 440))
+        self.volume = float(config.get("volume", 0.3))
+
+    def _generate_wav(self, duration_ms: float) -> bytes:
+        samples = int(SAMPLE_RATE * duration_ms / 1000)
+        t = np.arange(samples, dtype=np.float32) / SAMPLE_RATE
+        tone = np.sin(2 * np.pi * self.frequency * t) * (self.volume * 32767)
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(SAMPLE_RATE)
+            wf.writeframes(tone.astype(np.int16).tobytes())
+        return buffer.getvalue()
+
+    async def text_to_speak(self, text, output_file):
+        duration_ms = max(self.min_duration_ms, len(text.strip()) * self.ms_per_char)
+        await asyncio.sleep((self.delay_ms + duration_ms * self.rtf) / 1000)
+        audio = self._generate_wav(duration_ms)
+        logger.bind(tag=TAG).debug(f"模拟合成完成，音频时长: {duration_ms:.0f}ms，文本: {text}")
+        if output_file:
+            with open(output_file, "wb") as f:
+                f.write(audio)
+        else:
+            return audio
@@ -0,0 +1,49 @@
+"""
+回放TTS：按录制时的耗时返回录制的合成音频，配合 performance_tester_replay.py 使用
+"""
+
+import io
+import wave
+import base64
+import asyncio
+from config.logger import setup_logging
+from core.providers.tts.base import TTSProviderBase
+from core.utils.session_replay import get_replay_store
+
+TAG = __name__
+logger = setup_logging()
+
+
+def _silence_wav(duration_ms=300) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\x00" * (16000 * 2 * duration_ms // 1000))
+    return buffer.getvalue()
+
+
+class TTSProvider(TTSProviderBase):
+    def __init__(self, config, delete_audio_file):
+        super().__init__(config, delete_audio_file)
+        self.audio_file_type = "wav"
+
+    async def text_to_speak(self, text, output_file):
+        session_id = self.conn.session_id if self.conn is not None else None
+        session = get_replay_store().get(session_id)
+        event = session.take_tts(text) if session is not None else None
+        if event is None or not event.get("audio"):
+            # 录制中没有对应音频（如未保存音频），用静音代替，保证流程继续
+            logger.bind(tag=TAG).warning(f"录制中没有对应的合成音频: {text}")
+            audio = _silence_wav()
+            self.audio_file_type = "wav"
+        else:
+            await asyncio.sleep(event.get("latency_ms", 0) / 1000)
+            audio = base64.b64decode(event["audio"])
+            self.audio_file_type = event.get("file_type") or "wav"
+        if output_file:
+            with open(output_file, "wb") as f:
+                f.write(audio)
+        else:
+            return audio
@@ -1,9 +1,190 @@
+import time
 from abc import ABC, abstractmethod
 from typing import Optional
 
+from config.logger import setup_logging
+from core.utils.vad_batcher import VADBatcher
+from core.utils.energy_gate import EnergyGate
+from core.utils.metrics import vad_gate_chunks
+
+TAG = __name__
+logger = setup_logging()
+
+# 模型每次推理的采样点数（16kHz下32ms）及上下文长度
+CHUNK_SAMPLES = 512
+CONTEXT_SAMPLES = 64
+
 
 class VADProviderBase(ABC):
     @abstractmethod
     def is_vad(self, conn, data) -> bool:
-        """检测音频数据中的语音活动"""
+        """检测音频数据（接收时已解码的16kHz单声道16位PCM）中的语音活动"""
         pass
+
+    async def is_vad_async(self, conn, data) -> bool:
+        """在事件循环中调用的检测入口，支持批量推理的提供者可重写为异步等待推理结果"""
+        return self.is_vad(conn, data)
+
+
+class ChunkedVADProviderBase(VADProviderBase):
+    """
+    按512采样点分块推理的VAD（Silero系列）公共逻辑：
+    PCM分块、双阈值与滑动窗口判断、静默时长判断，以及可选的跨连接批量推理。
+    子类实现 _forward_batch，每个连接的模型循环状态保存在 conn.vad_model_state 中。
+    """
+
+    def __init__(self, config, name):
+        # 处理空字符串的情况
+        threshold = config.get("threshold", "0.5")
+        threshold_low = config.get("threshold_low", "0.2")
+        min_silence_duration_ms = config.get("min_silence_duration_ms", "1000")
+
+        self.vad_threshold = float(threshold) if threshold else 0.5
+        self.vad_threshold_low = float(threshold_low) if threshold_low else 0.2
+
+        # 🔥 针对硬件设备优化：缩短静默阈值，提高响应速度
+        default_silence_ms = 600  # 从1000ms缩短到600ms，更快检测语音停止
+        self.silence_threshold_ms = (
+            int(min_silence_duration_ms) if min_silence_duration_ms else default_silence_ms
+        )
+
+        # 至少要多少帧才算有语音
+        self.frame_window_threshold = 3
+
+        # 推理前的能量/过零率门限，明显静音的音频包跳过推理
+        self.energy_gate_config = self._init_energy_gate(config)
+
+        # 跨连接批量推理：各连接的分块在攒批窗口内合并为一次前向推理，每个连接保存自己的循环状态
+        self.batcher: Optional[VADBatcher] = None
+        batch_enabled = config.get("batch_enabled", False)
+        if batch_enabled and str(batch_enabled).lower() not in ("false", "0"):
+            batch_window_ms = config.get("batch_window_ms", "5")
+            batch_max_size = config.get("batch_max_size", "64")
+            self.batcher = VADBatcher(
+                self._forward_batch,
+                max_batch=int(batch_max_size) if batch_max_size else 64,
+                window_ms=float(batch_window_ms) if batch_window_ms else 5,
+                name=name,
+            )
+
+    def _init_energy_gate(self, config):
+        """能量门限配置，未开启时为None"""
+        energy_gate = config.get("energy_gate", False)
+        if not energy_gate or str(energy_gate).lower() in ("false", "0"):
+            return None
+        margin_db = config.get("energy_gate_margin_db", "6")
+        silence_db = config.get("energy_gate_silence_db", "-60")
+        zcr_max = config.get("energy_gate_zcr_max", "0.25")
+        return {
+            "margin_db": float(margin_db) if margin_db else 6.0,
+            "silence_db": float(silence_db) if silence_db else -60.0,
+            "zcr_max": float(zcr_max) if zcr_max else 0.25,
+        }
+
+    @abstractmethod
+    def _forward_batch(self, chunks, states):
+        """批量推理：chunks 为各连接的 float32 分块，states 为对应连接的循环状态（首次为None），
+        返回 (各分块的语音概率, 各连接的新状态)"""
+        pass
+
+    def is_vad(self, conn, pcm_frame):
+        try:
+            chunks = self._read_chunks(conn, pcm_frame)
+            measures, skip = self._apply_energy_gate(conn, chunks)
+            if skip:
+                probs = [0.0] * len(chunks)
+            else:
+                probs = self._infer_chunks(conn, chunks)
+            return self._finish_chunks(conn, probs, measures, skip)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error processing audio packet: {e}")
+
+    async def is_vad_async(self, conn, pcm_frame):
+        if self.batcher is None:
+            return self.is_vad(conn, pcm_frame)
+        try:
+            chunks = self._read_chunks(conn, pcm_frame)
+            measures, skip = self._apply_energy_gate(conn, chunks)
+            if skip or not len(chunks):
+                probs = [0.0] * len(chunks)
+            else:
+                probs, conn.vad_model_state = await self.batcher.infer(
+                    chunks, conn.vad_model_state
+                )
+            return self._finish_chunks(conn, probs, measures, skip)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error processing audio packet: {e}")
+
+    def _infer_chunks(self, conn, chunks):
+        """逐块推理，使用并更新该连接自己的循环状态"""
+        probs = []
+        for chunk in chunks:
+            prob, state = self._forward_batch([chunk], [conn.vad_model_state])
+            conn.vad_model_state = state[0]
+            probs.append(prob[0])
+        return probs
+
+    def _apply_energy_gate(self, conn, chunks):
+        """能量门限：返回 (各分块的能量和过零率, 是否跳过推理)。
+        只有连接不在语音段中、且本音频包的所有分块都明显是静音时才跳过"""
+        if self.energy_gate_config is None or not len(chunks):
+            return None, False
+        gate = getattr(conn, "vad_energy_gate", None)
+        if gate is None:
+            gate = EnergyGate(**self.energy_gate_config)
+            conn.vad_energy_gate = gate
+        measures = [gate.measure(chunk) for chunk in chunks]
+        in_voice = (
+            conn.client_have_voice
+            or conn.last_is_voice
+            or True in conn.client_voice_window
+        )
+        skip = not in_voice and all(gate.is_silent(*m) for m in measures)
+        return measures, skip
+
+    def _finish_chunks(self, conn, probs, measures, skip):
+        """更新语音状态，并用本音频包更新噪声底估计"""
+        client_have_voice = self._update_voice_state(conn, probs)
+        if measures is not None:
+            gate = conn.vad_energy_gate
+            for (energy_db, zcr), prob in zip(measures, probs):
+                gate.update(energy_db, zcr, prob >= self.vad_threshold)
+            vad_gate_chunks.inc(len(probs), "skipped" if skip else "inferred")
+        return client_have_voice
+
+    def _read_chunks(self, conn, pcm_frame):
+        """写入音频包的PCM并取出缓冲区中所有完整的512采样点分块（float32），
+        返回的数组为缓冲区复用的内存，处理下一个音频包前有效"""
+        conn.client_audio_buffer.write(pcm_frame)  # 将新数据加入缓冲区
+        return conn.client_audio_buffer.read_chunks()
+
+    def _update_voice_state(self, conn, probs):
+        """按各分块的语音概率更新连接的语音状态"""
+        client_have_voice = False
+        for speech_prob in probs:
+            # 双阈值判断
+            if speech_prob >= self.vad_threshold:
+                is_voice = True
+            elif speech_prob <= self.vad_threshold_low:
+                is_voice = False
+            else:
+                is_voice = conn.last_is_voice
+
+            # 声音没低于最低值则延续前一个状态，判断为有声音
+            conn.last_is_voice = is_voice
+
+            # 更新滑动窗口
+            conn.client_voice_window.append(is_voice)
+            client_have_voice = (conn.client_voice_window.count(True) >= self.frame_window_threshold)
+
+            # 如果之前有声音，但本次没有声音，且与上次有声音的时间差已经超过了静默阈值，则认为已经说完一句话
+            if conn.client_have_voice and not client_have_voice:
+                stop_duration = time.time() * 1000 - conn.last_activity_time
+                if stop_duration >= self.silence_threshold_ms:
+                    conn.client_voice_stop = True
+                    logger.bind(tag=TAG).debug(f"检测到语音停止，静默时长: {stop_duration:.0f}ms")
+            if client_have_voice:
+                conn.client_have_voice = True
+                conn.last_activity_time = time.time() * 1000
+
+        return client_have_voice
@@ -1,15 +1,14 @@
-import time
-import numpy as np
+import threading
 import torch
-import opuslib_next
+import numpy as np
 from config.logger import setup_logging
-from core.providers.vad.base import VADProviderBase
+from core.providers.vad.base import ChunkedVADProviderBase, CONTEXT_SAMPLES
 
 TAG = __name__
 logger = setup_logging()
 
 
-class VADProvider(VADProviderBase):
+class VADProvider(ChunkedVADProviderBase):
     def __init__(self, config):
         logger.bind(tag=TAG).info("SileroVAD", config)
         self.model, _ = torch.hub.load(
@@ -18,74 +17,50 @@ class VADProvider(VADProviderBase):
             model="silero_vad",
             force_reload=False,
         )
-
-        self.decoder = opuslib_next.Decoder(16000, 1)
-
-        # 处理空字符串的情况
-        threshold = config.get("threshold", "0.5")
-        threshold_low = config.get("threshold_low", "0.2")
-        min_silence_duration_ms = config.get("min_silence_duration_ms", "1000")
-
-        self.vad_threshold = float(threshold) if threshold else 0.5
-        self.vad_threshold_low = float(threshold_low) if threshold_low else 0.2
-
-        # 🔥 针对硬件设备优化：缩短静默阈值，提高响应速度
-        default_silence_ms = 600  # 从1000ms缩短到600ms，更快检测语音停止
-        self.silence_threshold_ms = (
-            int(min_silence_duration_ms) if min_silence_duration_ms else default_silence_ms
+        self._model_lock = threading.Lock()
+        super().__init__(config, "silero")
+
+    def _infer_chunks(self, conn, chunks):
+        # 非批量模式下所有连接共用模型内部的循环状态
+        probs = []
+        for chunk in chunks:
+            audio_tensor = torch.from_numpy(chunk)
+            # 检测语音活动
+            with self._model_lock, torch.no_grad():
+                probs.append(self.model(audio_tensor, 16000).item())
+        return probs
+
+    def _forward_batch(self, chunks, states):
+        """批量推理：按连接拼接循环状态，推理后再按连接拆分"""
+        batch_size = len(chunks)
+        audio_tensor = torch.from_numpy(np.stack(chunks))
+        rnn_state = torch.cat(
+            [
+                torch.as_tensor(s[0]) if s is not None else torch.zeros(2, 1, 128)
+                for s in states
+            ],
+            dim=1,
         )
-
-        # 至少要多少帧才算有语音
-        self.frame_window_threshold = 3
-
-    def is_vad(self, conn, opus_packet):
-        try:
-            pcm_frame = self.decoder.decode(opus_packet, 960)
-            conn.client_audio_buffer.extend(pcm_frame)  # 将新数据加入缓冲区
-
-            # 处理缓冲区中的完整帧（每次处理512采样点）
-            client_have_voice = False
-            while len(conn.client_audio_buffer) >= 512 * 2:
-                # 提取前512个采样点（1024字节）
-                chunk = conn.client_audio_buffer[: 512 * 2]
-                conn.client_audio_buffer = conn.client_audio_buffer[512 * 2 :]
-
-                # 转换为模型需要的张量格式
-                audio_int16 = np.frombuffer(chunk, dtype=np.int16)
-                audio_float32 = audio_int16.astype(np.float32) / 32768.0
-                audio_tensor = torch.from_numpy(audio_float32)
-
-                # 检测语音活动
-                with torch.no_grad():
-                    speech_prob = self.model(audio_tensor, 16000).item()
-
-                # 双阈值判断
-                if speech_prob >= self.vad_threshold:
-                    is_voice = True
-                elif speech_prob <= self.vad_threshold_low:
-                    is_voice = False
-                else:
-                    is_voice = conn.last_is_voice
-
-                # 声音没低于最低值则延续前一个状态，判断为有声音
-                conn.last_is_voice = is_voice
-
-                # 更新滑动窗口
-                conn.client_voice_window.append(is_voice)
-                client_have_voice = (conn.client_voice_window.count(True) >= self.frame_window_threshold)
-
-                # 如果之前有声音，但本次没有声音，且与上次有声音的时间差已经超过了静默阈值，则认为已经说完一句话
-                if conn.client_have_voice and not client_have_voice:
-                    stop_duration = time.time() * 1000 - conn.last_activity_time
-                    if stop_duration >= self.silence_threshold_ms:
-                        conn.client_voice_stop = True
-                        logger.bind(tag=TAG).debug(f"检测到语音停止，静默时长: {stop_duration:.0f}ms")
-                if client_have_voice:
-                    conn.client_have_voice = True
-                    conn.last_activity_time = time.time() * 1000
-
-            return client_have_voice
-        except opuslib_next.OpusError as e:
-            logger.bind(tag=TAG).info(f"解码错误: {e}")
-        except Exception as e:
-            logger.bind(tag=TAG).error(f"Error processing audio packet: {e}")
+        context = torch.cat(
+            [
+                torch.as_tensor(s[1]) if s is not None else torch.zeros(1, CONTEXT_SAMPLES)
+                for s in states
+            ],
+            dim=0,
+        )
+        with self._model_lock, torch.no_grad():
+            # silero-vad v5 的 JIT 模型把循环状态保存在模型属性中，推理前换成本批次各连接的状态
+            self.model._state = rnn_state
+            self.model._context = context
+            self.model._last_sr = 16000
+            self.model._last_batch_size = batch_size
+            probs = self.model(audio_tensor, 16000).view(-1).tolist()
+            rnn_state = self.model._state
+            context = self.model._context
+            # 恢复为初始状态，避免影响非批量模式的调用
+            self.model.reset_states()
+        new_states = [
+            (rnn_state[:, i : i + 1].clone(), context[i : i + 1].clone())
+            for i in range(batch_size)
+        ]
+        return probs, new_states
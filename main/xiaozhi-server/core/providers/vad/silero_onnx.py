@@ -0,0 +1,60 @@
+import os
+import numpy as np
+import onnxruntime
+from config.logger import setup_logging
+from core.providers.vad.base import ChunkedVADProviderBase, CONTEXT_SAMPLES
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_MODEL_FILE = "src/silero_vad/data/silero_vad.onnx"
+
+
+class VADProvider(ChunkedVADProviderBase):
+    """
+    ONNX Runtime 版 Silero VAD，不依赖 torch。
+    所有连接共用一个推理会话，每个连接的循环状态和上下文保存在 conn.vad_model_state 中，
+    推理时作为输入传入，连接之间互不影响；InferenceSession.run 线程安全且推理期间释放GIL。
+    """
+
+    def __init__(self, config):
+        logger.bind(tag=TAG).info("SileroVAD(ONNX)", config)
+        model_path = config.get("model_path") or os.path.join(
+            config.get("model_dir", "models/snakers4_silero-vad"), DEFAULT_MODEL_FILE
+        )
+        intra_op_threads = config.get("intra_op_threads", "1")
+
+        options = onnxruntime.SessionOptions()
+        options.inter_op_num_threads = 1
+        options.intra_op_num_threads = int(intra_op_threads) if intra_op_threads else 1
+        self.session = onnxruntime.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._sample_rate = np.array(16000, dtype=np.int64)
+        super().__init__(config, "silero_onnx")
+
+    def _forward_batch(self, chunks, states):
+        batch_size = len(chunks)
+        context = np.concatenate(
+            [
+                s[1] if s is not None else np.zeros((1, CONTEXT_SAMPLES), dtype=np.float32)
+                for s in states
+            ],
+            axis=0,
+        )
+        rnn_state = np.concatenate(
+            [
+                s[0] if s is not None else np.zeros((2, 1, 128), dtype=np.float32)
+                for s in states
+            ],
+            axis=1,
+        )
+        audio = np.concatenate([context, np.stack(chunks)], axis=1)
+        probs, rnn_state = self.session.run(
+            None, {"input": audio, "state": rnn_state, "sr": self._sample_rate}
+        )
+        new_states = [
+            (rnn_state[:, i : i + 1].copy(), audio[i : i + 1, -CONTEXT_SAMPLES:].copy())
+            for i in range(batch_size)
+        ]
+        return probs.reshape(-1).tolist(), new_states
@@ -0,0 +1,172 @@
+"""
+连接准入控制与过载保护
+
+负载突增时，与其让所有会话一起变慢，不如快速拒绝超出容量的部分：
+- 会话数：超过每个进程的最大会话数时，新设备的握手直接返回 HTTP 503
+- 对话轮次：同时进行（含排队）的大模型对话轮次超过上限时，拒绝新的轮次
+- 语音合成积压：所有连接排队待合成的句子总数超过上限时，拒绝新的轮次
+被拒绝的设备会收到 type 为 server 的 busy 消息。上限配置为 0 表示不限制。
+"""
+
+import json
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from core.utils.executor import WorkloadClass
+
+TAG = __name__
+
+
+class RejectReason:
+    """拒绝原因"""
+
+    SESSIONS = "max_sessions"
+    LLM_TURNS = "max_llm_turns"
+    TTS_SEGMENTS = "max_tts_segments"
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_sessions=0,
+        max_llm_turns=0,
+        max_tts_segments=0,
+        retry_after=5,
+    ):
+        self.max_sessions = int(max_sessions or 0)
+        self.max_llm_turns = int(max_llm_turns or 0)
+        self.max_tts_segments = int(max_tts_segments or 0)
+        self.retry_after = int(retry_after or 0)
+        self._sessions = 0
+        self._llm_turns = 0
+        self._rejected = {
+            RejectReason.SESSIONS: 0,
+            RejectReason.LLM_TURNS: 0,
+            RejectReason.TTS_SEGMENTS: 0,
+        }
+        # 对话轮次在线程池中结束，计数需要加锁
+        self._lock = threading.Lock()
+        self._tts_backlog_provider: Optional[Callable[[], int]] = None
+
+    def set_tts_backlog_provider(self, provider: Callable[[], int]):
+        """设置获取当前排队待合成句子总数的方法，由 WebSocketServer 注册"""
+        self._tts_backlog_provider = provider
+
+    def tts_backlog(self) -> int:
+        if self._tts_backlog_provider is None:
+            return 0
+        try:
+            return self._tts_backlog_provider()
+        except Exception:
+            return 0
+
+    def session_available(self) -> bool:
+        """握手阶段的快速检查，不占用名额；超出上限时记一次拒绝"""
+        with self._lock:
+            if self.max_sessions > 0 and self._sessions >= self.max_sessions:
+                self._rejected[RejectReason.SESSIONS] += 1
+                return False
+            return True
+
+    def try_acquire_session(self) -> bool:
+        with self._lock:
+            if self.max_sessions > 0 and self._sessions >= self.max_sessions:
+                self._rejected[RejectReason.SESSIONS] += 1
+                return False
+            self._sessions += 1
+            return True
+
+    def release_session(self):
+        with self._lock:
+            self._sessions = max(0, self._sessions - 1)
+
+    def try_acquire_llm_turn(self) -> Optional[str]:
+        """尝试开始一个对话轮次，成功返回None，失败返回拒绝原因"""
+        # 积压统计需要遍历所有连接，放在锁外计算
+        backlog = self.tts_backlog() if self.max_tts_segments > 0 else 0
+        with self._lock:
+            if self.max_tts_segments > 0 and backlog >= self.max_tts_segments:
+                self._rejected[RejectReason.TTS_SEGMENTS] += 1
+                return RejectReason.TTS_SEGMENTS
+            if self.max_llm_turns > 0 and self._llm_turns >= self.max_llm_turns:
+                self._rejected[RejectReason.LLM_TURNS] += 1
+                return RejectReason.LLM_TURNS
+            self._llm_turns += 1
+            return None
+
+    def release_llm_turn(self):
+        with self._lock:
+            self._llm_turns = max(0, self._llm_turns - 1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取各项上限和当前占用"""
+        backlog = self.tts_backlog()
+        with self._lock:
+            return {
+                "sessions": {"limit": self.max_sessions, "current": self._sessions},
+                "llm_turns": {"limit": self.max_llm_turns, "current": self._llm_turns},
+                "tts_segments": {"limit": self.max_tts_segments, "current": backlog},
+                "rejected": dict(self._rejected),
+                "retry_after": self.retry_after,
+            }
+
+
+def build_busy_message(reason: str, retry_after: int = 0) -> str:
+    """构造发给设备的服务繁忙消息"""
+    return json.dumps(
+        {
+            "type": "server",
+            "status": "error",
+            "message": "服务器繁忙，请稍后再试",
+            "content": {
+                "action": "busy",
+                "reason": reason,
+                "retry_after": retry_after,
+            },
+        }
+    )
+
+
+async def submit_chat_turn(conn, fn, *args) -> bool:
+    """经过准入检查后把对话轮次提交到共享线程池，被拒绝时通知设备并返回False"""
+    admission = get_admission_controller()
+    reason = admission.try_acquire_llm_turn()
+    if reason is not None:
+        conn.logger.bind(tag=TAG).warning(f"服务繁忙，拒绝本轮对话: {reason}")
+        try:
+            await conn.websocket.send(
+                build_busy_message(reason, admission.retry_after)
+            )
+        except Exception as e:
+            conn.logger.bind(tag=TAG).debug(f"发送繁忙消息失败: {e}")
+        return False
+
+    try:
+        future = conn.executor.submit_as(WorkloadClass.CHAT, fn, *args)
+    except Exception:
+        admission.release_llm_turn()
+        raise
+    # 任务完成、失败或在排队时被取消都会触发回调，保证名额一定被释放
+    future.add_done_callback(lambda _: admission.release_llm_turn())
+    return True
+
+
+# 全局准入控制实例
+_admission_controller = None
+_admission_controller_lock = threading.Lock()
+
+
+def get_admission_controller(config: Dict[str, Any] = None) -> AdmissionController:
+    """获取全局准入控制实例（首次调用时按配置创建）"""
+    global _admission_controller
+    if _admission_controller is None:
+        with _admission_controller_lock:
+            if _admission_controller is None:
+                admission_config = (config or {}).get("admission", {}) or {}
+                _admission_controller = AdmissionController(
+                    max_sessions=admission_config.get("max_sessions", 0),
+                    max_llm_turns=admission_config.get("max_llm_turns", 0),
+                    max_tts_segments=admission_config.get("max_tts_segments", 0),
+                    retry_after=admission_config.get("retry_after", 5),
+                )
+    return _admission_controller
@@ -6,19 +6,32 @@ import time
 import wave
 import uuid
 from abc import ABC, abstractmethod
+from collections.abc import Mapping
 from typing import Optional, Tuple, List
-from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.base import ASRProviderBase, LocalASRProviderBase
 from config.logger import setup_logging
 
 TAG = __name__
 logger = setup_logging()
 
+def _process_workers(args, kwargs) -> int:
+    config = args[0] if args else kwargs.get("config", {})
+    workers = config.get("process_workers", 0) if isinstance(config, Mapping) else 0
+    return int(workers) if workers else 0
+
+
 def create_instance(class_name: str, *args, **kwargs) -> ASRProviderBase:
     """工厂方法创建ASR实例"""
     if os.path.exists(os.path.join('core', 'providers', 'asr', f'{class_name}.py')):
         lib_name = f'core.providers.asr.{class_name}'
         if lib_name not in sys.modules:
             sys.modules[lib_name] = importlib.import_module(f'{lib_name}')
-        return sys.modules[lib_name].ASRProvider(*args, **kwargs)
+        provider_class = sys.modules[lib_name].ASRProvider
+        # 本地模型配置了 process_workers 时在独立进程池中识别，服务进程不加载模型
+        if issubclass(provider_class, LocalASRProviderBase) and _process_workers(args, kwargs) > 0:
+            from core.utils.asr_process_pool import ProcessPoolASRProvider
+
+            return ProcessPoolASRProvider(class_name, *args, **kwargs)
+        return provider_class(*args, **kwargs)
 
     raise ValueError(f"不支持的ASR类型: {class_name}，请检查该配置的type是否设置正确")
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""
+本地 ASR 跨连接批量识别
+
+本地模型（FunASR）所有连接共用一个实例，各连接说完的整句音频依次调用 generate，高峰时在模型前排队。
+批量识别时整句音频先进入一个短的攒批窗口（默认 20ms），由后台线程合并成一次批量 generate，
+再把各句的识别结果分发回对应连接等待的 future。
+"""
+
+import time
+from typing import Any, Callable, List
+
+from config.logger import setup_logging
+from core.utils.metrics import get_metrics_registry
+from core.utils.micro_batcher import BatchRequest, MicroBatcher
+
+TAG = __name__
+logger = setup_logging()
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# forward(整句音频列表) -> 识别文本列表，顺序与输入一致
+BatchForward = Callable[[List[Any]], List[str]]
+
+
+class ASRBatcher:
+    def __init__(self, forward: BatchForward, max_batch=8, window_ms=20, name="asr"):
+        self._forward = forward
+
+        registry = get_metrics_registry()
+        self._batch_size = registry.histogram(
+            "xiaozhi_asr_batch_size",
+            "本地 ASR 每次批量识别合并的语句数",
+            ("asr",),
+            BATCH_SIZE_BUCKETS,
+        )
+        self._wait = registry.histogram(
+            "xiaozhi_asr_batch_wait_seconds",
+            "本地 ASR 语句从提交到开始识别的等待时间",
+            ("asr",),
+            WAIT_BUCKETS,
+        )
+        self._name = name
+        self._batcher = MicroBatcher(self._process, max_batch, window_ms, name)
+
+    async def infer(self, samples) -> str:
+        """识别一句整句音频，返回识别文本"""
+        return await self._batcher.submit(samples)
+
+    def _process(self, batch: List[BatchRequest]):
+        start = time.monotonic()
+        for request in batch:
+            self._wait.observe(start - request.enqueue_time, self._name)
+        self._batch_size.observe(len(batch), self._name)
+        texts = self._forward([request.payload for request in batch])
+        if len(texts) != len(batch):
+            logger.bind(tag=TAG).error(
+                f"ASR批量识别返回 {len(texts)} 条结果，与输入的 {len(batch)} 句不一致"
+            )
+        for request, text in zip(batch, texts):
+            request.set_result(text)
+        # 没有对应结果的语句由 MicroBatcher 以异常结束
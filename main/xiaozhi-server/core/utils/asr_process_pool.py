@@ -0,0 +1,335 @@
+"""
+本地 ASR 独立进程池
+
+本地模型（FunASR、SherpaASR）默认在 WebSocket 服务进程内识别，长句的前后处理会长时间占用 GIL，
+拖慢其他设备的音频发送节奏。开启后识别放到若干独立的 worker 进程中：
+- 每个 worker 进程启动时加载一次模型，之后循环处理识别请求
+- 整句音频通过共享内存传递（只传共享内存名和采样点数），不经过队列序列化
+- 服务进程中由一个线程收集识别结果并完成对应的 future，调用方可以直接 await
+- 进程池在首次识别时启动；多进程 worker 模式下每个服务 worker 各自启动自己的进程池
+- 结果线程每秒检查一次各 worker 和请求期限，与是否有结果返回无关：
+  - worker 进程异常退出后自动重启；模型加载失败的 worker 按指数退避重启，连续失败超过上限后不再重启
+  - 超时未返回的请求以 TimeoutError 结束，处理该请求的 worker 被结束并替换，避免卡住的进程一直占着
+"""
+
+import os
+import time
+import queue
+import asyncio
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import Dict
+
+import numpy as np
+
+from config.logger import setup_logging
+from core.providers.asr.base import LocalASRProviderBase
+
+TAG = __name__
+logger = setup_logging()
+
+_READY = "__ready__"
+_STARTED = "__started__"
+
+# 检查 worker 和请求期限的间隔（秒）
+_CHECK_INTERVAL = 1.0
+# 模型加载失败的 worker 重启等待时间（秒），连续失败时按2倍递增
+_RESTART_BACKOFF = 1.0
+_MAX_RESTART_BACKOFF = 60.0
+
+
+def _worker_main(class_name, config, delete_audio_file, tasks, results):
+    """worker 进程入口：加载一次模型，循环处理识别请求"""
+    from core.utils.asr import create_instance
+
+    config = dict(config)
+    config["process_workers"] = 0
+    config["batch_enabled"] = False
+    try:
+        asr = create_instance(class_name, config, delete_audio_file)
+    except Exception as e:
+        results.put((_READY, os.getpid(), f"模型加载失败: {e}"))
+        return
+    results.put((_READY, os.getpid(), None))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        request_id, shm_name, num_samples = task
+        # 告知服务进程由哪个 worker 处理，超时后只结束这个 worker
+        results.put((_STARTED, request_id, os.getpid()))
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                samples = np.ndarray((num_samples,), dtype=np.int16, buffer=shm.buf)
+                text = asr.transcribe(samples)
+                del samples
+            finally:
+                shm.close()
+            results.put((request_id, text, None))
+        except Exception as e:
+            results.put((request_id, None, f"{type(e).__name__}: {e}"))
+
+
+class _WorkerSlot:
+    """单个 worker 的进程和重启状态"""
+
+    def __init__(self):
+        self.process = None
+        self.ready = False
+        self.load_failures = 0
+        self.restart_at = None
+        self.given_up = False
+
+
+class _PendingRequest:
+    __slots__ = ("future", "shm", "submit_time", "pid")
+
+    def __init__(self, future, shm):
+        self.future = future
+        self.shm = shm
+        self.submit_time = time.monotonic()
+        self.pid = None
+
+
+class ASRProcessPool:
+    def __init__(
+        self,
+        class_name,
+        config,
+        delete_audio_file,
+        workers=2,
+        timeout=30,
+        max_load_retries=5,
+    ):
+        self.class_name = class_name
+        # 配置需要传给 spawn 出的进程，转换为普通字典
+        self.config = dict(config)
+        self.delete_audio_file = delete_audio_file
+        self.workers = max(1, int(workers))
+        self.timeout = float(timeout)
+        self.max_load_retries = int(max_load_retries)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._pid = None
+        self._ids = itertools.count()
+        self._pending: Dict[int, _PendingRequest] = {}
+        self._slots = []
+        self._tasks = None
+        self._results = None
+
+    def submit(self, samples: np.ndarray) -> Future:
+        """提交一句整句音频（int16 或 -1~1 的 float32），返回结果为识别文本的 Future"""
+        self._ensure_started()
+        future = Future()
+        if all(slot.given_up for slot in self._slots):
+            future.set_exception(RuntimeError("ASR进程池没有可用的进程"))
+            return future
+        if samples.dtype != np.int16:
+            samples = (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+        samples = np.ascontiguousarray(samples)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, samples.nbytes))
+        np.ndarray(samples.shape, dtype=np.int16, buffer=shm.buf)[:] = samples
+        request_id = next(self._ids)
+        with self._lock:
+            self._pending[request_id] = _PendingRequest(future, shm)
+        self._tasks.put((request_id, shm.name, len(samples)))
+        return future
+
+    def _ensure_started(self):
+        # fork 出的子进程不能沿用父进程的进程池和结果线程，按 pid 判断是否需要重新启动
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._tasks = self._ctx.Queue()
+            self._results = self._ctx.Queue()
+            self._pending = {}
+            self._slots = [_WorkerSlot() for _ in range(self.workers)]
+            for slot in self._slots:
+                self._start_worker(slot)
+            self._pid = os.getpid()
+            threading.Thread(
+                target=self._collect, name="asr-process-pool", daemon=True
+            ).start()
+        logger.bind(tag=TAG).info(
+            f"ASR进程池已启动: {self.class_name}，进程数 {self.workers}"
+        )
+
+    def _start_worker(self, slot: _WorkerSlot):
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                self.class_name,
+                self.config,
+                self.delete_audio_file,
+                self._tasks,
+                self._results,
+            ),
+            name=f"asr-worker-{self.class_name}",
+            daemon=True,
+        )
+        process.start()
+        slot.process = process
+        slot.ready = False
+        slot.restart_at = None
+
+    def _slot_of(self, pid):
+        for slot in self._slots:
+            if slot.process is not None and slot.process.pid == pid:
+                return slot
+        return None
+
+    def _collect(self):
+        results = self._results
+        next_check = time.monotonic() + _CHECK_INTERVAL
+        while True:
+            # 按固定间隔检查，持续有结果返回时也不会跳过
+            now = time.monotonic()
+            if now >= next_check:
+                self._check_workers()
+                next_check = now + _CHECK_INTERVAL
+            try:
+                message = results.get(timeout=max(0.0, next_check - now))
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            self._handle_message(message)
+
+    def _handle_message(self, message):
+        kind = message[0]
+        if kind == _READY:
+            _, pid, error = message
+            if error:
+                logger.bind(tag=TAG).error(f"ASR进程启动失败: {error}")
+                return
+            logger.bind(tag=TAG).info(f"ASR进程已就绪: pid={pid}")
+            slot = self._slot_of(pid)
+            if slot is not None:
+                slot.ready = True
+                slot.load_failures = 0
+            return
+        if kind == _STARTED:
+            _, request_id, pid = message
+            with self._lock:
+                request = self._pending.get(request_id)
+                if request is not None:
+                    request.pid = pid
+            return
+        request_id, text, error = message
+        with self._lock:
+            request = self._pending.pop(request_id, None)
+        if request is None:
+            return
+        self._release(request.shm)
+        if error:
+            request.future.set_exception(RuntimeError(error))
+        else:
+            request.future.set_result(text)
+
+    def _check_workers(self):
+        """重启退出的 worker 进程，结束超时的请求并替换处理它的 worker"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                request_id
+                for request_id, request in self._pending.items()
+                if now - request.submit_time > self.timeout
+            ]
+            requests = [self._pending.pop(request_id) for request_id in expired]
+        for request in requests:
+            slot = self._slot_of(request.pid) if request.pid else None
+            if slot is not None and slot.process.is_alive():
+                logger.bind(tag=TAG).warning(
+                    f"ASR进程识别超时，结束并替换该进程: pid={request.pid}"
+                )
+                slot.process.kill()
+                slot.process.join(1)
+            self._release(request.shm)
+            request.future.set_exception(TimeoutError("ASR进程识别超时"))
+
+        for slot in self._slots:
+            if slot.given_up or slot.process.is_alive():
+                continue
+            if slot.restart_at is None:
+                self._schedule_restart(slot, now)
+            elif now >= slot.restart_at:
+                self._start_worker(slot)
+
+        if all(slot.given_up for slot in self._slots):
+            with self._lock:
+                requests = list(self._pending.values())
+                self._pending.clear()
+            for request in requests:
+                self._release(request.shm)
+                request.future.set_exception(RuntimeError("ASR进程池没有可用的进程"))
+
+    def _schedule_restart(self, slot: _WorkerSlot, now: float):
+        process = slot.process
+        if slot.ready:
+            # 运行中退出（崩溃或超时被结束）立即重启
+            logger.bind(tag=TAG).warning(
+                f"ASR进程退出: pid={process.pid}，退出码 {process.exitcode}，正在重启"
+            )
+            slot.restart_at = now
+            return
+        # 未就绪就退出，多半是模型加载失败，按指数退避重启，超过上限后不再重启
+        slot.load_failures += 1
+        if slot.load_failures > self.max_load_retries:
+            slot.given_up = True
+            logger.bind(tag=TAG).error(
+                f"ASR进程连续 {slot.load_failures} 次启动失败，不再重启: {self.class_name}"
+            )
+            return
+        backoff = min(
+            _RESTART_BACKOFF * 2 ** (slot.load_failures - 1), _MAX_RESTART_BACKOFF
+        )
+        slot.restart_at = now + backoff
+        logger.bind(tag=TAG).warning(
+            f"ASR进程未就绪即退出: pid={process.pid}，退出码 {process.exitcode}，"
+            f"{backoff:.1f}秒后重启"
+        )
+
+    @staticmethod
+    def _release(shm: shared_memory.SharedMemory):
+        try:
+            shm.close()
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        if self._pid != os.getpid():
+            return
+        for _ in self._slots:
+            self._tasks.put(None)
+        for slot in self._slots:
+            slot.process.join(timeout=5)
+        self._pid = None
+
+
+class ProcessPoolASRProvider(LocalASRProviderBase):
+    """在独立进程池中识别的本地 ASR，由工厂方法在配置了 process_workers 时创建，服务进程中不加载模型"""
+
+    def __init__(self, class_name: str, config: dict, delete_audio_file: bool):
+        super().__init__(config, delete_audio_file)
+        self.pool = ASRProcessPool(
+            class_name,
+            config,
+            delete_audio_file,
+            workers=int(config.get("process_workers", 2)),
+            timeout=float(config.get("process_timeout_s", 30)),
+            max_load_retries=int(config.get("process_max_load_retries", 5)),
+        )
+
+    def transcribe(self, samples: np.ndarray) -> str:
+        return self.pool.submit(samples).result()
+
+    async def transcribe_async(self, samples: np.ndarray, session_id: str = "") -> str:
+        return await asyncio.wrap_future(self.pool.submit(samples))
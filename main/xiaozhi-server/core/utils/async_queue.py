@@ -0,0 +1,93 @@
+"""
+绑定到事件循环的有界队列
+
+消费者在事件循环中 await get()，生产者可以在事件循环内，也可以在任意线程中调用 put()。
+接口与 queue.Queue 的常用方法保持一致（put / get_nowait / qsize / empty），
+这样原有的清空队列等逻辑无需区分队列类型。
+"""
+
+import queue
+import asyncio
+from collections import deque
+
+
+class DropPolicy:
+    """队列满时的丢弃策略"""
+
+    DROP_OLDEST = "drop_oldest"  # 丢弃队首最旧的数据，保证实时性
+    DROP_NEWEST = "drop_newest"  # 丢弃新到达的数据，保证连续性
+
+
+class LoopQueue:
+    def __init__(self, loop, maxsize=0, drop_policy=DropPolicy.DROP_OLDEST):
+        self.loop = loop
+        self.maxsize = int(maxsize or 0)
+        self.drop_policy = drop_policy
+        # 内部队列不设上限，容量由 _put 自行控制，避免 put_nowait 抛出 QueueFull
+        self._queue = asyncio.Queue()
+        # 尚未转入队列的数据，deque 的 append/popleft 可在不同线程中安全调用
+        self._incoming = deque()
+        self.dropped = 0
+
+    def put(self, item, block=True, timeout=None):
+        """放入数据，可在任意线程调用；block/timeout 仅为兼容 queue.Queue 签名
+
+        所有线程放入的数据先按调用顺序进入 _incoming，再由事件循环统一转入队列，
+        事件循环内和其他线程交替放入的数据（如 FIRST/MIDDLE/LAST）不会乱序。
+        """
+        self._incoming.append(item)
+        if self._on_loop():
+            self._drain()
+            return True
+        try:
+            self.loop.call_soon_threadsafe(self._drain)
+        except RuntimeError:
+            # 事件循环已关闭，连接正在销毁，直接丢弃
+            return False
+        return True
+
+    def put_nowait(self, item):
+        return self.put(item)
+
+    def _on_loop(self):
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def _drain(self):
+        """在事件循环中按放入顺序把 _incoming 中的数据转入队列"""
+        while self._incoming:
+            self._put(self._incoming.popleft())
+
+    def _put(self, item):
+        if self.maxsize > 0 and self._queue.qsize() >= self.maxsize:
+            self.dropped += 1
+            if self.drop_policy == DropPolicy.DROP_NEWEST:
+                return False
+            try:
+                self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        self._queue.put_nowait(item)
+        return True
+
+    async def get(self):
+        return await self._queue.get()
+
+    def get_nowait(self):
+        if self._on_loop():
+            self._drain()
+        try:
+            return self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            raise queue.Empty
+
+    def task_done(self):
+        self._queue.task_done()
+
+    def qsize(self):
+        return self._queue.qsize() + len(self._incoming)
+
+    def empty(self):
+        return self.qsize() == 0
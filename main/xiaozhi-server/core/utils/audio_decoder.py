@@ -0,0 +1,37 @@
+"""
+接收音频时的一次性解码
+
+设备上传的每个音频包在接收入口（handleAudioMessage）用该连接自己的 opus 解码器解码一次，
+得到的 16kHz 单声道 16 位 PCM 同时交给 VAD、ASR 音频缓冲、声纹识别和聊天记录上报使用，不再各自重复解码。
+- opus 解码器带有帧间状态，每个连接一个，并且按音频包到达的顺序解码
+- 设备在 hello 中声明 pcm 格式时直接透传
+"""
+
+from typing import Optional
+
+import opuslib_next
+
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 960  # 每个音频包60ms
+
+
+class AudioDecoder:
+    def __init__(self):
+        self._decoder = None
+
+    def decode(self, audio: bytes, audio_format: str = "opus") -> Optional[bytes]:
+        """返回音频包的PCM数据，解码失败时返回None；空音频包（结束标记）原样返回"""
+        if not audio or audio_format == "pcm":
+            return audio
+        if self._decoder is None:
+            self._decoder = opuslib_next.Decoder(SAMPLE_RATE, 1)
+        try:
+            return self._decoder.decode(audio, FRAME_SAMPLES)
+        except opuslib_next.OpusError as e:
+            logger.bind(tag=TAG).info(f"解码错误: {e}")
+            return None
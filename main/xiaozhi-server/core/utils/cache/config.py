@@ -18,6 +18,7 @@ class CacheType(Enum):
     IP_INFO = "ip_info"
     CONFIG = "config"
     DEVICE_PROMPT = "device_prompt"
+    AGENT_CONFIG = "agent_config"
 
 
 @dataclass
@@ -54,5 +55,8 @@ class CacheConfig:
             CacheType.DEVICE_PROMPT: cls(
                 strategy=CacheStrategy.TTL, ttl=None, max_size=1000  # 手动失效
             ),
+            CacheType.AGENT_CONFIG: cls(
+                strategy=CacheStrategy.LRU, ttl=None, max_size=10000  # 新鲜度由调用方判断
+            ),
         }
         return configs.get(cache_type, cls())
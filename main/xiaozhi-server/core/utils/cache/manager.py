@@ -21,6 +21,8 @@ class GlobalCacheManager:
         self._global_lock = threading.RLock()
         self._last_cleanup = time.time()
         self._stats = {"hits": 0, "misses": 0, "evictions": 0, "cleanups": 0}
+        # 按缓存类型统计的命中、未命中和淘汰次数
+        self._type_stats: Dict[str, Dict[str, int]] = {}
 
     @property
     def logger(self):
@@ -85,6 +87,7 @@ class GlobalCacheManager:
                     oldest_key = next(iter(cache))
                     del cache[oldest_key]
                     self._stats["evictions"] += 1
+                    self._count(cache_type, "evictions")
 
             else:
                 cache[key] = entry
@@ -95,6 +98,7 @@ class GlobalCacheManager:
                     victim_key = next(iter(cache))
                     del cache[victim_key]
                     self._stats["evictions"] += 1
+                    self._count(cache_type, "evictions")
 
         # 定期清理过期条目
         self._maybe_cleanup(cache_name)
@@ -107,6 +111,7 @@ class GlobalCacheManager:
 
         if cache_name not in self._caches:
             self._stats["misses"] += 1
+            self._count(cache_type, "misses")
             return None
 
         cache = self._caches[cache_name]
@@ -115,6 +120,7 @@ class GlobalCacheManager:
         with self._locks[cache_name]:
             if key not in cache:
                 self._stats["misses"] += 1
+                self._count(cache_type, "misses")
                 return None
 
             entry = cache[key]
@@ -123,6 +129,7 @@ class GlobalCacheManager:
             if entry.is_expired():
                 del cache[key]
                 self._stats["misses"] += 1
+                self._count(cache_type, "misses")
                 return None
 
             # 更新访问信息
@@ -134,8 +141,33 @@ class GlobalCacheManager:
                 cache[key] = entry
 
             self._stats["hits"] += 1
+            self._count(cache_type, "hits")
             return entry.value
 
+    def _count(self, cache_type: CacheType, name: str):
+        stats = self._type_stats.get(cache_type.value)
+        if stats is None:
+            stats = self._type_stats.setdefault(
+                cache_type.value, {"hits": 0, "misses": 0, "evictions": 0}
+            )
+        stats[name] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取全局及按缓存类型的统计"""
+        by_type = {}
+        for type_name, stats in list(self._type_stats.items()):
+            lookups = stats["hits"] + stats["misses"]
+            by_type[type_name] = {
+                **stats,
+                "hit_ratio": round(stats["hits"] / lookups, 4) if lookups else 0,
+                "size": sum(
+                    len(cache)
+                    for name, cache in list(self._caches.items())
+                    if name.split(":", 1)[0] == type_name
+                ),
+            }
+        return {**self._stats, "by_type": by_type}
+
     def delete(self, cache_type: CacheType, key: str, namespace: str = "") -> bool:
         """删除缓存条目"""
         cache_name = self._get_cache_name(cache_type, namespace)
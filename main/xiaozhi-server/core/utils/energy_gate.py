@@ -0,0 +1,73 @@
+"""
+VAD 前置能量 / 过零率门限
+
+空闲但处于拾音状态的设备上传的大多是静音或稳定的背景噪声，每个分块仍要做一次神经网络推理。
+门限在推理前用分块的能量和过零率做一次廉价判断，明显是静音的音频包跳过推理，按静音处理：
+- 每个连接单独估计背景噪声的能量底：低于当前估计时快速跟随，高于时缓慢上升，判定为语音的分块不参与估计
+- 能量低于绝对静音阈值，或低于噪声底 + margin 且过零率不高（避开清辅音这类低能量、高过零率的语音起点），判定为明显静音；
+  背景噪声本身过零率就高时（如白噪声），过零率上限随噪声的过零率估计上调
+- 刚开始的若干分块用于建立噪声底估计，不跳过
+是否处于语音段由调用方判断，语音段中从不跳过推理。
+"""
+
+import math
+
+import numpy as np
+
+# 噪声过零率估计的平滑系数
+_ZCR_SMOOTHING = 0.05
+
+
+class EnergyGate:
+    def __init__(
+        self,
+        margin_db=6.0,
+        silence_db=-60.0,
+        zcr_max=0.25,
+        warmup_chunks=10,
+        rise=0.01,
+        fall=0.2,
+        zcr_margin=0.1,
+    ):
+        self.margin_db = margin_db
+        self.silence_db = silence_db
+        self.zcr_max = zcr_max
+        self.warmup_chunks = warmup_chunks
+        self.rise = rise
+        self.fall = fall
+        self.zcr_margin = zcr_margin
+        self.floor_db = None
+        self.floor_zcr = 0.0
+        self.chunks_seen = 0
+
+    @staticmethod
+    def measure(chunk: np.ndarray):
+        """返回分块的能量（dBFS）和过零率，chunk 为 -1~1 的 float32"""
+        energy = float(np.dot(chunk, chunk)) / len(chunk)
+        energy_db = 10 * math.log10(energy + 1e-12)
+        signs = np.signbit(chunk)
+        zcr = np.count_nonzero(signs[1:] != signs[:-1]) / (len(chunk) - 1)
+        return energy_db, zcr
+
+    def is_silent(self, energy_db: float, zcr: float) -> bool:
+        if self.floor_db is None or self.chunks_seen < self.warmup_chunks:
+            return False
+        if energy_db < self.silence_db:
+            return True
+        zcr_max = max(self.zcr_max, self.floor_zcr + self.zcr_margin)
+        return energy_db < self.floor_db + self.margin_db and zcr < zcr_max
+
+    def update(self, energy_db: float, zcr: float, is_voice: bool):
+        """用本分块的能量和过零率更新噪声底估计"""
+        self.chunks_seen += 1
+        if is_voice:
+            return
+        if self.floor_db is None:
+            self.floor_db = energy_db
+            self.floor_zcr = zcr
+            return
+        self.floor_zcr += _ZCR_SMOOTHING * (zcr - self.floor_zcr)
+        if energy_db < self.floor_db:
+            self.floor_db += self.fall * (energy_db - self.floor_db)
+        else:
+            self.floor_db += self.rise * (energy_db - self.floor_db)
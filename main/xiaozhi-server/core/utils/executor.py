@@ -0,0 +1,314 @@
+"""
+进程级共享线程池
+
+所有连接共用一个线程池，按任务类型（对话、初始化、上报）做全局并发限制，
+并按连接做准入控制（每个连接同时进行的对话数），同类任务在各连接之间轮转调度，
+避免个别连接占满线程池。线程数只与正在进行的任务相关，与打开的连接数无关。
+"""
+
+import time
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict
+
+
+class WorkloadClass:
+    """任务类型"""
+
+    CHAT = "chat"  # 大模型对话轮次（含意图识别的函数调用）
+    INIT = "init"  # 连接组件初始化
+    REPORT = "report"  # 聊天记录上报
+    ASR = "asr"  # 语音识别中的同步调用（本地模型推理、同步HTTP接口）
+    DEFAULT = "default"  # 其他任务
+
+
+DEFAULT_CLASS_LIMITS = {
+    WorkloadClass.CHAT: 48,
+    WorkloadClass.INIT: 16,
+    WorkloadClass.REPORT: 8,
+    WorkloadClass.ASR: 16,
+    WorkloadClass.DEFAULT: 8,
+}
+
+
+class _WorkloadState:
+    """单个任务类型的调度状态和统计"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.running = 0
+        # owner -> deque[(future, fn, args, kwargs, enqueue_time)]，OrderedDict用于轮转
+        self.pending: "OrderedDict[str, deque]" = OrderedDict()
+        self.running_by_owner: Dict[str, int] = {}
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def queued(self):
+        return sum(len(q) for q in self.pending.values())
+
+
+class SharedExecutor:
+    def __init__(
+        self,
+        max_workers=64,
+        class_limits=None,
+        per_connection_limits=None,
+    ):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="shared-executor"
+        )
+        limits = dict(DEFAULT_CLASS_LIMITS)
+        limits.update(class_limits or {})
+        self._classes = {
+            name: _WorkloadState(int(limit)) for name, limit in limits.items()
+        }
+        # 每个连接在各类任务上的并发上限，未配置的类型不限制
+        self._per_connection_limits = {
+            name: int(limit) for name, limit in (per_connection_limits or {}).items()
+        }
+        self._lock = threading.Lock()
+
+    def submit(self, workload, owner, fn, *args, **kwargs) -> Future:
+        """提交任务，立即返回Future；超过并发上限时排队等待调度"""
+        future = Future()
+        with self._lock:
+            state = self._get_state(workload)
+            state.submitted += 1
+            state.pending.setdefault(owner, deque()).append(
+                (future, fn, args, kwargs, time.monotonic())
+            )
+            self._dispatch(workload, state)
+        return future
+
+    def cancel_owner(self, owner):
+        """取消某个连接所有尚未开始的任务，已开始的任务不受影响"""
+        with self._lock:
+            for state in self._classes.values():
+                tasks = state.pending.pop(owner, None)
+                if not tasks:
+                    continue
+                for future, *_ in tasks:
+                    future.cancel()
+                    state.cancelled += 1
+
+    def _get_state(self, workload):
+        state = self._classes.get(workload)
+        if state is None:
+            state = _WorkloadState(DEFAULT_CLASS_LIMITS[WorkloadClass.DEFAULT])
+            self._classes[workload] = state
+        return state
+
+    def _dispatch(self, workload, state):
+        """在持锁状态下调用：按连接轮转，尽可能多地启动排队的任务"""
+        owner_limit = self._per_connection_limits.get(workload, 0)
+        while state.running < state.limit and state.pending:
+            started = False
+            for owner in list(state.pending.keys()):
+                if state.running >= state.limit:
+                    break
+                if (
+                    owner_limit > 0
+                    and state.running_by_owner.get(owner, 0) >= owner_limit
+                ):
+                    continue
+                tasks = state.pending[owner]
+                future, fn, args, kwargs, enqueue_time = tasks.popleft()
+                if tasks:
+                    # 轮转：刚被调度的连接移到队尾
+                    state.pending.move_to_end(owner)
+                else:
+                    del state.pending[owner]
+                if not future.set_running_or_notify_cancel():
+                    state.cancelled += 1
+                    continue
+
+                wait = time.monotonic() - enqueue_time
+                state.total_wait += wait
+                state.max_wait = max(state.max_wait, wait)
+                state.running += 1
+                state.running_by_owner[owner] = state.running_by_owner.get(owner, 0) + 1
+                self._pool.submit(
+                    self._run, workload, owner, future, fn, args, kwargs
+                )
+                started = True
+            if not started:
+                break
+
+    def _run(self, workload, owner, future, fn, args, kwargs):
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            failed = True
+        else:
+            future.set_result(result)
+            failed = False
+        finally:
+            with self._lock:
+                state = self._classes[workload]
+                state.running -= 1
+                remaining = state.running_by_owner.get(owner, 1) - 1
+                if remaining > 0:
+                    state.running_by_owner[owner] = remaining
+                else:
+                    state.running_by_owner.pop(owner, None)
+                state.completed += 1
+                if failed:
+                    state.failed += 1
+                self._dispatch(workload, state)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取各类任务的运行和排队统计"""
+        with self._lock:
+            classes = {}
+            for name, state in self._classes.items():
+                started = state.completed + state.running
+                classes[name] = {
+                    "limit": state.limit,
+                    "per_connection_limit": self._per_connection_limits.get(name, 0),
+                    "running": state.running,
+                    "queued": state.queued(),
+                    "submitted": state.submitted,
+                    "completed": state.completed,
+                    "failed": state.failed,
+                    "cancelled": state.cancelled,
+                    "avg_wait_ms": (
+                        round(state.total_wait / started * 1000, 2) if started else 0
+                    ),
+                    "max_wait_ms": round(state.max_wait * 1000, 2),
+                }
+            return {
+                "max_workers": self.max_workers,
+                "running": sum(s.running for s in self._classes.values()),
+                "classes": classes,
+            }
+
+
+class TrackedThreadPoolExecutor(ThreadPoolExecutor):
+    """自行统计排队和执行中任务数的线程池，供指标采集使用，不依赖线程池的内部属性"""
+
+    def __init__(self, max_workers=None, thread_name_prefix=""):
+        super().__init__(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self.max_workers = max_workers
+        self._stats_lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        with self._stats_lock:
+            self._queued += 1
+            self._submitted += 1
+        try:
+            future = super().submit(self._run, fn, args, kwargs)
+        except BaseException:
+            with self._stats_lock:
+                self._queued -= 1
+                self._submitted -= 1
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _run(self, fn, args, kwargs):
+        with self._stats_lock:
+            self._queued -= 1
+            self._running += 1
+        failed = True
+        try:
+            result = fn(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            with self._stats_lock:
+                self._running -= 1
+                self._completed += 1
+                if failed:
+                    self._failed += 1
+
+    def _on_done(self, future):
+        # 只有尚未开始执行的任务能被取消，此时 _run 不会再执行
+        if future.cancelled():
+            with self._stats_lock:
+                self._queued -= 1
+                self._cancelled += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "max_workers": self.max_workers,
+                "running": self._running,
+                "queued": self._queued,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "cancelled": self._cancelled,
+            }
+
+
+class ConnectionExecutor:
+    """单个连接使用的执行器视图，所有任务都提交到共享线程池"""
+
+    def __init__(self, shared: SharedExecutor, owner: str):
+        self._shared = shared
+        self.owner = owner
+        self._closed = False
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        return self.submit_as(WorkloadClass.DEFAULT, fn, *args, **kwargs)
+
+    def submit_as(self, workload, fn, *args, **kwargs) -> Future:
+        if self._closed:
+            raise RuntimeError("cannot schedule new futures after shutdown")
+        return self._shared.submit(workload, self.owner, fn, *args, **kwargs)
+
+    def shutdown(self, wait=False):
+        """连接关闭时调用：取消该连接尚未开始的任务，共享线程池本身不关闭"""
+        self._closed = True
+        self._shared.cancel_owner(self.owner)
+
+
+_thread_local = threading.local()
+
+
+def run_coroutine_sync(coro_fn, *args, **kwargs):
+    """在共享线程池的线程中运行协程：每个线程复用自己的事件循环，不再每次新建和关闭"""
+    loop = getattr(_thread_local, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _thread_local.loop = loop
+    asyncio.set_event_loop(loop)
+    return loop.run_until_complete(coro_fn(*args, **kwargs))
+
+
+# 全局共享线程池实例
+_shared_executor = None
+_shared_executor_lock = threading.Lock()
+
+
+def get_shared_executor(config: Dict[str, Any] = None) -> SharedExecutor:
+    """获取全局共享线程池实例（首次调用时按配置创建）"""
+    global _shared_executor
+    if _shared_executor is None:
+        with _shared_executor_lock:
+            if _shared_executor is None:
+                executor_config = (config or {}).get("executor", {}) or {}
+                _shared_executor = SharedExecutor(
+                    max_workers=int(executor_config.get("max_workers", 64)),
+                    class_limits=executor_config.get("class_limits"),
+                    per_connection_limits={
+                        WorkloadClass.CHAT: executor_config.get(
+                            "per_connection_chat_limit", 1
+                        )
+                    },
+                )
+    return _shared_executor
@@ -0,0 +1,216 @@
+"""
+事件循环延迟与线程池饱和监控
+
+- 事件循环中的协程按固定间隔 sleep，实际唤醒时间与预期时间的差值即为调度延迟，
+  持续记录并发布百分位数，供 /metrics 采集
+- 独立的监控线程检查协程的心跳，超过阈值仍未唤醒说明事件循环正被同步代码阻塞，
+  此时通过 sys._current_frames 抓取事件循环线程的当前堆栈，连同所属连接的 session_id 一起记录日志
+- 监控线程同时检查共享线程池，某类任务持续占满并发上限且有排队时输出告警
+"""
+
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from collections import deque
+from typing import Any, Dict, Optional
+
+from config.logger import setup_logging
+from core.utils.metrics import MetricFamily, MetricType, get_metrics_registry
+
+TAG = __name__
+logger = setup_logging()
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+LAG_QUANTILES = (0.5, 0.9, 0.99)
+
+_registry = get_metrics_registry()
+loop_lag_seconds = _registry.histogram(
+    "xiaozhi_event_loop_lag_seconds", "事件循环调度延迟（秒）", buckets=LAG_BUCKETS
+)
+loop_blocked = _registry.counter(
+    "xiaozhi_event_loop_blocked_total", "事件循环被阻塞超过阈值的次数"
+)
+
+
+def _find_session(frame) -> Optional[str]:
+    """从阻塞位置向外查找所属连接，返回 session_id"""
+    while frame is not None:
+        f_locals = frame.f_locals
+        for name in ("conn", "self"):
+            candidate = f_locals.get(name)
+            session_id = getattr(candidate, "session_id", None)
+            if session_id and hasattr(candidate, "websocket"):
+                return session_id
+        frame = frame.f_back
+    return None
+
+
+class LoopWatchdog:
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        interval=0.1,
+        threshold=0.2,
+        min_log_interval=5.0,
+        window=600,
+        saturation_seconds=5.0,
+        stack_limit=30,
+    ):
+        self.loop = loop
+        self.interval = interval
+        self.threshold = threshold
+        self.min_log_interval = min_log_interval
+        self.saturation_seconds = saturation_seconds
+        self.stack_limit = stack_limit
+        self._lags = deque(maxlen=int(window))
+        self._beat = time.monotonic()
+        self._beat_seq = 0
+        self._loop_thread_id = None
+        self._last_log = 0.0
+        self._saturated_since: Dict[str, float] = {}
+        self._last_saturation_log: Dict[str, float] = {}
+        self._stop_event = threading.Event()
+        self._ticker_task = None
+        self.blocked_count = 0
+        self.max_lag = 0.0
+
+    def start(self):
+        """在事件循环线程中调用"""
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._ticker_task = self.loop.create_task(self._ticker())
+        threading.Thread(
+            target=self._monitor, name="loop-watchdog", daemon=True
+        ).start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._ticker_task:
+            self._ticker_task.cancel()
+
+    async def _ticker(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            loop_lag_seconds.observe(lag)
+            self._beat = now
+            self._beat_seq += 1
+
+    def _monitor(self):
+        reported_seq = -1
+        check_interval = max(0.01, self.threshold / 2)
+        while not self._stop_event.wait(check_interval):
+            try:
+                now = time.monotonic()
+                beat_seq = self._beat_seq
+                blocked_for = now - self._beat - self.interval
+                if blocked_for > self.threshold and beat_seq != reported_seq:
+                    # 同一次阻塞只记录一次
+                    reported_seq = beat_seq
+                    self.blocked_count += 1
+                    loop_blocked.inc()
+                    if now - self._last_log >= self.min_log_interval:
+                        self._last_log = now
+                        self._log_blocking_stack(blocked_for)
+                self._check_executor_saturation(now)
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"事件循环监控出错: {e}")
+
+    def _log_blocking_stack(self, blocked_for):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        session_id = _find_session(frame)
+        task = asyncio.current_task(self.loop)
+        stack = "".join(traceback.format_stack(frame, limit=self.stack_limit))
+        logger.bind(tag=TAG).warning(
+            f"事件循环已被阻塞 {blocked_for * 1000:.0f}ms，"
+            f"session_id={session_id}，task={task.get_name() if task else None}，"
+            f"阻塞位置:\n{stack}"
+        )
+
+    def _check_executor_saturation(self, now):
+        # 延迟导入，避免循环依赖
+        from core.utils import executor as executor_module
+
+        shared = executor_module._shared_executor
+        if shared is None:
+            return
+        for name, cls in shared.get_stats()["classes"].items():
+            if cls["running"] >= cls["limit"] and cls["queued"] > 0:
+                since = self._saturated_since.setdefault(name, now)
+                if (
+                    now - since >= self.saturation_seconds
+                    and now - self._last_saturation_log.get(name, 0) >= self.min_log_interval
+                ):
+                    self._last_saturation_log[name] = now
+                    logger.bind(tag=TAG).warning(
+                        f"共享线程池 {name} 类任务已持续 {now - since:.0f}s 占满并发上限"
+                        f"（运行 {cls['running']}/{cls['limit']}，排队 {cls['queued']}，"
+                        f"平均排队 {cls['avg_wait_ms']}ms）"
+                    )
+            else:
+                self._saturated_since.pop(name, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lags = sorted(self._lags)
+        stats = {
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "blocked_count": self.blocked_count,
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+        }
+        for q in LAG_QUANTILES:
+            value = lags[min(len(lags) - 1, int(len(lags) * q))] if lags else 0
+            stats[f"p{int(q * 100)}_ms"] = round(value * 1000, 2)
+        return stats
+
+    def collect_metrics(self):
+        lags = sorted(self._lags)
+        family = MetricFamily(
+            "xiaozhi_event_loop_lag_quantile_seconds",
+            MetricType.GAUGE,
+            "最近窗口内事件循环调度延迟的百分位数（秒）",
+        )
+        for q in LAG_QUANTILES:
+            value = lags[min(len(lags) - 1, int(len(lags) * q))] if lags else 0
+            family.add(round(value, 6), {"quantile": str(q)})
+        return [family]
+
+
+# 全局监控实例，每个进程只监控运行 WebSocketServer 的事件循环
+_loop_watchdog = None
+
+
+def start_loop_watchdog(config: Dict[str, Any]) -> Optional[LoopWatchdog]:
+    """在事件循环中启动监控（已启动或未开启时直接返回）"""
+    global _loop_watchdog
+    if _loop_watchdog is not None:
+        return _loop_watchdog
+    watchdog_config = config.get("loop_watchdog", {}) or {}
+    if not watchdog_config.get("enabled", True):
+        return None
+    _loop_watchdog = LoopWatchdog(
+        asyncio.get_running_loop(),
+        interval=float(watchdog_config.get("interval_ms", 100)) / 1000,
+        threshold=float(watchdog_config.get("threshold_ms", 200)) / 1000,
+        min_log_interval=float(watchdog_config.get("min_log_interval", 5)),
+        window=int(watchdog_config.get("window", 600)),
+        saturation_seconds=float(watchdog_config.get("saturation_seconds", 5)),
+    )
+    _loop_watchdog.start()
+    _registry.register_collector(_loop_watchdog.collect_metrics)
+    logger.bind(tag=TAG).info(
+        f"事件循环监控已启动，阻塞阈值 {_loop_watchdog.threshold * 1000:.0f}ms"
+    )
+    return _loop_watchdog
+
+
+def get_loop_watchdog() -> Optional[LoopWatchdog]:
+    return _loop_watchdog
@@ -0,0 +1,413 @@
+"""
+Prometheus 文本格式的运行指标
+
+- 计数器和直方图按线程分片：每个线程只写自己的分片，热路径上不加锁，采集时再汇总所有分片
+- 连接数、队列深度、线程池占用等瞬时值不在热路径上维护，而是在采集时由注册的采集函数计算
+- 多进程 worker 模式下，各 worker 随统计上报采集结果，由主进程加上 worker 标签后统一输出
+"""
+
+import time
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# 供应商调用耗时直方图的分桶上界（秒）
+PROVIDER_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 30)
+
+
+class MetricType:
+    COUNTER = "counter"
+    GAUGE = "gauge"
+    HISTOGRAM = "histogram"
+
+
+class MetricFamily:
+    """一个指标及其所有样本，samples 为 (样本名, 标签, 值) 列表"""
+
+    __slots__ = ("name", "type", "help", "samples")
+
+    def __init__(self, name, metric_type, help_text, samples=None):
+        self.name = name
+        self.type = metric_type
+        self.help = help_text
+        self.samples: List[Tuple[str, Dict[str, str], float]] = samples or []
+
+    def add(self, value, labels: Dict[str, str] = None, suffix: str = ""):
+        self.samples.append((self.name + suffix, labels or {}, value))
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "type": self.type,
+            "help": self.help,
+            "samples": [list(s) for s in self.samples],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MetricFamily":
+        return cls(
+            data["name"],
+            data["type"],
+            data["help"],
+            [(name, labels, value) for name, labels, value in data["samples"]],
+        )
+
+
+class _ShardedStore:
+    """按线程分片的存储，分片只由所属线程写入"""
+
+    def __init__(self, merge: Callable[[Any, Any], Any]):
+        self._merge = merge
+        self._local = threading.local()
+        # [(线程, 分片)]，线程退出后其分片合并到 _retired
+        self._shards: List[Tuple[threading.Thread, Dict]] = []
+        self._retired: Dict = {}
+        self._lock = threading.Lock()
+
+    def shard(self) -> Dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+            self._local.shard = shard
+        return shard
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            alive = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    for key, value in list(shard.items()):
+                        self._retired[key] = self._merge(self._retired.get(key), value)
+            self._shards = alive
+            merged = dict(self._retired)
+            shards = [shard for _, shard in alive]
+        for shard in shards:
+            # list(dict.items()) 在持有GIL时一次完成，不会因所属线程同时写入而报错
+            for key, value in list(shard.items()):
+                merged[key] = self._merge(merged.get(key), value)
+        return merged
+
+
+def _merge_number(a, b):
+    return b if a is None else a + b
+
+
+def _merge_histogram(a, b):
+    if a is None:
+        return list(b)
+    return [x + y for x, y in zip(a, b)]
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._store = _ShardedStore(_merge_number)
+
+    def inc(self, amount=1, *labelvalues):
+        shard = self._store.shard()
+        shard[labelvalues] = shard.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        return self._store.snapshot().get(labelvalues, 0)
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, MetricType.COUNTER, self.help)
+        values = self._store.snapshot()
+        if not values and not self.labelnames:
+            values = {(): 0}
+        for labelvalues, value in sorted(values.items()):
+            family.add(value, dict(zip(self.labelnames, labelvalues)))
+        return family
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames: Iterable[str] = (), buckets=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._store = _ShardedStore(_merge_histogram)
+
+    def observe(self, value, *labelvalues):
+        shard = self._store.shard()
+        # [各分桶计数..., +Inf计数, 总和]
+        data = shard.get(labelvalues)
+        if data is None:
+            data = [0] * (len(self.buckets) + 2)
+            shard[labelvalues] = data
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                data[i] += 1
+                break
+        else:
+            data[len(self.buckets)] += 1
+        data[-1] += value
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, MetricType.HISTOGRAM, self.help)
+        for labelvalues, data in sorted(self._store.snapshot().items()):
+            labels = dict(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                family.add(cumulative, {**labels, "le": _format_value(bound)}, "_bucket")
+            cumulative += data[len(self.buckets)]
+            family.add(cumulative, {**labels, "le": "+Inf"}, "_bucket")
+            family.add(data[-1], labels, "_sum")
+            family.add(cumulative, labels, "_count")
+        return family
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text, labelnames=()) -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=()) -> Histogram:
+        return self._get_or_create(
+            name, lambda: Histogram(name, help_text, labelnames, buckets)
+        )
+
+    def _get_or_create(self, name, factory):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = factory()
+                    self._metrics[name] = metric
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]):
+        """注册采集时计算瞬时值的函数"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def collect(self) -> List[MetricFamily]:
+        families = [metric.collect() for metric in list(self._metrics.values())]
+        for collector in list(self._collectors):
+            try:
+                families.extend(collector())
+            except Exception:
+                # 单个采集函数出错不影响其他指标
+                continue
+        return families
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        if value == float("inf"):
+            return "+Inf"
+        if value.is_integer():
+            return str(int(value))
+        return repr(value)
+    return str(value)
+
+
+def with_labels(
+    families: Iterable[MetricFamily], labels: Dict[str, str]
+) -> List[MetricFamily]:
+    """为所有样本附加标签，如多进程模式下的 worker 编号"""
+    return [
+        MetricFamily(
+            family.name,
+            family.type,
+            family.help,
+            [
+                (name, {**labels, **sample_labels}, value)
+                for name, sample_labels, value in family.samples
+            ],
+        )
+        for family in families
+    ]
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_text(
+    families: Iterable[MetricFamily], extra_labels: Optional[Dict[str, str]] = None
+) -> str:
+    """按 Prometheus 文本格式输出，同名指标（如来自多个worker）合并在一个 HELP/TYPE 下"""
+    grouped: Dict[str, MetricFamily] = {}
+    for family in families:
+        existing = grouped.get(family.name)
+        if existing is None:
+            grouped[family.name] = MetricFamily(
+                family.name, family.type, family.help, list(family.samples)
+            )
+        else:
+            existing.samples.extend(family.samples)
+
+    lines = []
+    for family in grouped.values():
+        lines.append(f"# HELP {family.name} {family.help}")
+        lines.append(f"# TYPE {family.name} {family.type}")
+        for name, labels, value in family.samples:
+            if extra_labels:
+                labels = {**extra_labels, **labels}
+            if labels:
+                label_str = ",".join(
+                    f'{key}="{_escape_label(val)}"' for key, val in labels.items()
+                )
+                lines.append(f"{name}{{{label_str}}} {_format_value(value)}")
+            else:
+                lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# 全局指标注册表
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    return _registry
+
+
+# 常用指标
+audio_frames_received = _registry.counter(
+    "xiaozhi_audio_frames_received_total", "设备上行的音频帧数"
+)
+audio_frames_sent = _registry.counter(
+    "xiaozhi_audio_frames_sent_total", "下发给设备的音频帧数"
+)
+vad_gate_chunks = _registry.counter(
+    "xiaozhi_vad_gate_chunks_total",
+    "开启VAD能量门限时各分块的处理结果（skipped为跳过推理）",
+    ("result",),
+)
+provider_call_seconds = _registry.histogram(
+    "xiaozhi_provider_call_seconds",
+    "供应商调用耗时（秒）",
+    ("kind", "provider"),
+    PROVIDER_LATENCY_BUCKETS,
+)
+provider_errors = _registry.counter(
+    "xiaozhi_provider_errors_total", "供应商调用失败次数", ("kind", "provider")
+)
+
+
+def provider_name(provider) -> str:
+    """以供应商实现所在的模块名作为标签，如 fun_local、openai"""
+    return type(provider).__module__.rsplit(".", 1)[-1]
+
+
+def observe_provider_call(kind: str, provider, seconds: float, error=False):
+    """记录一次供应商调用的耗时和是否失败"""
+    name = provider if isinstance(provider, str) else provider_name(provider)
+    provider_call_seconds.observe(seconds, kind, name)
+    if error:
+        provider_errors.inc(1, kind, name)
+
+
+class RateTracker:
+    """根据两次采集之间计数器的差值计算每秒速率"""
+
+    def __init__(self, min_interval=1.0):
+        self.min_interval = min_interval
+        self._last: Dict[str, Tuple[float, float]] = {}
+        self._rates: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def rate(self, key: str, value: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            last = self._last.get(key)
+            if last is None:
+                self._last[key] = (now, value)
+                return 0.0
+            elapsed = now - last[0]
+            if elapsed >= self.min_interval:
+                self._rates[key] = max(0.0, (value - last[1]) / elapsed)
+                self._last[key] = (now, value)
+            return self._rates.get(key, 0.0)
+
+
+_frame_rates = RateTracker()
+
+
+def _collect_process_metrics() -> List[MetricFamily]:
+    """进程级瞬时指标：音频帧速率、线程数、共享线程池占用、各类型缓存命中率"""
+    # 延迟导入，避免 cache/executor 模块加载时的循环依赖
+    from core.utils import executor as executor_module
+    from core.utils.cache.manager import cache_manager
+
+    families = [
+        MetricFamily(
+            "xiaozhi_audio_frames_received_per_second",
+            MetricType.GAUGE,
+            "上行音频帧速率（两次采集之间的平均值）",
+        ).add(round(_frame_rates.rate("received", audio_frames_received.value()), 2)),
+        MetricFamily(
+            "xiaozhi_audio_frames_sent_per_second",
+            MetricType.GAUGE,
+            "下行音频帧速率（两次采集之间的平均值）",
+        ).add(round(_frame_rates.rate("sent", audio_frames_sent.value()), 2)),
+        MetricFamily(
+            "xiaozhi_threads", MetricType.GAUGE, "进程内活动线程数"
+        ).add(threading.active_count()),
+    ]
+
+    shared = executor_module._shared_executor
+    if shared is not None:
+        stats = shared.get_stats()
+        families.append(
+            MetricFamily(
+                "xiaozhi_executor_max_workers", MetricType.GAUGE, "共享线程池线程数"
+            ).add(stats["max_workers"])
+        )
+        running = MetricFamily(
+            "xiaozhi_executor_running", MetricType.GAUGE, "共享线程池各类任务运行数"
+        )
+        queued = MetricFamily(
+            "xiaozhi_executor_queued", MetricType.GAUGE, "共享线程池各类任务排队数"
+        )
+        limit = MetricFamily(
+            "xiaozhi_executor_limit", MetricType.GAUGE, "共享线程池各类任务并发上限"
+        )
+        wait = MetricFamily(
+            "xiaozhi_executor_avg_wait_seconds",
+            MetricType.GAUGE,
+            "共享线程池各类任务平均排队时间（秒）",
+        )
+        for name, cls in stats["classes"].items():
+            labels = {"workload": name}
+            running.add(cls["running"], labels)
+            queued.add(cls["queued"], labels)
+            limit.add(cls["limit"], labels)
+            wait.add(cls["avg_wait_ms"] / 1000, labels)
+        families.extend([running, queued, limit, wait])
+
+    cache_stats = cache_manager.get_stats()["by_type"]
+    hits = MetricFamily("xiaozhi_cache_hits_total", MetricType.COUNTER, "缓存命中次数")
+    misses = MetricFamily(
+        "xiaozhi_cache_misses_total", MetricType.COUNTER, "缓存未命中次数"
+    )
+    evictions = MetricFamily(
+        "xiaozhi_cache_evictions_total", MetricType.COUNTER, "缓存淘汰次数"
+    )
+    ratio = MetricFamily("xiaozhi_cache_hit_ratio", MetricType.GAUGE, "缓存命中率")
+    size = MetricFamily("xiaozhi_cache_entries", MetricType.GAUGE, "缓存条目数")
+    for type_name, stats in cache_stats.items():
+        labels = {"cache_type": type_name}
+        hits.add(stats["hits"], labels)
+        misses.add(stats["misses"], labels)
+        evictions.add(stats["evictions"], labels)
+        ratio.add(stats["hit_ratio"], labels)
+        size.add(stats["size"], labels)
+    families.extend([hits, misses, evictions, ratio, size])
+    return families
+
+
+_registry.register_collector(_collect_process_metrics)
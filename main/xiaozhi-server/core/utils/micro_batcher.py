@@ -0,0 +1,119 @@
+"""
+跨连接微批处理
+
+各连接在事件循环中提交请求，请求先进入一个很短的攒批窗口，由后台线程合并成一批交给 process 处理，
+process 通过 request.set_result / set_exception 把各自的结果分发回对应连接等待的 future。
+VAD、本地 ASR 等需要合并多个连接请求做一次批量推理的地方都基于它实现。
+
+process 抛出异常时整批请求都以该异常结束；process 返回后仍未给出结果的请求以 RuntimeError 结束，
+调用方不会因为某个请求被漏掉而一直等待。
+"""
+
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Callable, List
+
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+def _set_result(future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future, exc):
+    if not future.done():
+        future.set_exception(exc)
+
+
+class BatchRequest:
+    __slots__ = ("payload", "future", "loop", "enqueue_time", "done")
+
+    def __init__(self, payload, future, loop):
+        self.payload = payload
+        self.future = future
+        self.loop = loop
+        self.enqueue_time = time.monotonic()
+        self.done = False
+
+    def set_result(self, result):
+        self._complete(_set_result, result)
+
+    def set_exception(self, exc: BaseException):
+        self._complete(_set_exception, exc)
+
+    def _complete(self, callback, value):
+        if self.done:
+            return
+        self.done = True
+        try:
+            self.loop.call_soon_threadsafe(callback, self.future, value)
+        except RuntimeError:
+            # 等待结果的事件循环已关闭
+            pass
+
+
+# process(一批请求)，在后台线程中执行，负责为每个请求给出结果
+BatchProcess = Callable[[List[BatchRequest]], None]
+
+
+class MicroBatcher:
+    def __init__(self, process: BatchProcess, max_batch=8, window_ms=5, name="batch"):
+        self._process = process
+        self.max_batch = max(1, int(max_batch))
+        self.window = max(0.0, float(window_ms)) / 1000
+        self.name = name
+        self._pending = deque()
+        self._cond = threading.Condition()
+
+        threading.Thread(
+            target=self._run, name=f"{name}-batcher", daemon=True
+        ).start()
+
+    async def submit(self, payload) -> Any:
+        """提交一个请求，等待批量处理后的结果"""
+        loop = asyncio.get_running_loop()
+        request = BatchRequest(payload, loop.create_future(), loop)
+        with self._cond:
+            self._pending.append(request)
+            self._cond.notify()
+        return await request.future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # 第一个请求到达后等待一个窗口期，期间攒够 max_batch 个请求则提前开始
+                deadline = self._pending[0].enqueue_time + self.window
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [
+                    self._pending.popleft()
+                    for _ in range(min(self.max_batch, len(self._pending)))
+                ]
+            self._process_batch(batch)
+
+    def _process_batch(self, batch: List[BatchRequest]):
+        try:
+            self._process(batch)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"{self.name} 批量处理失败: {e}")
+            for request in batch:
+                request.set_exception(e)
+            return
+        missing = [request for request in batch if not request.done]
+        if missing:
+            logger.bind(tag=TAG).error(
+                f"{self.name} 批量处理有 {len(missing)}/{len(batch)} 个请求没有结果"
+            )
+            for request in missing:
+                request.set_exception(RuntimeError(f"{self.name} 批量处理没有返回结果"))
@@ -0,0 +1,76 @@
+"""
+VAD 音频累积使用的 PCM 环形缓冲区
+
+每收到一个音频包（60ms，960 采样点）写入一次，VAD 每次取出所有完整的 512 采样点分块。
+- 写入时直接把 int16 转换为模型需要的 float32（-1~1）写进预先分配的环形数组，每个音频包只转换一次
+- 容量按分块大小对齐，读位置始终落在分块边界上，取出的分块是环形数组的视图，不复制；
+  只有连续多个分块跨过数组末尾时才拼接到复用的输出数组中
+热路径上不再为每个分块分配内存。
+"""
+
+import numpy as np
+
+_INT16_SCALE = np.float32(1 / 32768.0)
+
+
+class PCMRingBuffer:
+    def __init__(self, chunk_samples=512, capacity_chunks=8):
+        self.chunk_samples = chunk_samples
+        self.capacity = chunk_samples * capacity_chunks
+        self._samples = np.zeros(self.capacity, dtype=np.float32)
+        # 跨过数组末尾的分块拼接到这里，复用同一块内存
+        self._wrapped = np.empty(self.capacity, dtype=np.float32)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        """缓冲区中的采样点数"""
+        return self._size
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+
+    def write(self, pcm):
+        """写入 16 位 PCM（bytes 或 int16 数组），空间不足时丢弃最旧的完整分块"""
+        if isinstance(pcm, (bytes, bytearray, memoryview)):
+            samples = np.frombuffer(pcm, dtype=np.int16)
+        else:
+            samples = pcm
+        count = len(samples)
+        if count > self.capacity:
+            samples = samples[-self.capacity :]
+            count = self.capacity
+        overflow = self._size + count - self.capacity
+        if overflow > 0:
+            # 按整块丢弃，保持读位置与分块边界对齐
+            dropped = -(-overflow // self.chunk_samples) * self.chunk_samples
+            if dropped >= self._size:
+                self.clear()
+            else:
+                self._start = (self._start + dropped) % self.capacity
+                self._size -= dropped
+
+        end = (self._start + self._size) % self.capacity
+        first = min(count, self.capacity - end)
+        np.multiply(samples[:first], _INT16_SCALE, out=self._samples[end : end + first])
+        if first < count:
+            np.multiply(samples[first:], _INT16_SCALE, out=self._samples[: count - first])
+        self._size += count
+
+    def read_chunks(self) -> np.ndarray:
+        """取出所有完整分块，返回形状为 (分块数, chunk_samples) 的 float32 数组（范围 -1~1）。
+        返回的是缓冲区内部内存的视图，下一次写入前有效"""
+        count = self._size // self.chunk_samples
+        consumed = count * self.chunk_samples
+        start = self._start
+        first = min(consumed, self.capacity - start)
+        if first == consumed:
+            chunks = self._samples[start : start + consumed]
+        else:
+            chunks = self._wrapped[:consumed]
+            chunks[:first] = self._samples[start:]
+            chunks[first:] = self._samples[: consumed - first]
+        self._start = (start + consumed) % self.capacity
+        self._size -= consumed
+        return chunks.reshape(count, self.chunk_samples)
@@ -0,0 +1,237 @@
+"""
+会话录制
+
+开启后把每个连接的完整交互写入一个 JSONL 文件（每行一个事件，t 为相对连接开始的毫秒数），
+供 performance_tester_replay.py 在新版本上按原始节奏回放：
+- in / out：收发的 WebSocket 消息（收到的音频帧以 base64 保存，发出的音频帧只记录大小）
+- asr：识别结果和识别耗时
+- llm：大模型流式返回的每个分片及其相对调用开始的时间（含工具调用）
+- tts：合成文本、合成耗时和音频数据
+- turn：本轮的延迟追踪记录，作为回放结果的对照
+
+ASR/TTS 只录制经过基类 handle_voice_stop / to_tts 的非流式调用，流式接口的提供者不会产生对应事件。
+文件由后台线程写入，不阻塞事件循环。
+"""
+
+import os
+import json
+import time
+import queue
+import base64
+import threading
+from typing import Any, Dict, Optional
+
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 录制文件中保留的请求头，回放时据此还原设备身份
+RECORDED_HEADERS = ("device-id", "client-id", "user-agent", "protocol-version")
+
+
+class _RecordWriter:
+    """所有会话共用的后台写入线程"""
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._files: Dict[str, Any] = {}
+        threading.Thread(
+            target=self._run, name="session-record-writer", daemon=True
+        ).start()
+
+    def write(self, path: str, event: Optional[Dict[str, Any]]):
+        """event 为 None 表示该会话录制结束"""
+        self._queue.put((path, event))
+
+    def _run(self):
+        while True:
+            path, event = self._queue.get()
+            try:
+                if event is None:
+                    f = self._files.pop(path, None)
+                    if f is not None:
+                        f.close()
+                    continue
+                f = self._files.get(path)
+                if f is None:
+                    directory = os.path.dirname(path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    f = open(path, "a", encoding="utf-8")
+                    self._files[path] = f
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+                if self._queue.empty():
+                    f.flush()
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"写入会话录制失败: {e}")
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer() -> _RecordWriter:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = _RecordWriter()
+    return _writer
+
+
+class _RecordingWebSocket:
+    """包装连接的 WebSocket，记录收发的消息，其余属性透传"""
+
+    def __init__(self, websocket, recorder: "SessionRecorder"):
+        self._websocket = websocket
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self._websocket, name)
+
+    async def send(self, message):
+        self._recorder.record_outbound(message)
+        await self._websocket.send(message)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        async for message in self._websocket:
+            self._recorder.record_inbound(message)
+            yield message
+
+
+class SessionRecorder:
+    def __init__(self, path: str, record_tts_audio=True):
+        self.path = path
+        self.record_tts_audio = record_tts_audio
+        self._t0 = time.monotonic()
+        self._writer = _get_writer()
+        self.closed = False
+
+    def _offset_ms(self, at: float = None) -> float:
+        return round(((at or time.monotonic()) - self._t0) * 1000, 1)
+
+    def record(self, kind: str, at: float = None, **fields):
+        if self.closed:
+            return
+        self._writer.write(self.path, {"t": self._offset_ms(at), "kind": kind, **fields})
+
+    def wrap(self, websocket):
+        return _RecordingWebSocket(websocket, self)
+
+    def record_inbound(self, message):
+        if isinstance(message, bytes):
+            self.record("in", audio=base64.b64encode(message).decode("ascii"))
+        else:
+            self.record("in", text=message)
+
+    def record_outbound(self, message):
+        if isinstance(message, bytes):
+            self.record("out", audio_bytes=len(message))
+        else:
+            self.record("out", text=message)
+
+    def record_tts(self, text, latency, result, file_type):
+        audio = None
+        if self.record_tts_audio:
+            if isinstance(result, (bytes, bytearray)):
+                audio = bytes(result)
+            elif isinstance(result, str) and os.path.exists(result):
+                with open(result, "rb") as f:
+                    audio = f.read()
+        self.record(
+            "tts",
+            text=text,
+            latency_ms=round(latency * 1000, 1),
+            file_type=file_type,
+            audio=base64.b64encode(audio).decode("ascii") if audio else None,
+        )
+
+    def wrap_llm_stream(self, responses):
+        """透传大模型的流式返回，结束（或被中断）时记录所有分片"""
+        start = time.monotonic()
+        chunks = []
+        try:
+            for response in responses:
+                offset = round((time.monotonic() - start) * 1000, 1)
+                if isinstance(response, tuple):
+                    content, tool_calls = response
+                    chunks.append([offset, content, _serialize_tool_calls(tool_calls)])
+                else:
+                    chunks.append([offset, response, None])
+                yield response
+        finally:
+            self.record("llm", at=start, chunks=chunks)
+
+    def close(self):
+        if self.closed:
+            return
+        self.record("close")
+        self.closed = True
+        self._writer.write(self.path, None)
+
+
+def _serialize_tool_calls(tool_calls):
+    if not tool_calls:
+        return None
+    result = []
+    for call in tool_calls:
+        function = getattr(call, "function", None)
+        result.append(
+            {
+                "id": getattr(call, "id", None),
+                "name": getattr(function, "name", None),
+                "arguments": getattr(function, "arguments", None),
+            }
+        )
+    return result
+
+
+def start_session_recording(conn) -> Optional[SessionRecorder]:
+    """按配置为连接开始录制，未开启或设备不在录制范围内时返回None"""
+    record_config = conn.config.get("session_record", {}) or {}
+    if not record_config.get("enabled", False):
+        return None
+    device_ids = record_config.get("device_ids") or []
+    if device_ids and conn.device_id not in device_ids:
+        return None
+    file_name = f"{time.strftime('%Y%m%d-%H%M%S')}_{conn.session_id}.jsonl"
+    recorder = SessionRecorder(
+        os.path.join(record_config.get("dir", "data/recordings"), file_name),
+        record_tts_audio=record_config.get("tts_audio", True),
+    )
+    recorder.record(
+        "session",
+        session_id=conn.session_id,
+        device_id=conn.device_id,
+        headers={
+            name: conn.headers[name] for name in RECORDED_HEADERS if name in conn.headers
+        },
+        selected_module=dict(conn.config.get("selected_module", {})),
+        started_at=time.time(),
+    )
+    logger.bind(tag=TAG).info(f"开始录制会话: {recorder.path}")
+    return recorder
+
+
+def record_event(conn, kind: str, **fields):
+    """记录一个事件，连接未开启录制时忽略"""
+    recorder = getattr(conn, "recorder", None)
+    if recorder is not None:
+        recorder.record(kind, **fields)
+
+
+def record_llm_stream(conn, responses):
+    recorder = getattr(conn, "recorder", None)
+    if recorder is None:
+        return responses
+    return recorder.wrap_llm_stream(responses)
+
+
+def record_tts(conn, text, latency, result, file_type):
+    recorder = getattr(conn, "recorder", None)
+    if recorder is not None:
+        recorder.record_tts(text, latency, result, file_type)
@@ -0,0 +1,141 @@
+"""
+会话回放
+
+读取 session_recorder 录制的文件，供 type 为 replay 的 ASR / LLM / TTS 提供者按录制时的结果和耗时返回，
+使回放经过与线上相同的 ConnectionHandler 消息路由和处理流程，只把外部服务替换为录制数据。
+
+回放时由 performance_tester_replay.py 把每个 ConnectionHandler 的 session_id 绑定到一份录制，
+提供者按 session_id 找到对应的录制，依次取出下一个识别/大模型/合成结果。
+"""
+
+import json
+import base64
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class Recording:
+    """一次录制的会话"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.session: Dict[str, Any] = {}
+        self.inbound: List[Tuple[float, Any]] = []
+        self.outbound_count = 0
+        self.last_outbound_t = 0.0
+        self.asr: List[Dict[str, Any]] = []
+        self.llm: List[Dict[str, Any]] = []
+        self.tts: List[Dict[str, Any]] = []
+        self.turns: List[Dict[str, Any]] = []
+
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                event = json.loads(line)
+                kind = event.get("kind")
+                if kind == "session":
+                    self.session = event
+                elif kind == "in":
+                    if "audio" in event:
+                        message = base64.b64decode(event["audio"])
+                    else:
+                        message = event.get("text", "")
+                    self.inbound.append((event["t"], message))
+                elif kind == "out":
+                    self.outbound_count += 1
+                    self.last_outbound_t = event["t"]
+                elif kind == "asr":
+                    self.asr.append(event)
+                elif kind == "llm":
+                    self.llm.append(event)
+                elif kind == "tts":
+                    self.tts.append(event)
+                elif kind == "turn":
+                    self.turns.append(event["record"])
+
+    @property
+    def device_id(self) -> Optional[str]:
+        return self.session.get("device_id")
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return dict(self.session.get("headers") or {})
+
+    @property
+    def duration_ms(self) -> float:
+        last_inbound = self.inbound[-1][0] if self.inbound else 0.0
+        return max(last_inbound, self.last_outbound_t)
+
+
+class ReplaySession:
+    """一次回放中某个连接的读取进度"""
+
+    def __init__(self, recording: Recording):
+        self.recording = recording
+        self._lock = threading.Lock()
+        self._asr = deque(recording.asr)
+        self._llm = deque(recording.llm)
+        # 同一句话可能合成多次，按文本排队，文本对不上时按录制顺序取
+        self._tts_by_text: Dict[str, deque] = {}
+        self._tts_unused = list(recording.tts)
+        for event in recording.tts:
+            self._tts_by_text.setdefault(event.get("text", ""), deque()).append(event)
+        self.misses = {"asr": 0, "llm": 0, "tts": 0}
+
+    def next_asr(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if self._asr:
+                return self._asr.popleft()
+            self.misses["asr"] += 1
+            return None
+
+    def next_llm(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if self._llm:
+                return self._llm.popleft()
+            self.misses["llm"] += 1
+            return None
+
+    def take_tts(self, text: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            candidates = self._tts_by_text.get(text)
+            if candidates:
+                event = candidates.popleft()
+            elif self._tts_unused:
+                event = self._tts_unused[0]
+                self._tts_by_text[event.get("text", "")].popleft()
+            else:
+                self.misses["tts"] += 1
+                return None
+            self._tts_unused.remove(event)
+            return event
+
+
+class ReplayStore:
+    def __init__(self):
+        self._sessions: Dict[str, ReplaySession] = {}
+        self._lock = threading.Lock()
+
+    def bind(self, session_id: str, recording: Recording) -> ReplaySession:
+        session = ReplaySession(recording)
+        with self._lock:
+            self._sessions[session_id] = session
+        return session
+
+    def get(self, session_id: str) -> Optional[ReplaySession]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def unbind(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+_replay_store = ReplayStore()
+
+
+def get_replay_store() -> ReplayStore:
+    return _replay_store
@@ -0,0 +1,292 @@
+"""
+单轮对话延迟追踪
+
+设备检测到说话结束时创建一条追踪记录，按顺序记录各阶段完成的时间点：
+说话结束 → ASR完成 → 意图识别完成 → 大模型首个token → 首段语音合成完成 → 首帧音频发出 → 末帧音频发出
+
+一轮结束后（末帧发出、被新一轮替换或连接关闭）生成结构化记录：
+- 写入内存环形缓冲区，可通过 HTTP 接口查询最近的记录
+- 可选追加写入 JSONL 文件（后台线程写入，不阻塞事件循环）
+- 按阶段统计耗时分布（固定分桶的直方图 + 最近窗口内的百分位数）
+
+某个阶段没有发生时（如意图识别直接处理、未调用大模型），该阶段的耗时计入下一个实际发生的阶段。
+"""
+
+import os
+import json
+import time
+import uuid
+import queue
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+class TraceStage:
+    """追踪的时间点，按发生顺序排列"""
+
+    END_OF_SPEECH = "end_of_speech"
+    ASR_DONE = "asr_done"
+    INTENT_DONE = "intent_done"
+    LLM_FIRST_TOKEN = "llm_first_token"
+    TTS_FIRST_SEGMENT = "tts_first_segment"
+    FIRST_FRAME_SENT = "first_frame_sent"
+    LAST_FRAME_SENT = "last_frame_sent"
+
+
+STAGE_ORDER = (
+    TraceStage.END_OF_SPEECH,
+    TraceStage.ASR_DONE,
+    TraceStage.INTENT_DONE,
+    TraceStage.LLM_FIRST_TOKEN,
+    TraceStage.TTS_FIRST_SEGMENT,
+    TraceStage.FIRST_FRAME_SENT,
+    TraceStage.LAST_FRAME_SENT,
+)
+
+# 除各阶段外额外统计的汇总指标
+RESPONSE_LATENCY = "response_latency"  # 说话结束到首帧音频发出
+TOTAL = "total"  # 说话结束到末帧音频发出
+
+# 直方图分桶上界（毫秒）
+HISTOGRAM_BUCKETS_MS = (50, 100, 200, 300, 500, 800, 1000, 1500, 2000, 3000, 5000, 10000)
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class TraceStatus:
+    COMPLETED = "completed"  # 末帧音频已发出
+    ABORTED = "aborted"  # 播放过程中被打断
+    INCOMPLETE = "incomplete"  # 未播放语音就开始了新一轮（如识别为空、意图直接处理）
+    CLOSED = "closed"  # 连接关闭时仍未结束
+
+
+class TurnTrace:
+    """单轮对话的时间点记录，各时间点只记录第一次"""
+
+    __slots__ = ("turn_id", "session_id", "device_id", "started_at", "_t0", "marks", "finished")
+
+    def __init__(self, session_id=None, device_id=None):
+        self.turn_id = uuid.uuid4().hex[:16]
+        self.session_id = session_id
+        self.device_id = device_id
+        self.started_at = time.time()
+        self._t0 = time.monotonic()
+        self.marks: Dict[str, float] = {TraceStage.END_OF_SPEECH: 0.0}
+        self.finished = False
+
+    def mark(self, stage: str):
+        """记录时间点，可在任意线程调用"""
+        if not self.finished and stage not in self.marks:
+            self.marks[stage] = (time.monotonic() - self._t0) * 1000
+
+    def has(self, stage: str) -> bool:
+        return stage in self.marks
+
+    def stage_durations(self) -> Dict[str, float]:
+        """各阶段耗时（毫秒），相对于上一个实际发生的时间点"""
+        durations = {}
+        previous = 0.0
+        for stage in STAGE_ORDER[1:]:
+            if stage in self.marks:
+                durations[stage] = round(self.marks[stage] - previous, 2)
+                previous = self.marks[stage]
+        if TraceStage.FIRST_FRAME_SENT in self.marks:
+            durations[RESPONSE_LATENCY] = round(self.marks[TraceStage.FIRST_FRAME_SENT], 2)
+        if TraceStage.LAST_FRAME_SENT in self.marks:
+            durations[TOTAL] = round(self.marks[TraceStage.LAST_FRAME_SENT], 2)
+        return durations
+
+    def to_record(self, status: str) -> Dict[str, Any]:
+        return {
+            "turn_id": self.turn_id,
+            "session_id": self.session_id,
+            "device_id": self.device_id,
+            "started_at": self.started_at,
+            "status": status,
+            "marks_ms": {
+                stage: round(self.marks[stage], 2)
+                for stage in STAGE_ORDER
+                if stage in self.marks
+            },
+            "stages_ms": self.stage_durations(),
+        }
+
+
+class _StageHistogram:
+    def __init__(self, window: int):
+        self.bucket_counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value_ms: float):
+        for i, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+            if value_ms <= bound:
+                self.bucket_counts[i] += 1
+                break
+        else:
+            self.bucket_counts[-1] += 1
+        self.count += 1
+        self.sum += value_ms
+        self.recent.append(value_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        values = sorted(self.recent)
+        result = {
+            "count": self.count,
+            "avg_ms": round(self.sum / self.count, 2) if self.count else 0,
+            "max_ms": round(values[-1], 2) if values else 0,
+        }
+        for p in PERCENTILES:
+            result[f"p{p}_ms"] = (
+                round(values[min(len(values) - 1, int(len(values) * p / 100))], 2)
+                if values
+                else 0
+            )
+        buckets = {}
+        for bound, count in zip(HISTOGRAM_BUCKETS_MS, self.bucket_counts):
+            buckets[f"le_{bound}"] = count
+        buckets["le_inf"] = self.bucket_counts[-1]
+        result["buckets"] = buckets
+        return result
+
+
+class TraceRecorder:
+    def __init__(self, enabled=True, ring_size=500, jsonl_file="", histogram_window=1000):
+        self.enabled = enabled
+        self._ring = deque(maxlen=int(ring_size))
+        self._histogram_window = int(histogram_window)
+        self._histograms: Dict[str, _StageHistogram] = {}
+        self._status_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.jsonl_file = jsonl_file
+        self._write_queue = None
+        if enabled and jsonl_file:
+            self._write_queue = queue.SimpleQueue()
+            threading.Thread(
+                target=self._jsonl_writer, name="turn-trace-writer", daemon=True
+            ).start()
+
+    def record(self, trace: TurnTrace, status: str) -> Dict[str, Any]:
+        record = trace.to_record(status)
+        with self._lock:
+            self._ring.append(record)
+            self._status_counts[status] = self._status_counts.get(status, 0) + 1
+            for stage, duration in record["stages_ms"].items():
+                histogram = self._histograms.get(stage)
+                if histogram is None:
+                    histogram = _StageHistogram(self._histogram_window)
+                    self._histograms[stage] = histogram
+                histogram.observe(duration)
+        if self._write_queue is not None:
+            self._write_queue.put(record)
+        return record
+
+    def _jsonl_writer(self):
+        directory = os.path.dirname(self.jsonl_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        while True:
+            record = self._write_queue.get()
+            try:
+                with open(self.jsonl_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    # 顺带写入已积压的记录，减少打开文件的次数
+                    while True:
+                        try:
+                            record = self._write_queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"写入延迟追踪记录失败: {e}")
+
+    def get_recent(
+        self, limit=50, device_id=None, session_id=None
+    ) -> List[Dict[str, Any]]:
+        """按时间倒序返回最近的记录"""
+        with self._lock:
+            records = list(self._ring)
+        result = []
+        for record in reversed(records):
+            if device_id and record["device_id"] != device_id:
+                continue
+            if session_id and record["session_id"] != session_id:
+                continue
+            result.append(record)
+            if len(result) >= limit:
+                break
+        return result
+
+    def get_histograms(self) -> Dict[str, Any]:
+        with self._lock:
+            ordered = [s for s in STAGE_ORDER[1:] if s in self._histograms]
+            ordered += [s for s in (RESPONSE_LATENCY, TOTAL) if s in self._histograms]
+            return {
+                "turns": dict(self._status_counts),
+                "stages": {s: self._histograms[s].snapshot() for s in ordered},
+            }
+
+
+# 全局追踪记录器实例
+_trace_recorder = None
+_trace_recorder_lock = threading.Lock()
+
+
+def get_trace_recorder(config: Dict[str, Any] = None) -> TraceRecorder:
+    """获取全局追踪记录器实例（首次调用时按配置创建）"""
+    global _trace_recorder
+    if _trace_recorder is None:
+        with _trace_recorder_lock:
+            if _trace_recorder is None:
+                trace_config = (config or {}).get("turn_trace", {}) or {}
+                _trace_recorder = TraceRecorder(
+                    enabled=trace_config.get("enabled", True),
+                    ring_size=trace_config.get("ring_size", 500),
+                    jsonl_file=trace_config.get("jsonl_file", ""),
+                    histogram_window=trace_config.get("histogram_window", 1000),
+                )
+    return _trace_recorder
+
+
+def start_turn_trace(conn) -> Optional[TurnTrace]:
+    """说话结束时为连接开始新一轮追踪，上一轮未结束的追踪记为 incomplete"""
+    recorder = get_trace_recorder(conn.config)
+    if not recorder.enabled:
+        return None
+    finish_turn_trace(conn, TraceStatus.INCOMPLETE)
+    trace = TurnTrace(conn.session_id, conn.headers.get("device-id"))
+    conn.turn_trace = trace
+    return trace
+
+
+def mark_turn(conn, stage: str):
+    """记录当前轮次的时间点，没有进行中的追踪时忽略"""
+    trace = getattr(conn, "turn_trace", None)
+    if trace is not None:
+        trace.mark(stage)
+
+
+def finish_turn_trace(conn, status: str = TraceStatus.COMPLETED):
+    """结束当前轮次的追踪并写入记录"""
+    trace = getattr(conn, "turn_trace", None)
+    if trace is None or trace.finished:
+        return
+    conn.turn_trace = None
+    if status == TraceStatus.COMPLETED:
+        if conn.client_abort:
+            status = TraceStatus.ABORTED
+        else:
+            trace.mark(TraceStage.LAST_FRAME_SENT)
+    trace.finished = True
+    record = get_trace_recorder(conn.config).record(trace, status)
+    recorder = getattr(conn, "recorder", None)
+    if recorder is not None:
+        recorder.record("turn", record=record)
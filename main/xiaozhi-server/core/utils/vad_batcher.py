@@ -0,0 +1,73 @@
+"""
+VAD 跨连接批量推理
+
+所有连接的 VAD 分块先进入一个很短的攒批窗口（默认 5ms），由后台线程合并成一次批量前向推理，
+代替每个连接每 32ms 一次的单独推理。每个连接的模型循环状态随请求传入、随结果传出，
+由连接自己保存，批次之间互不影响。
+
+一次请求可以包含同一连接的多个连续分块：第 k 步只合并各请求的第 k 个分块，
+保证同一连接的分块按顺序推理、状态依次传递。
+"""
+
+from typing import Any, Callable, List, Optional, Tuple
+
+from config.logger import setup_logging
+from core.utils.metrics import get_metrics_registry
+from core.utils.micro_batcher import BatchRequest, MicroBatcher
+
+TAG = __name__
+logger = setup_logging()
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+# forward(分块列表, 状态列表) -> (语音概率列表, 新状态列表)
+BatchForward = Callable[[List[Any], List[Any]], Tuple[List[float], List[Any]]]
+
+
+class _VADRequest:
+    __slots__ = ("chunks", "state", "probs")
+
+    def __init__(self, chunks, state):
+        self.chunks = chunks
+        self.state = state
+        self.probs = []
+
+
+class VADBatcher:
+    def __init__(self, forward: BatchForward, max_batch=64, window_ms=5, name="vad"):
+        self._forward = forward
+
+        registry = get_metrics_registry()
+        self._batch_size = registry.histogram(
+            "xiaozhi_vad_batch_size",
+            "VAD 每次批量推理合并的分块数",
+            ("vad",),
+            BATCH_SIZE_BUCKETS,
+        )
+        self._chunks = registry.counter(
+            "xiaozhi_vad_chunks_total", "VAD 推理的分块总数", ("vad",)
+        )
+        self._name = name
+        self._batcher = MicroBatcher(self._process, max_batch, window_ms, name)
+
+    async def infer(self, chunks: List[Any], state: Optional[Any]):
+        """推理同一连接的若干连续分块，返回 (各分块的语音概率, 更新后的状态)"""
+        return await self._batcher.submit(_VADRequest(chunks, state))
+
+    def _process(self, batch: List[BatchRequest]):
+        requests = [request.payload for request in batch]
+        steps = max(len(r.chunks) for r in requests)
+        for step in range(steps):
+            active = [r for r in requests if len(r.chunks) > step]
+            probs, states = self._forward(
+                [r.chunks[step] for r in active], [r.state for r in active]
+            )
+            for r, prob, state in zip(active, probs, states):
+                r.probs.append(prob)
+                r.state = state
+            self._batch_size.observe(len(active), self._name)
+            self._chunks.inc(len(active), self._name)
+        for request in batch:
+            r = request.payload
+            if len(r.probs) == len(r.chunks):
+                request.set_result((r.probs, r.state))
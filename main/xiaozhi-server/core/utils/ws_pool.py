@@ -0,0 +1,245 @@
+"""
+流式 ASR 的预热 WebSocket 会话池
+
+流式 ASR（如 DoubaoStreamASR）在检测到语音开始时才建立 WebSocket 并完成鉴权和识别参数交换，
+每句话在发出第一帧音频之前都要先等一次 TLS + WebSocket 握手和一次初始化往返。
+会话池在每个进程内为同一套配置预先建立好若干个已完成初始化的会话：
+- 语音开始时 acquire 租用一个空闲会话，没有空闲会话时现场建立（与不开启会话池时相同）
+- 识别结束后 release 归还：协议允许复用的会话放回池中，否则关闭，由后台任务补充新的会话
+- 后台任务定期检查空闲会话：已关闭、ping 不通或空闲超过 max_idle_s 的会话被回收
+- 最近 keep_warm_s 内没有租用时不再补充，空闲的服务器不会一直占着远端连接
+
+会话的建立方式由各供应商提供的 open_session 协程决定，会话池只要求它返回一个 websockets 连接对象。
+会话池绑定首次使用时的事件循环，每个服务进程各自持有自己的会话池。
+"""
+
+import time
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config.logger import setup_logging
+from core.utils.metrics import get_metrics_registry
+
+TAG = __name__
+logger = setup_logging()
+
+# open_session() -> 已完成握手和初始化、可以直接发送音频的 WebSocket 连接
+OpenSession = Callable[[], Awaitable]
+
+ACQUIRE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_registry = get_metrics_registry()
+_leases = _registry.counter(
+    "xiaozhi_ws_pool_leases_total",
+    "预热会话池的租用次数（warm为使用预热会话，cold为现场建立）",
+    ("pool", "result"),
+)
+_acquire_seconds = _registry.histogram(
+    "xiaozhi_ws_pool_acquire_seconds",
+    "从请求会话到拿到可用会话的耗时（秒）",
+    ("pool",),
+    ACQUIRE_BUCKETS,
+)
+_recycled = _registry.counter(
+    "xiaozhi_ws_pool_recycled_total",
+    "预热会话池回收的空闲会话数",
+    ("pool", "reason"),
+)
+
+
+def is_open(ws) -> bool:
+    """兼容新旧版本 websockets 的连接状态判断"""
+    state = getattr(ws, "state", None)
+    return getattr(state, "name", "") == "OPEN"
+
+
+async def _close_quietly(ws):
+    try:
+        await ws.close()
+    except Exception:
+        pass
+
+
+class WebSocketSessionPool:
+    def __init__(
+        self,
+        name: str,
+        open_session: OpenSession,
+        size=2,
+        max_idle_s=15,
+        keep_warm_s=300,
+        health_interval_s=5,
+        ping_timeout_s=3,
+    ):
+        self.name = name
+        self.open_session = open_session
+        self.size = max(0, int(size))
+        self.max_idle_s = float(max_idle_s)
+        self.keep_warm_s = float(keep_warm_s)
+        self.health_interval_s = float(health_interval_s)
+        self.ping_timeout_s = float(ping_timeout_s)
+        # 空闲会话及其建立（或归还）时间，先进先出
+        self._idle: List[Tuple[object, float]] = []
+        self._opening = 0
+        self._open_tasks = set()
+        self._last_lease = 0.0
+        self._loop = None
+        self._maintainer = None
+        self._wakeup = None
+
+    async def acquire(self):
+        """租用一个会话；没有可用的预热会话时现场建立"""
+        self._bind_loop()
+        start = time.monotonic()
+        self._last_lease = start
+        while self._idle:
+            ws, _ = self._idle.pop(0)
+            if is_open(ws):
+                self._wakeup.set()
+                _leases.inc(1, self.name, "warm")
+                _acquire_seconds.observe(time.monotonic() - start, self.name)
+                return ws
+            _recycled.inc(1, self.name, "closed")
+            asyncio.create_task(_close_quietly(ws))
+        self._wakeup.set()
+        ws = await self.open_session()
+        _leases.inc(1, self.name, "cold")
+        _acquire_seconds.observe(time.monotonic() - start, self.name)
+        return ws
+
+    async def release(self, ws, reusable=False):
+        """归还会话：reusable 为 True 且会话仍可用时放回池中，否则关闭"""
+        if ws is None:
+            return
+        if (
+            reusable
+            and self._loop is asyncio.get_running_loop()
+            and is_open(ws)
+            and len(self._idle) + self._opening < self.size
+        ):
+            self._idle.append((ws, time.monotonic()))
+            return
+        await _close_quietly(ws)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def close(self):
+        if self._maintainer:
+            self._maintainer.cancel()
+            self._maintainer = None
+        for task in list(self._open_tasks):
+            task.cancel()
+        idle, self._idle = self._idle, []
+        await asyncio.gather(
+            *(_close_quietly(ws) for ws, _ in idle), return_exceptions=True
+        )
+        self._loop = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"idle": len(self._idle), "opening": self._opening}
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # 之前的事件循环中的会话不能在新的事件循环中使用，在原事件循环中关闭后清空
+        self._discard_loop_sessions()
+        self._opening = 0
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._maintainer = loop.create_task(self._maintain())
+
+    def _discard_loop_sessions(self):
+        old_loop = self._loop
+        idle, self._idle = self._idle, []
+        tasks = list(self._open_tasks)
+        if self._maintainer is not None:
+            tasks.append(self._maintainer)
+        self._open_tasks = set()
+        self._maintainer = None
+        if old_loop is None:
+            return
+        if old_loop.is_running():
+            try:
+                for task in tasks:
+                    old_loop.call_soon_threadsafe(task.cancel)
+                for ws, _ in idle:
+                    asyncio.run_coroutine_threadsafe(_close_quietly(ws), old_loop)
+                return
+            except RuntimeError:
+                # 原事件循环在此期间已关闭
+                pass
+        # 原事件循环已停止，无法再执行关闭握手，直接断开底层连接
+        for ws, _ in idle:
+            transport = getattr(ws, "transport", None)
+            if transport is not None:
+                transport.abort()
+
+    async def _maintain(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.health_interval_s)
+            except asyncio.TimeoutError:
+                await self._check_idle()
+            self._wakeup.clear()
+            self._refill()
+
+    def _refill(self):
+        if time.monotonic() - self._last_lease > self.keep_warm_s:
+            return
+        for _ in range(self.size - len(self._idle) - self._opening):
+            self._opening += 1
+            task = asyncio.create_task(self._open_one())
+            self._open_tasks.add(task)
+            task.add_done_callback(self._open_tasks.discard)
+
+    async def _open_one(self):
+        try:
+            ws = await self.open_session()
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"预热会话建立失败 {self.name}: {e}")
+            # 避免远端不可用时反复重试，等下一次健康检查再补充
+            return
+        finally:
+            self._opening = max(0, self._opening - 1)
+        self._idle.append((ws, time.monotonic()))
+
+    async def _check_idle(self):
+        now = time.monotonic()
+        keep_warm = now - self._last_lease <= self.keep_warm_s
+        # 检查期间会话仍留在池中可被租用，只移除检查不通过且尚未被租走的会话
+        idle = list(self._idle)
+        results = await asyncio.gather(
+            *(self._check_one(ws, opened, now, keep_warm) for ws, opened in idle)
+        )
+        for entry, reason in zip(idle, results):
+            if reason and entry in self._idle:
+                self._idle.remove(entry)
+                _recycled.inc(1, self.name, reason)
+                asyncio.create_task(_close_quietly(entry[0]))
+
+    async def _check_one(self, ws, opened, now, keep_warm) -> Optional[str]:
+        """会话需要回收时返回回收原因，否则返回 None"""
+        if not is_open(ws):
+            return "closed"
+        if not keep_warm:
+            return "cold"
+        if now - opened > self.max_idle_s:
+            return "expired"
+        try:
+            pong = await ws.ping()
+            await asyncio.wait_for(pong, self.ping_timeout_s)
+            return None
+        except Exception:
+            return "ping"
+
+
+_pools: Dict[tuple, WebSocketSessionPool] = {}
+
+
+def get_ws_session_pool(key: tuple, factory: Callable[[], WebSocketSessionPool]):
+    """按配置获取进程内共享的会话池，配置相同的连接共用一个池"""
+    pool = _pools.get(key)
+    if pool is None:
+        pool = _pools[key] = factory()
+    return pool
@@ -2,28 +2,40 @@ import asyncio
 import websockets
 from config.logger import setup_logging
 from core.connection import ConnectionHandler
-from config.config_loader import get_config_from_api
+from config.config_loader import get_config_from_api, invalidate_private_config_cache
 from core.utils.modules_initialize import initialize_modules
 from core.utils.util import check_vad_update, check_asr_update
+from core.utils.metrics import MetricFamily, MetricType, get_metrics_registry
+from core.utils.loop_watchdog import start_loop_watchdog
+from core.utils.admission import (
+    RejectReason,
+    build_busy_message,
+    get_admission_controller,
+)
 
 TAG = __name__
 
 
 class WebSocketServer:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, shared_modules: dict = None, reuse_port=False):
         self.config = config
         self.logger = setup_logging()
         self.config_lock = asyncio.Lock()
+        # 多进程模式下端口由多个worker通过SO_REUSEPORT共同绑定
+        self.reuse_port = reuse_port
+        # 多进程模式下由主进程在fork前预加载的只读模型，无需重复加载
+        shared_modules = shared_modules or {}
         modules = initialize_modules(
             self.logger,
             self.config,
-            "VAD" in self.config["selected_module"],
-            "ASR" in self.config["selected_module"],
+            "VAD" in self.config["selected_module"] and "vad" not in shared_modules,
+            "ASR" in self.config["selected_module"] and "asr" not in shared_modules,
             "LLM" in self.config["selected_module"],
             False,
             "Memory" in self.config["selected_module"],
             "Intent" in self.config["selected_module"],
         )
+        modules = {**shared_modules, **modules}
         self._vad = modules["vad"] if "vad" in modules else None
         self._asr = modules["asr"] if "asr" in modules else None
         self._llm = modules["llm"] if "llm" in modules else None
@@ -31,29 +43,123 @@ class WebSocketServer:
         self._memory = modules["memory"] if "memory" in modules else None
 
         self.active_connections = set()
+        self.admission = get_admission_controller(self.config)
+        self.admission.set_tts_backlog_provider(self._get_tts_backlog)
+        get_metrics_registry().register_collector(self._collect_metrics)
+
+    def _get_tts_backlog(self) -> int:
+        """所有连接已切分出来、尚未合成完成的句子总数
+
+        不统计 tts_text_queue：其中是大模型逐个输出的token和控制消息，不是句子
+        """
+        backlog = 0
+        for handler in list(self.active_connections):
+            tts = getattr(handler, "tts", None)
+            backlog += getattr(tts, "pending_segments", 0)
+        return backlog
+
+    def _collect_metrics(self):
+        """采集连接数、各队列深度（所有连接之和与单连接最大值）和语音合成线程池占用"""
+        # 延迟导入，避免与TTS模块循环导入
+        from core.providers.tts import base as tts_base
+
+        depth_sum = {"asr_audio": 0, "tts_text": 0, "tts_audio": 0, "report": 0}
+        depth_max = dict(depth_sum)
+        handlers = list(self.active_connections)
+        for handler in handlers:
+            tts = getattr(handler, "tts", None)
+            queues = {
+                "asr_audio": getattr(handler, "asr_audio_queue", None),
+                "tts_text": getattr(tts, "tts_text_queue", None),
+                "tts_audio": getattr(tts, "tts_audio_queue", None),
+                "report": getattr(handler, "report_queue", None),
+            }
+            for name, q in queues.items():
+                if q is None:
+                    continue
+                size = q.qsize()
+                depth_sum[name] += size
+                depth_max[name] = max(depth_max[name], size)
+
+        families = [
+            MetricFamily(
+                "xiaozhi_active_connections", MetricType.GAUGE, "当前活动连接数"
+            ).add(len(handlers))
+        ]
+        total = MetricFamily(
+            "xiaozhi_queue_depth", MetricType.GAUGE, "各队列所有连接的积压总数"
+        )
+        peak = MetricFamily(
+            "xiaozhi_queue_depth_max", MetricType.GAUGE, "各队列单个连接的最大积压数"
+        )
+        for name in depth_sum:
+            total.add(depth_sum[name], {"queue": name})
+            peak.add(depth_max[name], {"queue": name})
+        families.extend([total, peak])
+
+        synthesis = tts_base.get_synthesis_stats()
+        if synthesis is not None:
+            families.append(
+                MetricFamily(
+                    "xiaozhi_tts_synthesis_running",
+                    MetricType.GAUGE,
+                    "语音合成线程池正在执行的任务数",
+                ).add(synthesis["running"])
+            )
+            families.append(
+                MetricFamily(
+                    "xiaozhi_tts_synthesis_queued",
+                    MetricType.GAUGE,
+                    "语音合成线程池排队的任务数",
+                ).add(synthesis["queued"])
+            )
+        return families
 
     async def start(self):
+        # 监控事件循环是否被同步代码阻塞
+        start_loop_watchdog(self.config)
         server_config = self.config["server"]
         host = server_config.get("ip", "0.0.0.0")
         port = int(server_config.get("port", 8000))
 
         async with websockets.serve(
-            self._handle_connection, host, port, process_request=self._http_response
+            self._handle_connection,
+            host,
+            port,
+            process_request=self._http_response,
+            reuse_port=self.reuse_port,
         ):
             await asyncio.Future()
 
     async def _handle_connection(self, websocket):
         """处理新连接，每次创建独立的ConnectionHandler"""
+        # 握手前的检查与这里之间可能有并发连接进入，以实际占用名额为准
+        if not self.admission.try_acquire_session():
+            self.logger.bind(tag=TAG).warning("会话数已达上限，拒绝新连接")
+            try:
+                await websocket.send(
+                    build_busy_message(
+                        RejectReason.SESSIONS, self.admission.retry_after
+                    )
+                )
+                await websocket.close(1013, "server busy")
+            except Exception:
+                pass
+            return
         # 创建ConnectionHandler时传入当前server实例
-        handler = ConnectionHandler(
-            self.config,
-            self._vad,
-            self._asr,
-            self._llm,
-            self._memory,
-            self._intent,
-            self,  # 传入server实例
-        )
+        try:
+            handler = ConnectionHandler(
+                self.config,
+                self._vad,
+                self._asr,
+                self._llm,
+                self._memory,
+                self._intent,
+                self,  # 传入server实例
+            )
+        except Exception:
+            self.admission.release_session()
+            raise
         self.active_connections.add(handler)
         try:
             await handler.handle_connection(websocket)
@@ -62,6 +168,7 @@ class WebSocketServer:
         finally:
             # 确保从活动连接集合中移除
             self.active_connections.discard(handler)
+            self.admission.release_session()
             # 强制关闭连接（如果还没有关闭的话）
             try:
                 # 安全地检查WebSocket状态并关闭
@@ -80,6 +187,12 @@ class WebSocketServer:
     async def _http_response(self, websocket, request_headers):
         # 检查是否为 WebSocket 升级请求
         if request_headers.headers.get("connection", "").lower() == "upgrade":
+            # 会话数已达上限时直接返回503，不再创建连接处理器
+            if not self.admission.session_available():
+                response = websocket.respond(503, "Server busy\n")
+                if self.admission.retry_after > 0:
+                    response.headers["Retry-After"] = str(self.admission.retry_after)
+                return response
             # 如果是 WebSocket 请求，返回 None 允许握手继续
             return None
         else:
@@ -108,6 +221,8 @@ class WebSocketServer:
                 )
                 # 更新配置
                 self.config = new_config
+                # 设备差异化配置可能已在智控台修改，清空缓存
+                invalidate_private_config_cache()
                 # 重新初始化组件
                 modules = initialize_modules(
                     self.logger,
@@ -0,0 +1,432 @@
+"""
+多进程 worker 模式
+
+主进程作为 supervisor，fork 出 N 个 worker 进程，每个 worker 运行独立的事件循环和 WebSocketServer，
+并通过 SO_REUSEPORT 绑定同一个 WebSocket 端口，由内核在各 worker 之间分配新连接，
+从而让 opus 解码、VAD、分段等 CPU 密集的工作分散到多个 GIL 上。
+- worker 不由 supervisor 直接 fork：supervisor 在启动事件循环之前先 fork 出一个孵化进程（zygote），
+  之后所有 worker（包括重启）都由这个没有事件循环、线程和连接的干净进程 fork 出来
+- worker 异常退出后由 supervisor 自动重启（指数退避，防止崩溃循环）
+- worker 定期把运行统计上报给 supervisor，由 supervisor 汇总后通过 HTTP 接口提供
+- 可选在 fork 前由主进程预加载 VAD/本地ASR 等只读模型，worker 通过写时复制共享同一份权重
+
+仅支持提供 fork 与 SO_REUSEPORT 的平台（Linux）。
+"""
+
+import gc
+import os
+import sys
+import time
+import queue
+import signal
+import socket
+import asyncio
+import multiprocessing
+from typing import Any, Dict, List, Optional
+
+from config.logger import setup_logging
+from core.providers.asr.dto.dto import InterfaceType
+from core.utils.executor import get_shared_executor
+from core.utils.turn_trace import get_trace_recorder
+from core.utils.metrics import get_metrics_registry
+from core.utils.loop_watchdog import get_loop_watchdog
+from core.utils.modules_initialize import initialize_modules
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+TAG = __name__
+
+# worker 连续稳定运行超过该时长后，重启退避时间重新计算
+_STABLE_RUN_SECONDS = 60
+
+
+def is_multi_worker_supported() -> bool:
+    """当前平台是否支持多进程 worker 模式"""
+    return (
+        sys.platform != "win32"
+        and hasattr(socket, "SO_REUSEPORT")
+        and "fork" in multiprocessing.get_all_start_methods()
+    )
+
+
+def preload_shared_models(logger, config: Dict[str, Any]) -> Dict[str, Any]:
+    """在 fork 前加载只读模型，worker 继承后通过写时复制共享
+
+    只共享 VAD 和本地 ASR：它们的权重只读且体积大；
+    非本地 ASR 每个连接都会单独创建实例，没有共享的必要。
+    """
+    selected_module = config["selected_module"]
+    modules = initialize_modules(
+        logger,
+        config,
+        "VAD" in selected_module,
+        "ASR" in selected_module,
+        False,
+        False,
+        False,
+        False,
+    )
+    asr = modules.get("asr")
+    if asr is not None and asr.interface_type != InterfaceType.LOCAL:
+        modules.pop("asr")
+    return modules
+
+
+def _collect_worker_stats(server, index: int, started_at: float) -> Dict[str, Any]:
+    stats = {
+        "worker": index,
+        "pid": os.getpid(),
+        "uptime_s": round(time.time() - started_at, 1),
+        "active_connections": len(server.active_connections),
+        "executor": get_shared_executor(server.config).get_stats(),
+        "admission": server.admission.get_stats(),
+        "turn_latency": get_trace_recorder(server.config).get_histograms(),
+        "metrics": [family.to_dict() for family in get_metrics_registry().collect()],
+        "reported_at": time.time(),
+    }
+    watchdog = get_loop_watchdog()
+    if watchdog is not None:
+        stats["loop_lag"] = watchdog.get_stats()
+    if psutil is not None:
+        stats["rss_mb"] = round(psutil.Process().memory_info().rss / 1024 / 1024, 1)
+    return stats
+
+
+async def _report_stats(server, index, stats_queue, interval):
+    started_at = time.time()
+    while True:
+        try:
+            stats_queue.put_nowait(_collect_worker_stats(server, index, started_at))
+        except Exception as e:
+            server.logger.bind(tag=TAG).warning(f"worker {index} 上报统计失败: {e}")
+        await asyncio.sleep(interval)
+
+
+async def _worker_main(config, index, stats_queue, shared_modules, stats_interval):
+    # 延迟导入，避免与 websocket_server 循环导入
+    from core.websocket_server import WebSocketServer
+
+    logger = setup_logging()
+    loop = asyncio.get_running_loop()
+    stop_event = asyncio.Event()
+    loop.add_signal_handler(signal.SIGTERM, stop_event.set)
+
+    server = WebSocketServer(config, shared_modules=shared_modules, reuse_port=True)
+    ws_task = asyncio.create_task(server.start())
+    stats_task = asyncio.create_task(
+        _report_stats(server, index, stats_queue, stats_interval)
+    )
+    stop_task = asyncio.create_task(stop_event.wait())
+    logger.bind(tag=TAG).info(f"worker {index} 已启动，pid={os.getpid()}")
+
+    try:
+        await asyncio.wait([ws_task, stop_task], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in (ws_task, stats_task, stop_task):
+            task.cancel()
+        await asyncio.wait([ws_task, stats_task, stop_task], timeout=3.0)
+
+    # WebSocket 服务异常退出（如端口绑定失败）时抛出，使进程以非0退出码结束，由 supervisor 重启
+    if not ws_task.cancelled() and ws_task.exception() is not None:
+        raise ws_task.exception()
+    logger.bind(tag=TAG).info(f"worker {index} 已退出，pid={os.getpid()}")
+
+
+def _worker_entry(config, index, stats_queue, shared_modules, stats_interval):
+    """worker 进程入口（由孵化进程 fork 后在子进程中执行）"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # Ctrl-C 由 supervisor 统一处理，再通过 SIGTERM 通知 worker 退出
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    asyncio.run(
+        _worker_main(config, index, stats_queue, shared_modules, stats_interval)
+    )
+
+
+def _zygote_main(
+    conn, supervisor_conn, config, stats_queue, shared_modules, stats_interval
+):
+    """孵化进程入口：按 supervisor 的请求 fork worker，并上报 worker 的退出
+
+    孵化进程只在这个循环中等待命令，不运行事件循环、不创建线程和连接，
+    因此任何时候从它 fork 出的 worker 都处于干净的初始状态。
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # 关闭继承来的 supervisor 一端，supervisor 退出时这里才能收到 EOF
+    supervisor_conn.close()
+    ctx = multiprocessing.get_context("fork")
+    processes: Dict[int, multiprocessing.Process] = {}
+    while True:
+        for index, process in list(processes.items()):
+            if not process.is_alive():
+                conn.send(("exited", index, process.pid, process.exitcode))
+                del processes[index]
+        if not conn.poll(0.2):
+            continue
+        try:
+            command, *args = conn.recv()
+        except EOFError:
+            # supervisor 已退出
+            break
+        if command == "spawn":
+            index = args[0]
+            process = ctx.Process(
+                target=_worker_entry,
+                args=(config, index, stats_queue, shared_modules, stats_interval),
+                name=f"xiaozhi-worker-{index}",
+            )
+            process.start()
+            processes[index] = process
+            conn.send(("started", index, process.pid))
+        elif command == "stop":
+            break
+
+
+class _WorkerHandle:
+    """由孵化进程创建的 worker 进程，supervisor 通过 pid 和孵化进程上报的退出码管理"""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.exitcode = None
+
+    def is_alive(self) -> bool:
+        return self.exitcode is None
+
+    def terminate(self):
+        self._signal(signal.SIGTERM)
+
+    def kill(self):
+        self._signal(signal.SIGKILL)
+
+    def _signal(self, sig):
+        if self.exitcode is not None:
+            return
+        try:
+            os.kill(self.pid, sig)
+        except ProcessLookupError:
+            pass
+
+
+class _WorkerSlot:
+    """单个 worker 的进程和重启状态"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process: Optional[_WorkerHandle] = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.consecutive_failures = 0
+        self.last_exit_code = None
+        self.restart_at = None
+        self.stats: Optional[Dict[str, Any]] = None
+
+
+class WorkerSupervisor:
+    def __init__(self, config: Dict[str, Any], workers: int):
+        self.config = config
+        self.workers = workers
+        self.logger = setup_logging()
+
+        workers_config = config.get("workers", {}) or {}
+        self.share_models = bool(workers_config.get("share_models", True))
+        self.stats_interval = float(workers_config.get("stats_interval", 5))
+        self.restart_backoff = float(workers_config.get("restart_backoff", 1))
+        self.max_restart_backoff = float(workers_config.get("max_restart_backoff", 30))
+
+        self._ctx = multiprocessing.get_context("fork")
+        self._stats_queue = self._ctx.Queue()
+        self._slots: List[_WorkerSlot] = [_WorkerSlot(i) for i in range(workers)]
+        self._shared_modules: Dict[str, Any] = {}
+        self._stopping = False
+        self._zygote: Optional[multiprocessing.Process] = None
+        self._zygote_conn = None
+        self._zygote_lost_logged = False
+
+    def start(self):
+        """预加载共享模型、启动孵化进程和所有 worker
+
+        需在启动事件循环、创建其他线程和连接之前调用，孵化进程从此时的主进程 fork 出来。
+        """
+        if self.share_models:
+            self._shared_modules = preload_shared_models(self.logger, self.config)
+            self.logger.bind(tag=TAG).info(
+                f"已预加载共享模型: {list(self._shared_modules.keys())}"
+            )
+        # 把已有对象移出GC跟踪，避免子进程GC扫描时修改对象头导致共享内存页被复制
+        gc.freeze()
+        self._zygote_conn, child_conn = self._ctx.Pipe()
+        self._zygote = self._ctx.Process(
+            target=_zygote_main,
+            args=(
+                child_conn,
+                self._zygote_conn,
+                self.config,
+                self._stats_queue,
+                self._shared_modules,
+                self.stats_interval,
+            ),
+            name="xiaozhi-worker-zygote",
+        )
+        self._zygote.start()
+        child_conn.close()
+        for slot in self._slots:
+            self._spawn(slot)
+
+    def _spawn(self, slot: _WorkerSlot):
+        if not self._zygote.is_alive():
+            if not self._zygote_lost_logged:
+                self._zygote_lost_logged = True
+                self.logger.bind(tag=TAG).error(
+                    f"worker 孵化进程已退出，退出码={self._zygote.exitcode}，无法再启动 worker"
+                )
+            return
+        self._zygote_conn.send(("spawn", slot.index))
+        pid = self._poll_zygote(wait_started=slot.index)
+        if pid is None:
+            self.logger.bind(tag=TAG).error(f"孵化进程未能启动 worker {slot.index}")
+            return
+        slot.process = _WorkerHandle(pid)
+        slot.started_at = time.time()
+        slot.restart_at = None
+        slot.stats = None
+        self.logger.bind(tag=TAG).info(f"启动 worker {slot.index}，pid={pid}")
+
+    def _poll_zygote(self, wait_started=None, timeout=5.0):
+        """处理孵化进程上报的消息；wait_started 不为空时等待该 worker 启动完成并返回其 pid"""
+        deadline = time.time() + timeout
+        while True:
+            wait = max(0.0, deadline - time.time()) if wait_started is not None else 0
+            try:
+                if not self._zygote_conn.poll(wait):
+                    return None
+                message = self._zygote_conn.recv()
+            except (EOFError, OSError):
+                return None
+            kind, index, pid, *rest = message
+            if kind == "started" and index == wait_started:
+                return pid
+            if kind == "exited":
+                slot = self._slots[index]
+                if slot.process is not None and slot.process.pid == pid:
+                    slot.process.exitcode = rest[0]
+
+    async def monitor(self):
+        """收集 worker 统计并重启异常退出的 worker"""
+        while True:
+            self._drain_stats()
+            self._poll_zygote()
+            if not self._stopping:
+                self._check_workers()
+            await asyncio.sleep(1)
+
+    def _drain_stats(self):
+        while True:
+            try:
+                stats = self._stats_queue.get_nowait()
+            except queue.Empty:
+                return
+            index = stats.get("worker")
+            if index is None or not 0 <= index < len(self._slots):
+                continue
+            slot = self._slots[index]
+            # 忽略已退出的旧进程残留在队列中的统计
+            if slot.process is not None and stats.get("pid") == slot.process.pid:
+                slot.stats = stats
+
+    def _check_workers(self):
+        now = time.time()
+        for slot in self._slots:
+            process = slot.process
+            if process is None or process.is_alive():
+                continue
+            if slot.restart_at is None:
+                slot.last_exit_code = process.exitcode
+                if now - slot.started_at >= _STABLE_RUN_SECONDS:
+                    slot.consecutive_failures = 0
+                slot.consecutive_failures += 1
+                backoff = min(
+                    self.restart_backoff * 2 ** (slot.consecutive_failures - 1),
+                    self.max_restart_backoff,
+                )
+                slot.restart_at = now + backoff
+                slot.stats = None
+                self.logger.bind(tag=TAG).error(
+                    f"worker {slot.index}(pid={process.pid}) 异常退出，退出码={process.exitcode}，"
+                    f"{backoff:.1f}秒后重启"
+                )
+            elif now >= slot.restart_at:
+                slot.restarts += 1
+                self._spawn(slot)
+
+    def stop(self, timeout: float = 5.0):
+        """通知所有 worker 退出，超时未退出的强制结束，最后停止孵化进程"""
+        self._stopping = True
+        processes = [
+            slot.process
+            for slot in self._slots
+            if slot.process is not None and slot.process.is_alive()
+        ]
+        for process in processes:
+            process.terminate()
+        deadline = time.time() + timeout
+        while any(p.is_alive() for p in processes) and time.time() < deadline:
+            if not self._zygote.is_alive():
+                break
+            self._poll_zygote(wait_started=-1, timeout=min(0.1, timeout))
+        for process in processes:
+            if process.is_alive():
+                self.logger.bind(tag=TAG).warning(
+                    f"worker pid={process.pid} 未在{timeout}秒内退出，强制结束"
+                )
+                process.kill()
+        if self._zygote is not None and self._zygote.is_alive():
+            try:
+                self._zygote_conn.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+            self._zygote.join(timeout)
+            if self._zygote.is_alive():
+                self._zygote.kill()
+                self._zygote.join(1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """汇总所有 worker 的统计"""
+        per_worker = []
+        total_connections = 0
+        total_rss = 0.0
+        executor_classes: Dict[str, Dict[str, int]] = {}
+        for slot in self._slots:
+            alive = slot.process is not None and slot.process.is_alive()
+            stats = slot.stats or {}
+            total_connections += stats.get("active_connections", 0)
+            total_rss += stats.get("rss_mb", 0)
+            for name, cls in stats.get("executor", {}).get("classes", {}).items():
+                merged = executor_classes.setdefault(
+                    name, {"running": 0, "queued": 0, "completed": 0, "failed": 0}
+                )
+                for key in merged:
+                    merged[key] += cls.get(key, 0)
+            per_worker.append(
+                {
+                    "worker": slot.index,
+                    "pid": slot.process.pid if slot.process else None,
+                    "alive": alive,
+                    "restarts": slot.restarts,
+                    "last_exit_code": slot.last_exit_code,
+                    "stats": slot.stats,
+                }
+            )
+        return {
+            "workers": self.workers,
+            "alive": sum(1 for w in per_worker if w["alive"]),
+            "shared_models": list(self._shared_modules.keys()),
+            "total": {
+                "active_connections": total_connections,
+                "rss_mb": round(total_rss, 1),
+                "executor": executor_classes,
+            },
+            "per_worker": per_worker,
+        }
@@ -0,0 +1,171 @@
+"""
+本地 ASR 跨连接批量识别性能测试
+
+模拟多个连接在随机时刻说完话（泊松到达），按给定速率（句/秒）把测试语音提交给共享的 FunASR 模型，对比：
+- serial：当前方式，每句在自己的线程中调用一次 generate，同时进行的句子在模型前争用
+- batched：经 ASRBatcher 在攒批窗口内合并为一次批量 generate
+
+对每个速率统计实际完成的句/秒和延迟（从提交到拿到文本）的 p50/p95，
+并给出 p95 不超过 --p95-ms 时各方式能承载的最高速率。
+
+用法：
+    python performance_tester_asr_batch.py --rates 1,2,4,8,16 --seconds 20 --p95-ms 800
+    python performance_tester_asr_batch.py --window-ms 10,20,50 --max-batch 8 --json asr_batch.json
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import numpy as np
+from tabulate import tabulate
+
+from performance_tester_vad import expand_paths, percentile, read_wav
+
+
+def load_utterances(paths: List[str]) -> List[np.ndarray]:
+    return [read_wav(path) for path in expand_paths(paths, "*.wav")]
+
+
+async def run_load(transcribe, utterances, rate: float, seconds: float, seed=0):
+    """按泊松过程以 rate 句/秒提交，返回 (各句延迟, 实际耗时)"""
+    rng = random.Random(seed)
+    latencies = []
+
+    async def one(samples, submit_time):
+        await transcribe(samples)
+        latencies.append(time.perf_counter() - submit_time)
+
+    tasks = []
+    start = time.perf_counter()
+    next_time = start
+    index = 0
+    while next_time - start < seconds:
+        await asyncio.sleep(max(0, next_time - time.perf_counter()))
+        samples = utterances[index % len(utterances)]
+        index += 1
+        tasks.append(asyncio.create_task(one(samples, next_time)))
+        next_time += rng.expovariate(rate)
+    await asyncio.gather(*tasks)
+    return latencies, time.perf_counter() - start
+
+
+def measure(mode, transcribe, utterances, rate, seconds) -> Dict[str, Any]:
+    latencies, wall = asyncio.run(run_load(transcribe, utterances, rate, seconds))
+    return {
+        "mode": mode,
+        "rate": rate,
+        "utterances": len(latencies),
+        "throughput": len(latencies) / wall if wall > 0 else 0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 ASR 跨连接批量识别性能测试")
+    parser.add_argument("--asr", default="FunASR", help="ASR 配置名（type 为 fun_local）")
+    parser.add_argument("--wav", nargs="*", default=["config/assets"], help="测试语音 wav 文件或目录")
+    parser.add_argument("--rates", default="1,2,4,8,16", help="提交速率（句/秒），逗号分隔")
+    parser.add_argument("--seconds", type=float, default=20, help="每个速率的测试时长(秒)")
+    parser.add_argument("--window-ms", default="20", help="攒批窗口(毫秒)，逗号分隔可测试多个取值")
+    parser.add_argument("--max-batch", type=int, default=8, help="单次推理最多合并的语句数")
+    parser.add_argument("--workers", type=int, default=16, help="serial 方式同时识别的线程数")
+    parser.add_argument("--p95-ms", type=float, default=800, help="比较承载能力时的 p95 延迟上限(毫秒)")
+    parser.add_argument("--json", default="", help="结果输出的 JSON 文件路径")
+    args = parser.parse_args()
+
+    from config.settings import load_config
+    from core.utils.asr import create_instance
+    from core.utils.asr_batcher import ASRBatcher
+
+    config = load_config()
+    asr_config = dict(config["ASR"][args.asr])
+    asr_config["batch_enabled"] = False
+    asr = create_instance(asr_config.get("type", args.asr), asr_config, True)
+    utterances = load_utterances(args.wav)
+    if not utterances:
+        print("没有找到测试语音")
+        return 1
+    # 预热，避免首次推理的初始化耗时计入结果
+    asr.transcribe(utterances[0])
+
+    rates = [float(r) for r in args.rates.split(",") if r.strip()]
+    pool = ThreadPoolExecutor(max_workers=args.workers)
+
+    async def serial(samples):
+        return await asyncio.get_running_loop().run_in_executor(
+            pool, asr.transcribe, samples
+        )
+
+    modes = [("serial", serial)]
+    for window_ms in [float(w) for w in args.window_ms.split(",") if w.strip()]:
+        batcher = ASRBatcher(
+            asr._transcribe_batch, args.max_batch, window_ms, name=f"bench{window_ms:g}"
+        )
+        modes.append((f"batched({window_ms:g}ms)", batcher.infer))
+
+    results = []
+    for mode, transcribe in modes:
+        for rate in rates:
+            result = measure(mode, transcribe, utterances, rate, args.seconds)
+            results.append(result)
+            print(
+                f"{mode} {rate:g}句/秒: 完成 {result['throughput']:.2f}句/秒, "
+                f"p95 {result['p95_ms']:.0f}ms"
+            )
+
+    print(
+        tabulate(
+            [
+                [
+                    r["mode"],
+                    f"{r['rate']:g}",
+                    r["utterances"],
+                    f"{r['throughput']:.2f}",
+                    f"{r['p50_ms']:.0f}",
+                    f"{r['p95_ms']:.0f}",
+                ]
+                for r in results
+            ],
+            headers=["方式", "提交速率(句/秒)", "句数", "完成(句/秒)", "p50(ms)", "p95(ms)"],
+            tablefmt="github",
+        )
+    )
+
+    capacity = {}
+    for mode, _ in modes:
+        ok = [
+            r["throughput"]
+            for r in results
+            if r["mode"] == mode and r["p95_ms"] <= args.p95_ms
+        ]
+        capacity[mode] = max(ok) if ok else 0
+    print(f"\np95 ≤ {args.p95_ms:g}ms 时的最高吞吐（句/秒）：")
+    print(
+        tabulate(
+            [[mode, f"{value:.2f}"] for mode, value in capacity.items()],
+            headers=["方式", "句/秒"],
+            tablefmt="github",
+        )
+    )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {"timestamp": time.time(), "results": results, "capacity": capacity},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        print(f"\n结果已写入 {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+本地 ASR 进程池对音频发送节奏的影响测试
+
+模拟 N 个正在播放的会话，每个会话按 sendAudioHandle 的方式每 60ms 发送一帧（按累计播放位置计算下次发送时刻），
+同时以固定速率提交整句识别，对比三种情况下发送时刻的抖动（实际唤醒时刻相对目标时刻的延迟）：
+- idle：没有识别负载，作为基准
+- inprocess：当前方式，识别在服务进程的线程中进行，与事件循环争用 GIL
+- process：识别在独立的进程池中进行（process_workers），服务进程只负责写共享内存和等待结果
+
+统计发送抖动的 p50/p99/最大值（毫秒）、超过一帧（60ms）的迟到次数，以及识别延迟的 p50/p95。
+
+用法：
+    python performance_tester_asr_pool.py --sessions 50 --asr-rate 4 --seconds 20
+    python performance_tester_asr_pool.py --asr SherpaASR --workers 4 --json asr_pool.json
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from tabulate import tabulate
+
+from performance_tester_vad import expand_paths, percentile, read_wav
+
+FRAME_SECONDS = 0.06
+
+
+async def session_sender(stop_time: float, lateness: List[float]):
+    """与 sendAudioHandle 一致：按累计播放位置计算每帧的目标发送时刻"""
+    start = time.perf_counter()
+    position = 0.0
+    frame = bytes(120)
+    while True:
+        target = start + position
+        now = time.perf_counter()
+        if now > stop_time:
+            break
+        if target > now:
+            await asyncio.sleep(target - now)
+        lateness.append(max(0.0, time.perf_counter() - target))
+        bytes(frame)  # 模拟发送一帧的开销
+        position += FRAME_SECONDS
+
+
+async def asr_load(transcribe, utterances, rate: float, stop_time: float, latencies):
+    tasks = []
+
+    async def one(samples):
+        start = time.perf_counter()
+        await transcribe(samples)
+        latencies.append(time.perf_counter() - start)
+
+    index = 0
+    while time.perf_counter() < stop_time:
+        tasks.append(asyncio.create_task(one(utterances[index % len(utterances)])))
+        index += 1
+        await asyncio.sleep(1 / rate)
+    await asyncio.gather(*tasks)
+
+
+async def run_case(mode, transcribe, utterances, args) -> Dict[str, Any]:
+    lateness: List[float] = []
+    asr_latencies: List[float] = []
+    stop_time = time.perf_counter() + args.seconds
+    jobs = [session_sender(stop_time, lateness) for _ in range(args.sessions)]
+    if transcribe is not None:
+        jobs.append(asr_load(transcribe, utterances, args.asr_rate, stop_time, asr_latencies))
+    await asyncio.gather(*jobs)
+    return {
+        "mode": mode,
+        "frames": len(lateness),
+        "jitter_p50_ms": percentile(lateness, 50) * 1000,
+        "jitter_p99_ms": percentile(lateness, 99) * 1000,
+        "jitter_max_ms": max(lateness) * 1000 if lateness else 0,
+        "late_frames": sum(1 for v in lateness if v > FRAME_SECONDS),
+        "asr_utterances": len(asr_latencies),
+        "asr_p50_ms": percentile(asr_latencies, 50) * 1000,
+        "asr_p95_ms": percentile(asr_latencies, 95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 ASR 进程池对音频发送节奏的影响测试")
+    parser.add_argument("--asr", default="FunASR", help="本地 ASR 配置名")
+    parser.add_argument("--wav", nargs="*", default=["config/assets"], help="测试语音 wav 文件或目录")
+    parser.add_argument("--sessions", type=int, default=50, help="同时播放的会话数")
+    parser.add_argument("--asr-rate", type=float, default=4, help="提交识别的速率（句/秒）")
+    parser.add_argument("--seconds", type=float, default=20, help="每种情况的测试时长(秒)")
+    parser.add_argument("--workers", type=int, default=2, help="process 方式的进程数")
+    parser.add_argument("--modes", default="idle,inprocess,process", help="测试的情况，逗号分隔")
+    parser.add_argument("--json", default="", help="结果输出的 JSON 文件路径")
+    args = parser.parse_args()
+
+    from config.settings import load_config
+    from core.utils.asr import create_instance
+
+    config = load_config()
+    asr_config = dict(config["ASR"][args.asr])
+    asr_type = asr_config.get("type", args.asr)
+    asr_config["batch_enabled"] = False
+    utterances = [read_wav(path) for path in expand_paths(args.wav, "*.wav")]
+    if not utterances:
+        print("没有找到测试语音")
+        return 1
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    transcribers = {"idle": None}
+    if "inprocess" in modes:
+        asr = create_instance(asr_type, dict(asr_config, process_workers=0), True)
+        asr.transcribe(utterances[0])
+        # 与 handle_voice_stop 一致：每句在单独的线程中识别
+        pool = ThreadPoolExecutor(max_workers=16)
+
+        async def inprocess(samples):
+            return await asyncio.get_running_loop().run_in_executor(
+                pool, asr.transcribe, samples
+            )
+
+        transcribers["inprocess"] = inprocess
+    if "process" in modes:
+        pooled = create_instance(
+            asr_type, dict(asr_config, process_workers=args.workers), True
+        )
+        # 等待各进程加载完模型
+        for _ in range(args.workers):
+            pooled.transcribe(utterances[0])
+        transcribers["process"] = pooled.transcribe_async
+
+    results = []
+    for mode in modes:
+        result = asyncio.run(run_case(mode, transcribers[mode], utterances, args))
+        results.append(result)
+        print(f"{mode}: 发送抖动 p99 {result['jitter_p99_ms']:.1f}ms")
+
+    print(
+        tabulate(
+            [
+                [
+                    r["mode"],
+                    r["frames"],
+                    f"{r['jitter_p50_ms']:.1f}",
+                    f"{r['jitter_p99_ms']:.1f}",
+                    f"{r['jitter_max_ms']:.1f}",
+                    r["late_frames"],
+                    r["asr_utterances"],
+                    f"{r['asr_p50_ms']:.0f}",
+                    f"{r['asr_p95_ms']:.0f}",
+                ]
+                for r in results
+            ],
+            headers=[
+                "情况",
+                "发送帧数",
+                "抖动p50(ms)",
+                "抖动p99(ms)",
+                "抖动最大(ms)",
+                "迟到>60ms",
+                "识别句数",
+                "识别p50(ms)",
+                "识别p95(ms)",
+            ],
+            tablefmt="github",
+        )
+    )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {"timestamp": time.time(), "results": results},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        print(f"\n结果已写入 {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+流式 ASR 预热会话池测试
+
+在本地启动一个模拟火山引擎流式识别协议的 WebSocket 服务（握手和初始化响应按给定时延返回），
+用 DoubaoStreamASR 自身的建连和初始化代码，对比语音开始到可以发送第一帧音频的耗时：
+- cold：当前方式，每句话现场建立连接并完成初始化
+- pooled：从预热会话池租用已完成初始化的会话，识别结束后关闭，由会话池在后台补充
+
+每句话发送若干帧音频和结束包，等待最终结果后释放会话，句与句之间间隔 --gap-ms。
+统计租用耗时和整句（从语音开始到拿到最终结果）耗时的 p50/p99，以及预热会话的命中次数。
+
+用法：
+    python performance_tester_asr_ws_pool.py --utterances 50 --handshake-ms 120 --rtt-ms 40
+    python performance_tester_asr_ws_pool.py --sessions 10 --pool-size 4 --json ws_pool.json
+"""
+
+import sys
+import json
+import gzip
+import time
+import asyncio
+import argparse
+from typing import Any, Dict, List
+
+import websockets
+from tabulate import tabulate
+
+from performance_tester_vad import percentile
+
+FRAMES_PER_UTTERANCE = 10
+
+
+def _server_message(payload: dict) -> bytes:
+    # 与 parse_response 对应：4 字节头 + 8 字节序号和长度 + JSON
+    body = json.dumps(payload).encode("utf-8")
+    return bytes([0x11, 0x90, 0x10, 0x00]) + bytes(4) + len(body).to_bytes(4, "big") + body
+
+
+async def stand_in_server(host, port, handshake_ms, rtt_ms):
+    """模拟流式识别服务：握手延迟 handshake_ms，初始化与最终结果各延迟 rtt_ms"""
+
+    async def process_request(*args):
+        await asyncio.sleep(handshake_ms / 1000)
+        return None
+
+    async def handler(ws, *args):
+        try:
+            await ws.recv()
+            await asyncio.sleep(rtt_ms / 1000)
+            await ws.send(_server_message({"result": {}}))
+            async for message in ws:
+                # 结束包的 message_type_specific_flags 为 0x02
+                if message[1] & 0x0F == 0x02:
+                    await asyncio.sleep(rtt_ms / 1000)
+                    await ws.send(
+                        _server_message(
+                            {"result": {"utterances": [{"text": "测试", "definite": True}]}}
+                        )
+                    )
+        except websockets.ConnectionClosed:
+            pass
+
+    return await websockets.serve(
+        handler, host, port, process_request=process_request
+    )
+
+
+async def one_utterance(asr, frame: bytes, lease_times, total_times):
+    start = time.perf_counter()
+    ws = await asr._acquire_session()
+    lease_times.append(time.perf_counter() - start)
+    try:
+        payload = gzip.compress(frame)
+        for i in range(FRAMES_PER_UTTERANCE):
+            last = i == FRAMES_PER_UTTERANCE - 1
+            header = (
+                asr.generate_last_audio_default_header()
+                if last
+                else asr.generate_audio_default_header()
+            )
+            request = bytearray(header)
+            request.extend(len(payload).to_bytes(4, "big"))
+            request.extend(payload)
+            await ws.send(request)
+        asr.parse_response(await ws.recv())
+        total_times.append(time.perf_counter() - start)
+    finally:
+        await asr._release_session(ws)
+
+
+async def run_case(mode, args, url) -> Dict[str, Any]:
+    from core.utils.asr import create_instance
+    from core.utils.metrics import get_metrics_registry
+
+    config = {
+        "type": "doubao_stream",
+        "appid": f"bench-{mode}",
+        "access_token": "bench",
+        "cluster": "bench",
+        "session_pool_size": args.pool_size if mode == "pooled" else 0,
+        "session_max_idle_s": args.max_idle_s,
+        "ws_url": url,
+    }
+    asrs = [create_instance("doubao_stream", config, True) for _ in range(args.sessions)]
+    frame = bytes(1920)
+    lease_times: List[float] = []
+    total_times: List[float] = []
+
+    if mode == "pooled":
+        # 第一次租用触发预热，等待会话池补满后再开始统计
+        await one_utterance(asrs[0], frame, [], [])
+        await asyncio.sleep(args.handshake_ms / 1000 + args.rtt_ms / 1000 + 0.2)
+
+    async def session(asr):
+        for _ in range(args.utterances):
+            await one_utterance(asr, frame, lease_times, total_times)
+            await asyncio.sleep(args.gap_ms / 1000)
+
+    await asyncio.gather(*(session(asr) for asr in asrs))
+    if asrs[0].session_pool:
+        await asrs[0].session_pool.close()
+
+    leases = get_metrics_registry().counter(
+        "xiaozhi_ws_pool_leases_total", "", ("pool", "result")
+    )
+    return {
+        "mode": mode,
+        "utterances": len(total_times),
+        "lease_p50_ms": percentile(lease_times, 50) * 1000,
+        "lease_p99_ms": percentile(lease_times, 99) * 1000,
+        "total_p50_ms": percentile(total_times, 50) * 1000,
+        "total_p99_ms": percentile(total_times, 99) * 1000,
+        "warm_leases": int(leases.value(f"doubao_stream:bench-{mode}", "warm")),
+    }
+
+
+async def run(args) -> List[Dict[str, Any]]:
+    server = await stand_in_server("127.0.0.1", args.port, args.handshake_ms, args.rtt_ms)
+    url = f"ws://127.0.0.1:{args.port}"
+    try:
+        return [
+            await run_case(mode, args, url)
+            for mode in [m.strip() for m in args.modes.split(",") if m.strip()]
+        ]
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式 ASR 预热会话池测试")
+    parser.add_argument("--utterances", type=int, default=50, help="每个会话说的句数")
+    parser.add_argument("--sessions", type=int, default=1, help="同时说话的会话数")
+    parser.add_argument("--gap-ms", type=float, default=500, help="句与句之间的间隔(毫秒)")
+    parser.add_argument("--handshake-ms", type=float, default=120, help="模拟的 TLS+WebSocket 握手耗时(毫秒)")
+    parser.add_argument("--rtt-ms", type=float, default=40, help="模拟的请求往返耗时(毫秒)")
+    parser.add_argument("--pool-size", type=int, default=2, help="pooled 方式的预热会话数")
+    parser.add_argument("--max-idle-s", type=float, default=15, help="预热会话最长空闲时间(秒)")
+    parser.add_argument("--port", type=int, default=18765, help="本地模拟服务端口")
+    parser.add_argument("--modes", default="cold,pooled", help="测试的方式，逗号分隔")
+    parser.add_argument("--json", default="", help="结果输出的 JSON 文件路径")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(
+        tabulate(
+            [
+                [
+                    r["mode"],
+                    r["utterances"],
+                    f"{r['lease_p50_ms']:.1f}",
+                    f"{r['lease_p99_ms']:.1f}",
+                    f"{r['total_p50_ms']:.1f}",
+                    f"{r['total_p99_ms']:.1f}",
+                    r["warm_leases"],
+                ]
+                for r in results
+            ],
+            headers=[
+                "方式",
+                "句数",
+                "租用p50(ms)",
+                "租用p99(ms)",
+                "整句p50(ms)",
+                "整句p99(ms)",
+                "预热命中",
+            ],
+            tablefmt="github",
+        )
+    )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {"timestamp": time.time(), "results": results},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        print(f"\n结果已写入 {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
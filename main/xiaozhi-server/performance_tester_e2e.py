@@ -0,0 +1,535 @@
+"""
+端到端压力测试：模拟 N 台 ESP32 设备同时对话
+
+每台模拟设备与真实固件走同样的协议：
+1. 建立 WebSocket 连接（携带 device-id / client-id / Protocol-Version 请求头）
+2. 发送 hello，等待服务端返回 hello
+3. 每轮对话发送 listen start，按实时节奏（60ms/帧）推送 opus 音频，
+   manual 模式下推送完毕后发送 listen stop；auto 模式下继续推送静音，由服务端 VAD 判断说话结束
+4. 接收服务端下发的 tts 消息与 opus 音频帧，直到收到 tts stop
+
+测试音频取自 config/assets 下的 wav 文件，启动时用 pcm_to_data 统一编码一次，所有设备共用。
+
+统计指标（每轮）：
+- 首帧延迟：说话结束（最后一帧语音发出）到收到第一帧音频
+- 卡顿：按设备实际播放模型（收到首帧后开始播放，每帧 60ms）计算，
+  某帧到达时上一帧已播完即为一次卡顿，累计等待时长为卡顿时长
+- 抖动：RFC 3550 到达间隔抖动，以 60ms 为标称帧间隔
+输出 p50/p95/p99 表格，可选输出 JSON 供 CI 记录性能趋势。
+
+用法：
+    python performance_tester_e2e.py --devices 50 --turns 3
+    python performance_tester_e2e.py --url ws://127.0.0.1:8000/xiaozhi/v1/ --devices 200 \\
+        --ramp 20 --duration 120 --mode auto --json e2e_result.json
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from typing import Any, Dict, List, Optional
+
+import websockets
+from pydub import AudioSegment
+from tabulate import tabulate
+
+from core.utils.util import pcm_to_data
+
+FRAME_DURATION_MS = 60
+FRAME_INTERVAL = FRAME_DURATION_MS / 1000
+SAMPLE_RATE = 16000
+PERCENTILES = (50, 95, 99)
+
+
+class TurnStatus:
+    COMPLETED = "completed"  # 收到 tts stop（或音频播完后长时间无新消息）
+    NO_AUDIO = "no_audio"  # 本轮结束但没有收到音频（如识别为空）
+    BUSY = "busy"  # 服务端返回繁忙
+    TIMEOUT = "timeout"  # 超时未结束
+    CLOSED = "closed"  # 本轮进行中连接被关闭
+
+
+class Utterance:
+    def __init__(self, name: str, frames: List[bytes]):
+        self.name = name
+        self.frames = frames
+        self.duration_ms = len(frames) * FRAME_DURATION_MS
+
+
+def load_corpus(wav_dir: str, silence_ms: int):
+    """读取测试音频并编码为 opus 帧（只编码一次），同时生成静音帧"""
+    utterances = []
+    for file_name in sorted(os.listdir(wav_dir)):
+        if not file_name.lower().endswith(".wav"):
+            continue
+        audio = AudioSegment.from_file(
+            os.path.join(wav_dir, file_name), format="wav", parameters=["-nostdin"]
+        )
+        audio = audio.set_channels(1).set_frame_rate(SAMPLE_RATE).set_sample_width(2)
+        utterances.append(Utterance(file_name, pcm_to_data(audio.raw_data)))
+    silence_samples = SAMPLE_RATE * silence_ms // 1000
+    silence_frames = pcm_to_data(b"\x00" * silence_samples * 2)
+    return utterances, silence_frames
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class TurnState:
+    def __init__(self, index: int, utterance: Utterance):
+        self.index = index
+        self.utterance = utterance
+        self.status = None
+        self.eos_at: Optional[float] = None
+        self.stt_at: Optional[float] = None
+        self.tts_start_at: Optional[float] = None
+        self.frame_arrivals: List[float] = []
+        self.sentences_started = 0
+        self.sentences_ended = 0
+        self.last_activity = time.perf_counter()
+        self.done = asyncio.Event()
+
+    def finish(self, status: str):
+        if self.status is None:
+            self.status = status
+        self.done.set()
+
+    def playout(self, gap_threshold_ms: float):
+        """按设备播放节奏计算卡顿次数和卡顿总时长（毫秒）"""
+        gaps = 0
+        stall_ms = 0.0
+        play_clock = None
+        for arrival in self.frame_arrivals:
+            if play_clock is None:
+                play_clock = arrival
+            late_ms = (arrival - play_clock) * 1000
+            if late_ms > gap_threshold_ms:
+                gaps += 1
+                stall_ms += late_ms
+            play_clock = max(play_clock, arrival) + FRAME_INTERVAL
+        return gaps, stall_ms
+
+    def jitter_ms(self) -> float:
+        """RFC 3550 到达间隔抖动，标称帧间隔为 60ms"""
+        jitter = 0.0
+        for previous, current in zip(self.frame_arrivals, self.frame_arrivals[1:]):
+            d = abs((current - previous) - FRAME_INTERVAL) * 1000
+            jitter += (d - jitter) / 16
+        return jitter
+
+    def to_record(self, gap_threshold_ms: float) -> Dict[str, Any]:
+        record = {
+            "turn": self.index,
+            "utterance": self.utterance.name,
+            "status": self.status,
+            "frames": len(self.frame_arrivals),
+        }
+        if self.eos_at is None:
+            return record
+        if self.stt_at is not None:
+            record["stt_ms"] = (self.stt_at - self.eos_at) * 1000
+        if self.frame_arrivals:
+            gaps, stall_ms = self.playout(gap_threshold_ms)
+            intervals = [
+                (b - a) * 1000
+                for a, b in zip(self.frame_arrivals, self.frame_arrivals[1:])
+            ]
+            record.update(
+                {
+                    "first_audio_ms": (self.frame_arrivals[0] - self.eos_at) * 1000,
+                    "turn_total_ms": (self.frame_arrivals[-1] - self.eos_at) * 1000,
+                    "audio_ms": len(self.frame_arrivals) * FRAME_DURATION_MS,
+                    "gaps": gaps,
+                    "stall_ms": stall_ms,
+                    "jitter_ms": self.jitter_ms(),
+                    "max_interval_ms": max(intervals) if intervals else 0,
+                }
+            )
+        return record
+
+
+class DeviceSession:
+    def __init__(self, index: int, args, utterances, silence_frames):
+        self.index = index
+        self.args = args
+        self.utterances = utterances
+        self.silence_frames = silence_frames
+        self.device_id = "02:00:00:{:02x}:{:02x}:{:02x}".format(
+            (index >> 16) & 0xFF, (index >> 8) & 0xFF, index & 0xFF
+        )
+        self.client_id = str(uuid.uuid4())
+        self.websocket = None
+        self.turn: Optional[TurnState] = None
+        self.hello_received = asyncio.Event()
+        self.connect_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.rejected = False
+        self.records: List[Dict[str, Any]] = []
+
+    async def run(self, deadline: float):
+        args = self.args
+        headers = {
+            "device-id": self.device_id,
+            "client-id": self.client_id,
+            "Protocol-Version": "1",
+        }
+        if args.token:
+            headers["Authorization"] = f"Bearer {args.token}"
+        url = f"{args.url}?device-id={self.device_id}&client-id={self.client_id}"
+
+        started = time.perf_counter()
+        try:
+            async with websockets.connect(
+                url,
+                additional_headers=headers,
+                user_agent_header="xiaozhi-loadtest/1.0",
+                max_size=None,
+                open_timeout=args.connect_timeout,
+            ) as websocket:
+                self.websocket = websocket
+                reader = asyncio.create_task(self._reader())
+                try:
+                    await self._hello()
+                    self.connect_ms = (time.perf_counter() - started) * 1000
+                    await self._run_turns(deadline)
+                finally:
+                    reader.cancel()
+        except websockets.exceptions.InvalidStatus as e:
+            # 准入控制在握手阶段返回 503
+            self.rejected = e.response.status_code == 503
+            self.error = f"HTTP {e.response.status_code}"
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            if self.turn is not None:
+                self._end_turn(TurnStatus.CLOSED)
+
+    async def _hello(self):
+        await self.websocket.send(
+            json.dumps(
+                {
+                    "type": "hello",
+                    "version": 1,
+                    "transport": "websocket",
+                    "features": {},
+                    "audio_params": {
+                        "format": "opus",
+                        "sample_rate": SAMPLE_RATE,
+                        "channels": 1,
+                        "frame_duration": FRAME_DURATION_MS,
+                    },
+                }
+            )
+        )
+        await asyncio.wait_for(self.hello_received.wait(), self.args.connect_timeout)
+
+    async def _reader(self):
+        try:
+            async for message in self.websocket:
+                now = time.perf_counter()
+                turn = self.turn
+                if isinstance(message, bytes):
+                    # 只统计说话结束之后收到的音频
+                    if turn is not None and turn.eos_at is not None:
+                        turn.frame_arrivals.append(now)
+                        turn.last_activity = now
+                    continue
+                try:
+                    msg = json.loads(message)
+                except ValueError:
+                    continue
+                if not isinstance(msg, dict):
+                    continue
+                msg_type = msg.get("type")
+                if msg_type == "hello":
+                    self.hello_received.set()
+                if turn is None:
+                    continue
+                turn.last_activity = now
+                if msg_type == "stt" and turn.stt_at is None:
+                    turn.stt_at = now
+                elif msg_type == "tts":
+                    state = msg.get("state")
+                    if state == "start" and turn.tts_start_at is None:
+                        turn.tts_start_at = now
+                    elif state == "sentence_start":
+                        turn.sentences_started += 1
+                    elif state == "sentence_end":
+                        turn.sentences_ended += 1
+                    elif state == "stop":
+                        turn.finish(
+                            TurnStatus.COMPLETED
+                            if turn.frame_arrivals
+                            else TurnStatus.NO_AUDIO
+                        )
+                elif msg_type == "server":
+                    content = msg.get("content") or {}
+                    if content.get("action") == "busy":
+                        turn.finish(TurnStatus.BUSY)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            if self.turn is not None:
+                self.turn.finish(TurnStatus.CLOSED)
+
+    async def _send_listen(self, state: str):
+        await self.websocket.send(
+            json.dumps({"type": "listen", "state": state, "mode": self.args.mode})
+        )
+
+    async def _stream(self, frames, next_tick: float, stop_when=None) -> float:
+        """按实时节奏推送音频帧，返回下一帧的发送时刻"""
+        for frame in frames:
+            if stop_when is not None and stop_when():
+                break
+            await asyncio.sleep(max(0, next_tick - time.perf_counter()))
+            await self.websocket.send(frame)
+            next_tick += FRAME_INTERVAL
+        return next_tick
+
+    async def _run_turns(self, deadline: float):
+        args = self.args
+        index = 0
+        while (args.turns <= 0 or index < args.turns) and time.perf_counter() < deadline:
+            utterance = self.utterances[(self.index + index) % len(self.utterances)]
+            turn = TurnState(index, utterance)
+            self.turn = turn
+
+            await self._send_listen("start")
+            next_tick = await self._stream(utterance.frames, time.perf_counter())
+            if args.mode == "manual":
+                await asyncio.sleep(max(0, next_tick - time.perf_counter()))
+                await self._send_listen("stop")
+                turn.eos_at = time.perf_counter()
+            else:
+                # 最后一帧语音播放完毕即为说话结束，之后像真实麦克风一样持续推送静音直到服务端开始回复
+                turn.eos_at = next_tick
+                await self._stream(
+                    self.silence_frames,
+                    next_tick,
+                    stop_when=lambda: turn.tts_start_at is not None or turn.done.is_set(),
+                )
+
+            await self._wait_turn(turn)
+            self._end_turn(turn.status)
+            if turn.status == TurnStatus.CLOSED:
+                return
+            index += 1
+            if args.think_time > 0:
+                await asyncio.sleep(args.think_time)
+
+    async def _wait_turn(self, turn: TurnState):
+        args = self.args
+        turn_deadline = turn.eos_at + args.turn_timeout
+        while not turn.done.is_set():
+            now = time.perf_counter()
+            if now >= turn_deadline:
+                turn.finish(TurnStatus.TIMEOUT)
+                break
+            # 最后一句没有音频时服务端不会发送 tts stop，音频播完后长时间无新消息视为本轮结束
+            if (
+                turn.frame_arrivals
+                and turn.sentences_ended >= turn.sentences_started
+                and now - turn.last_activity >= args.idle_timeout
+            ):
+                turn.finish(TurnStatus.COMPLETED)
+                break
+            try:
+                await asyncio.wait_for(turn.done.wait(), 0.2)
+            except asyncio.TimeoutError:
+                pass
+
+    def _end_turn(self, status: str):
+        turn = self.turn
+        self.turn = None
+        turn.finish(status)
+        record = turn.to_record(self.args.gap_threshold)
+        record["device"] = self.index
+        self.records.append(record)
+
+
+METRICS = (
+    ("first_audio_ms", "首帧延迟(ms)"),
+    ("stt_ms", "识别结果延迟(ms)"),
+    ("turn_total_ms", "末帧延迟(ms)"),
+    ("stall_ms", "卡顿时长(ms)"),
+    ("gaps", "卡顿次数"),
+    ("jitter_ms", "抖动(ms)"),
+    ("max_interval_ms", "最大帧间隔(ms)"),
+)
+
+
+def summarize(sessions: List[DeviceSession], wall_s: float) -> Dict[str, Any]:
+    records = [r for s in sessions for r in s.records]
+    status_counts: Dict[str, int] = {}
+    for record in records:
+        status_counts[record["status"]] = status_counts.get(record["status"], 0) + 1
+    connect_ms = [s.connect_ms for s in sessions if s.connect_ms is not None]
+
+    metrics = {}
+    for key, _ in METRICS + (("connect_ms", None),):
+        if key == "connect_ms":
+            values = connect_ms
+        else:
+            values = [r[key] for r in records if key in r]
+        metrics[key] = {
+            "count": len(values),
+            "mean": round(sum(values) / len(values), 2) if values else 0,
+            "max": round(max(values), 2) if values else 0,
+        }
+        for p in PERCENTILES:
+            metrics[key][f"p{p}"] = round(percentile(values, p), 2)
+
+    errors: Dict[str, int] = {}
+    for session in sessions:
+        if session.error:
+            errors[session.error] = errors.get(session.error, 0) + 1
+
+    return {
+        "wall_s": round(wall_s, 2),
+        "devices": len(sessions),
+        "connected": len(connect_ms),
+        "rejected": sum(1 for s in sessions if s.rejected),
+        "turns": len(records),
+        "turn_status": status_counts,
+        "metrics": metrics,
+        "errors": dict(sorted(errors.items(), key=lambda item: -item[1])[:10]),
+    }
+
+
+def print_summary(summary: Dict[str, Any]):
+    status = summary["turn_status"]
+    overview = [
+        ["设备数", summary["devices"]],
+        ["连接成功", summary["connected"]],
+        ["握手被拒(503)", summary["rejected"]],
+        ["对话轮次", summary["turns"]],
+        ["完成", status.get(TurnStatus.COMPLETED, 0)],
+        ["无音频", status.get(TurnStatus.NO_AUDIO, 0)],
+        ["服务繁忙", status.get(TurnStatus.BUSY, 0)],
+        ["超时", status.get(TurnStatus.TIMEOUT, 0)],
+        ["连接中断", status.get(TurnStatus.CLOSED, 0)],
+        ["测试时长(s)", summary["wall_s"]],
+    ]
+    print(tabulate(overview, headers=["项目", "值"], tablefmt="github"))
+    print()
+
+    headers = ["指标", "样本数"] + [f"p{p}" for p in PERCENTILES] + ["最大", "平均"]
+    rows = []
+    for key, title in METRICS + (("connect_ms", "连接+hello(ms)"),):
+        m = summary["metrics"][key]
+        rows.append(
+            [title, m["count"]]
+            + [f"{m[f'p{p}']:.1f}" for p in PERCENTILES]
+            + [f"{m['max']:.1f}", f"{m['mean']:.1f}"]
+        )
+    print(tabulate(rows, headers=headers, tablefmt="github"))
+
+    if summary["errors"]:
+        print("\n连接错误：")
+        for error, count in summary["errors"].items():
+            print(f"  {count} × {error}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="端到端压力测试：模拟多台设备同时对话")
+    parser.add_argument(
+        "--url", default="ws://127.0.0.1:8000/xiaozhi/v1/", help="WebSocket 地址"
+    )
+    parser.add_argument("--devices", type=int, default=10, help="模拟设备数")
+    parser.add_argument(
+        "--turns", type=int, default=3, help="每台设备的对话轮数，0 表示直到 --duration 结束"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=0, help="最长测试时长(秒)，0 表示不限制"
+    )
+    parser.add_argument("--ramp", type=float, default=0, help="所有设备在多少秒内逐步接入")
+    parser.add_argument(
+        "--mode",
+        choices=["manual", "auto"],
+        default="manual",
+        help="拾音模式：manual 由设备发送 listen stop，auto 由服务端 VAD 判断说话结束",
+    )
+    parser.add_argument("--wav-dir", default="config/assets", help="测试音频目录")
+    parser.add_argument(
+        "--silence-ms", type=int, default=3000, help="auto 模式下语音后最多推送的静音时长"
+    )
+    parser.add_argument("--think-time", type=float, default=1.0, help="两轮对话之间的间隔(秒)")
+    parser.add_argument("--turn-timeout", type=float, default=30, help="单轮超时时间(秒)")
+    parser.add_argument(
+        "--idle-timeout", type=float, default=3, help="音频播完后无新消息多久视为本轮结束(秒)"
+    )
+    parser.add_argument(
+        "--gap-threshold", type=float, default=20, help="音频帧晚到超过多少毫秒计为一次卡顿"
+    )
+    parser.add_argument("--connect-timeout", type=float, default=10, help="连接与hello超时(秒)")
+    parser.add_argument("--token", default="", help="开启鉴权时使用的 Bearer token")
+    parser.add_argument("--json", default="", help="结果输出的 JSON 文件路径")
+    parser.add_argument(
+        "--json-turns", action="store_true", help="JSON 中包含每一轮的明细"
+    )
+    args = parser.parse_args()
+
+    utterances, silence_frames = load_corpus(args.wav_dir, args.silence_ms)
+    if not utterances:
+        print(f"{args.wav_dir} 下没有 wav 文件")
+        return 1
+    print(
+        f"▶ 已编码 {len(utterances)} 段测试音频："
+        + "，".join(f"{u.name}({u.duration_ms}ms)" for u in utterances)
+    )
+    print(f"▶ {args.devices} 台设备，{args.mode} 模式，连接 {args.url} ...")
+
+    sessions = [
+        DeviceSession(i, args, utterances, silence_frames) for i in range(args.devices)
+    ]
+    started = time.perf_counter()
+    deadline = started + args.duration if args.duration > 0 else float("inf")
+
+    async def start_session(session: DeviceSession):
+        if args.ramp > 0 and args.devices > 1:
+            await asyncio.sleep(args.ramp * session.index / args.devices)
+        await session.run(deadline)
+
+    await asyncio.gather(*(start_session(s) for s in sessions))
+    summary = summarize(sessions, time.perf_counter() - started)
+    print()
+    print_summary(summary)
+
+    if args.json:
+        result = {
+            "config": {
+                "url": args.url,
+                "devices": args.devices,
+                "turns": args.turns,
+                "duration": args.duration,
+                "ramp": args.ramp,
+                "mode": args.mode,
+                "think_time": args.think_time,
+                "gap_threshold": args.gap_threshold,
+                "utterances": [u.name for u in utterances],
+            },
+            "timestamp": time.time(),
+            "summary": summary,
+        }
+        if args.json_turns:
+            result["turns"] = [r for s in sessions for r in s.records]
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.json}")
+
+    return 0 if summary["connected"] > 0 else 1
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(asyncio.run(main()))
+    except KeyboardInterrupt:
+        sys.exit(0)
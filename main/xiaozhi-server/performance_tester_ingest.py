@@ -0,0 +1,164 @@
+"""
+音频接收管道性能测试
+
+对比两种音频接收模式的开销：
+- thread：每个连接一个ASR线程，每帧两次跨线程切换（旧模式）
+- async：每个连接一个协程，直接在事件循环中消费（新模式）
+
+测试方法：模拟N个设备按实时节奏（60ms/帧）推送音频帧，
+统计每核每秒可处理的帧数（总帧数 / 进程CPU时间）以及上下文切换次数。
+
+用法：python performance_tester_ingest.py --devices 300 --duration 10
+"""
+
+import sys
+import time
+import queue
+import asyncio
+import argparse
+import threading
+from types import SimpleNamespace
+
+from tabulate import tabulate
+
+import core.providers.asr.base as asr_base
+from core.utils.async_queue import LoopQueue
+
+try:
+    import resource
+except ImportError:  # Windows 无 resource 模块
+    resource = None
+
+FRAME_INTERVAL = 0.06  # 60ms 一帧
+FAKE_FRAME = b"\x00" * 120  # 典型 opus 帧大小
+
+
+class _BenchASR(asr_base.ASRProviderBase):
+    async def speech_to_text(self, opus_data, session_id, audio_format="opus"):
+        return "", None
+
+
+async def _fake_handle_audio_message(conn, audio):
+    """替代真实的VAD/ASR处理，只计数，用于隔离管道本身的开销"""
+    conn.processed += 1
+
+
+def _context_switches():
+    if resource is None:
+        return 0
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_nvcsw + usage.ru_nivcsw
+
+
+async def run_mode(mode, devices, duration):
+    loop = asyncio.get_running_loop()
+    asr = _BenchASR()
+    conns = []
+    for _ in range(devices):
+        conn = SimpleNamespace(
+            loop=loop,
+            stop_event=threading.Event(),
+            asr_ingest_task=None,
+            processed=0,
+        )
+        if mode == "thread":
+            conn.asr_audio_queue = queue.Queue()
+        else:
+            conn.asr_audio_queue = LoopQueue(loop, maxsize=100)
+        await asr.open_audio_channels(conn)
+        conns.append(conn)
+
+    sent = 0
+    cpu_start = time.process_time()
+    ctx_start = _context_switches()
+    wall_start = time.perf_counter()
+    next_tick = wall_start
+    while time.perf_counter() - wall_start < duration:
+        # 与 ConnectionHandler._route_message 一致：在事件循环中入队
+        for conn in conns:
+            conn.asr_audio_queue.put(FAKE_FRAME)
+        sent += devices
+        next_tick += FRAME_INTERVAL
+        await asyncio.sleep(max(0, next_tick - time.perf_counter()))
+
+    # 等待积压的帧被处理完
+    drain_deadline = time.perf_counter() + 5
+    while (
+        sum(c.processed for c in conns) < sent
+        and time.perf_counter() < drain_deadline
+    ):
+        await asyncio.sleep(0.01)
+
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    ctx = _context_switches() - ctx_start
+    processed = sum(c.processed for c in conns)
+    threads = threading.active_count()
+
+    for conn in conns:
+        conn.stop_event.set()
+        if conn.asr_ingest_task:
+            conn.asr_ingest_task.cancel()
+    # 给线程模式的线程一次超时退出的机会
+    await asyncio.sleep(1.1 if mode == "thread" else 0)
+
+    return {
+        "mode": mode,
+        "devices": devices,
+        "frames": processed,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "frames_per_core_s": processed / cpu if cpu > 0 else float("inf"),
+        "cpu_per_frame_us": cpu / processed * 1e6 if processed else 0,
+        "context_switches": ctx,
+        "threads": threads,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="音频接收管道性能测试")
+    parser.add_argument("--devices", type=int, default=300, help="模拟设备数")
+    parser.add_argument("--duration", type=float, default=10, help="每种模式测试时长(秒)")
+    parser.add_argument(
+        "--modes", default="thread,async", help="要测试的模式，逗号分隔"
+    )
+    args = parser.parse_args()
+
+    asr_base.handleAudioMessage = _fake_handle_audio_message
+
+    results = []
+    for mode in args.modes.split(","):
+        print(f"▶ 测试模式 {mode}，{args.devices} 个设备，{args.duration}s ...")
+        results.append(await run_mode(mode.strip(), args.devices, args.duration))
+
+    headers = [
+        "模式",
+        "设备数",
+        "处理帧数",
+        "CPU时间(s)",
+        "帧/秒/核",
+        "每帧CPU(μs)",
+        "上下文切换",
+        "线程数",
+    ]
+    rows = [
+        [
+            r["mode"],
+            r["devices"],
+            r["frames"],
+            f"{r['cpu_s']:.2f}",
+            f"{r['frames_per_core_s']:.0f}",
+            f"{r['cpu_per_frame_us']:.1f}",
+            r["context_switches"],
+            r["threads"],
+        ]
+        for r in results
+    ]
+    print(tabulate(rows, headers=headers, tablefmt="github"))
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        sys.exit(0)
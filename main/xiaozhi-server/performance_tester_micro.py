@@ -0,0 +1,498 @@
+"""
+热点路径微基准测试
+
+覆盖每秒执行成千上万次的代码：逐帧的 VAD / ASR 音频接收、逐 token 的分句与 Markdown 清理、
+opus 编解码、对话上下文构建和消息拦截。所有输入来自固定语料（config/assets 下的 wav、内置文本），
+每次运行结果可比较。
+
+测试方法：每个基准先自动确定每轮迭代次数（单轮不少于 --min-time 秒），
+再重复 --repeat 轮，取每次操作耗时的中位数作为结果。
+
+基线：
+- --save 把本次结果写入基线文件（建议在同一台机器上生成并提交）
+- 默认与基线比较，中位数变慢超过 --threshold 时标记为回归并以非0退出码结束，可直接用于CI
+
+用法：
+    python performance_tester_micro.py --save
+    python performance_tester_micro.py --threshold 0.1 --filter vad,opus
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import wave
+import asyncio
+import argparse
+import platform
+import statistics
+import tempfile
+from collections import deque
+from types import SimpleNamespace
+
+import numpy as np
+from tabulate import tabulate
+
+DEFAULT_BASELINE = "performance_baseline_micro.json"
+SPEECH_WAV = "config/assets/wakeup_words.wav"
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 960  # 60ms
+
+# 模拟大模型回复，包含常见的 Markdown 格式
+LLM_REPLIES = [
+    "好的，我来为你介绍一下今天的天气情况。北京今天晴，气温18到27度，东南风二级，空气质量良好，"
+    "适合户外活动！不过紫外线比较强，出门记得做好防晒哦。",
+    "## 量子计算简介\n\n量子计算利用**量子叠加**和*量子纠缠*来处理信息。\n\n"
+    "- 优点：某些问题上有指数级加速；\n- 缺点：目前硬件不稳定，纠错成本高。\n\n"
+    "| 类型 | 代表 |\n|---|---|\n| 超导 | IBM、谷歌 |\n| 离子阱 | IonQ |\n\n"
+    "想了解更多可以看[这篇介绍](https://example.com/quantum)。",
+    "当然可以！这是一个简单的例子：\n```python\nprint('hello')\n```\n"
+    "公式 $E=mc^2$ 描述了质能关系，价格大约是 $100$ 元。你还有其他问题吗？",
+    "嗯……让我想想。第一步，先把问题拆开；第二步，逐个解决；第三步，检查结果。"
+    "这样做虽然慢一点，但是不容易出错~你觉得呢？",
+]
+
+SYSTEM_PROMPT = (
+    "你是一个叫小智的台湾女孩，说话机车，声音好听，习惯简短表达，爱用网络梗。\n"
+    "<memory>\n</memory>\n请注意，要像一个人一样说话，请不要回复表情符号、代码、和xml标签。"
+)
+
+
+def load_speech_pcm(path=SPEECH_WAV, max_seconds=3.0, silence_seconds=1.0) -> bytes:
+    """读取测试语音并转换为 16kHz 单声道 16 位 PCM，末尾补静音（不依赖 ffmpeg）"""
+    with wave.open(path, "rb") as wf:
+        channels = wf.getnchannels()
+        rate = wf.getframerate()
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    samples = samples.astype(np.float32)
+    if rate != SAMPLE_RATE:
+        target = int(len(samples) * SAMPLE_RATE / rate)
+        samples = np.interp(
+            np.linspace(0, len(samples) - 1, target), np.arange(len(samples)), samples
+        )
+    speech = samples[: int(SAMPLE_RATE * max_seconds)].astype(np.int16)
+    silence = np.zeros(int(SAMPLE_RATE * silence_seconds), dtype=np.int16)
+    pcm = np.concatenate([speech, silence])
+    # 按整帧截断，便于逐帧处理
+    return pcm[: len(pcm) // FRAME_SAMPLES * FRAME_SAMPLES].tobytes()
+
+
+class Corpus:
+    """所有基准共用的固定输入"""
+
+    def __init__(self):
+        from core.utils.util import pcm_to_data
+
+        self.pcm = load_speech_pcm()
+        self.opus_frames = pcm_to_data(self.pcm)
+        self.speech_frames = int(len(self.opus_frames) * 0.75)
+        self.tokens = [
+            reply[i : i + 2] for reply in LLM_REPLIES for i in range(0, len(reply), 2)
+        ]
+
+
+class _Benchmark:
+    def __init__(self, name, description, factory):
+        self.name = name
+        self.description = description
+        self.factory = factory
+
+
+BENCHMARKS = []
+
+
+def benchmark(name, description):
+    def decorator(factory):
+        BENCHMARKS.append(_Benchmark(name, description, factory))
+        return factory
+
+    return decorator
+
+
+def _vad_conn():
+    from core.utils.pcm_buffer import PCMRingBuffer
+
+    return SimpleNamespace(
+        client_audio_buffer=PCMRingBuffer(),
+        client_voice_window=deque(maxlen=5),
+        last_is_voice=False,
+        client_have_voice=False,
+        client_voice_stop=False,
+        last_activity_time=0.0,
+        vad_model_state=None,
+    )
+
+
+@benchmark("vad_is_vad", "接收解码 + VADProvider.is_vad（Silero，每帧）")
+def bench_vad(corpus, config):
+    from core.utils.audio_decoder import AudioDecoder
+    from core.utils.vad import create_instance
+
+    vad_name = config["selected_module"]["VAD"]
+    vad_config = config["VAD"][vad_name]
+    vad = create_instance(vad_config.get("type", vad_name), vad_config)
+    frames = corpus.opus_frames
+
+    def run():
+        conn = _vad_conn()
+        decoder = AudioDecoder()
+        for frame in frames:
+            vad.is_vad(conn, decoder.decode(frame))
+
+    return run, len(frames), "帧"
+
+
+@benchmark("audio_decode", "AudioDecoder.decode：接收时的opus解码，VAD/ASR/声纹/上报共用（每帧）")
+def bench_audio_decode(corpus, config):
+    from core.utils.audio_decoder import AudioDecoder
+
+    frames = corpus.opus_frames
+
+    def run():
+        decoder = AudioDecoder()
+        for frame in frames:
+            decoder.decode(frame)
+
+    return run, len(frames), "帧"
+
+
+@benchmark("vad_chunking", "PCMRingBuffer：VAD音频累积与512采样点分块转换（每帧，不含解码和推理）")
+def bench_vad_chunking(corpus, config):
+    from core.utils.pcm_buffer import PCMRingBuffer
+
+    frame_bytes = FRAME_SAMPLES * 2
+    pcm_frames = [
+        corpus.pcm[i : i + frame_bytes] for i in range(0, len(corpus.pcm), frame_bytes)
+    ]
+    buffer = PCMRingBuffer()
+
+    def run():
+        buffer.clear()
+        for pcm in pcm_frames:
+            buffer.write(pcm)
+            buffer.read_chunks()
+
+    return run, len(pcm_frames), "帧"
+
+
+@benchmark("asr_receive_audio", "ASRProviderBase.receive_audio：音频缓冲与断句（每帧）")
+def bench_receive_audio(corpus, config):
+    from core.providers.asr.base import ASRProviderBase
+
+    class _BenchASR(ASRProviderBase):
+        async def speech_to_text(self, opus_data, session_id, audio_format="opus"):
+            return "", None
+
+        async def handle_voice_stop(self, conn, asr_audio_task):
+            conn.utterances += 1
+
+    asr = _BenchASR()
+    loop = asyncio.new_event_loop()
+    frames = corpus.opus_frames
+    speech_frames = corpus.speech_frames
+
+    async def feed(conn):
+        for i, frame in enumerate(frames):
+            have_voice = i < speech_frames
+            if have_voice:
+                conn.client_have_voice = True
+            elif i == len(frames) - 1:
+                conn.client_voice_stop = True
+            await asr.receive_audio(conn, frame, have_voice)
+
+    def run():
+        conn = SimpleNamespace(
+            client_listen_mode="auto",
+            asr_audio=[],
+            client_have_voice=False,
+            client_voice_stop=False,
+            utterances=0,
+            config={},
+            session_id="bench",
+            headers={},
+            client_abort=False,
+            turn_trace=None,
+        )
+        conn.reset_vad_states = lambda: None
+        loop.run_until_complete(feed(conn))
+
+    return run, len(frames), "帧"
+
+
+@benchmark("tts_segment_text", "TTSProviderBase._get_segment_text：流式分句（每token）")
+def bench_segment_text(corpus, config):
+    from core.providers.tts.base import TTSProviderBase
+
+    class _BenchTTS(TTSProviderBase):
+        async def text_to_speak(self, text, output_file):
+            return None
+
+    tts = _BenchTTS({}, True)
+    tokens = corpus.tokens
+
+    def run():
+        tts.tts_text_buff = []
+        tts.processed_chars = 0
+        tts.is_first_sentence = True
+        tts.tts_stop_request = False
+        for token in tokens:
+            tts.tts_text_buff.append(token)
+            tts._get_segment_text()
+        tts.tts_stop_request = True
+        tts._get_segment_text()
+
+    return run, len(tokens), "token"
+
+
+@benchmark("markdown_clean", "MarkdownCleaner.clean_markdown（每段回复）")
+def bench_markdown(corpus, config):
+    from core.utils.tts import MarkdownCleaner
+
+    def run():
+        for reply in LLM_REPLIES:
+            MarkdownCleaner.clean_markdown(reply)
+
+    return run, len(LLM_REPLIES), "段"
+
+
+@benchmark("opus_encode", "OpusEncoderUtils.encode_pcm_to_opus（每帧）")
+def bench_opus_encode(corpus, config):
+    from core.utils.opus_encoder_utils import OpusEncoderUtils
+
+    encoder = OpusEncoderUtils(SAMPLE_RATE, 1, 60)
+    pcm = corpus.pcm
+
+    def run():
+        encoder.encode_pcm_to_opus(pcm, end_of_stream=True)
+
+    return run, len(pcm) // 2 // FRAME_SAMPLES, "帧"
+
+
+@benchmark("p3_decode", "p3.decode_opus_from_file（每帧）")
+def bench_p3_decode(corpus, config):
+    import struct
+    from core.utils import p3
+
+    fd, path = tempfile.mkstemp(suffix=".p3")
+    with os.fdopen(fd, "wb") as f:
+        for frame in corpus.opus_frames:
+            f.write(struct.pack(">BBH", 0, 0, len(frame)))
+            f.write(frame)
+
+    def run():
+        p3.decode_opus_from_file(path)
+
+    return run, len(corpus.opus_frames), "帧"
+
+
+@benchmark("dialogue_with_memory", "Dialogue.get_llm_dialogue_with_memory（20轮上下文）")
+def bench_dialogue(corpus, config):
+    from core.utils.dialogue import Dialogue, Message
+
+    dialogue = Dialogue()
+    dialogue.put(Message(role="system", content=SYSTEM_PROMPT))
+    for i in range(20):
+        dialogue.put(Message(role="user", content=f"第{i}个问题：{LLM_REPLIES[i % 4][:20]}"))
+        dialogue.put(Message(role="assistant", content=LLM_REPLIES[i % len(LLM_REPLIES)]))
+    memory = "用户喜欢听周杰伦的歌，住在北京，养了一只猫。"
+    voiceprint_config = {"speakers": ["s1,张三,喜欢编程", "s2,李四,是一名老师"]}
+
+    def run():
+        dialogue.get_llm_dialogue_with_memory(memory, voiceprint_config)
+
+    return run, 1, "次"
+
+
+@benchmark("intercept_message", "MessageInterceptor.intercept_message（每条消息）")
+def bench_interceptor(corpus, config):
+    from core.interceptors.message_interceptor import MessageInterceptor
+
+    interceptor = MessageInterceptor(config)
+    # 日志输出的开销取决于日志配置，不计入
+    interceptor.log_requests = False
+    conn = SimpleNamespace(
+        client_ip="127.0.0.1",
+        device_id="bench-device",
+        session_id="bench-session",
+        headers={"user-agent": "bench", "device-id": "bench-device"},
+    )
+    messages = [
+        json.dumps({"type": "listen", "state": "start", "mode": "auto"})
+    ] + corpus.opus_frames[:50] + [json.dumps({"type": "listen", "state": "stop"})]
+    loop = asyncio.new_event_loop()
+
+    async def feed():
+        for message in messages:
+            await interceptor.intercept_message(conn, message)
+        # 等待拦截器派发的后台处理完成，其开销同样由每条消息承担
+        pending = asyncio.all_tasks() - {asyncio.current_task()}
+        if pending:
+            await asyncio.gather(*pending)
+
+    def run():
+        interceptor.recent_requests.clear()
+        loop.run_until_complete(feed())
+
+    return run, len(messages), "条"
+
+
+def _time_op(fn, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return time.perf_counter() - start
+
+
+def measure(fn, repeat, min_time):
+    """与 timeit 相同：先确定每轮迭代次数，再多轮计时，期间关闭 GC"""
+    fn()  # 预热
+    number = 1
+    while True:
+        elapsed = _time_op(fn, number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        per_op = [_time_op(fn, number) / number for _ in range(repeat)]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    quartiles = statistics.quantiles(per_op, n=4) if len(per_op) >= 2 else per_op * 3
+    return {
+        "median_us": statistics.median(per_op) * 1e6,
+        "min_us": min(per_op) * 1e6,
+        "iqr_us": (quartiles[-1] - quartiles[0]) * 1e6,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="热点路径微基准测试")
+    parser.add_argument("--filter", default="", help="只运行名称包含这些关键字的基准，逗号分隔")
+    parser.add_argument("--list", action="store_true", help="列出所有基准")
+    parser.add_argument("--repeat", type=int, default=7, help="计时轮数")
+    parser.add_argument("--min-time", type=float, default=0.2, help="每轮最短时长(秒)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument("--save", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument(
+        "--threshold", type=float, default=0.15, help="中位数变慢超过该比例视为回归"
+    )
+    parser.add_argument("--json", default="", help="本次结果输出的 JSON 文件路径")
+    args = parser.parse_args()
+
+    if args.list:
+        for bench in BENCHMARKS:
+            print(f"{bench.name:<24}{bench.description}")
+        return 0
+
+    from config.settings import load_config
+
+    config = load_config()
+    corpus = Corpus()
+    keywords = [k.strip() for k in args.filter.split(",") if k.strip()]
+    selected = [
+        b for b in BENCHMARKS if not keywords or any(k in b.name for k in keywords)
+    ]
+
+    results = {}
+    skipped = {}
+    for bench in selected:
+        try:
+            fn, items, unit = bench.factory(corpus, config)
+        except Exception as e:
+            # 缺少可选依赖（如 torch、模型文件）时跳过
+            skipped[bench.name] = f"{type(e).__name__}: {e}"
+            print(f"⏭ 跳过 {bench.name}: {skipped[bench.name]}")
+            continue
+        print(f"▶ {bench.name} ...")
+        result = measure(fn, args.repeat, args.min_time)
+        result["items"] = items
+        result["unit"] = unit
+        results[bench.name] = result
+
+    baseline = None if args.save else load_baseline(args.baseline)
+    if baseline and baseline.get("environment", {}).get("platform") != platform.platform():
+        print("⚠ 基线与当前运行环境不同，比较结果仅供参考")
+
+    regressions = []
+    rows = []
+    for name, r in results.items():
+        row = [
+            name,
+            f"{r['median_us']:.1f}",
+            f"{r['min_us']:.1f}",
+            f"±{r['iqr_us'] / r['median_us'] * 100:.1f}%" if r["median_us"] else "-",
+            f"{r['median_us'] / r['items']:.2f}/{r['unit']}",
+        ]
+        base = (baseline or {}).get("results", {}).get(name)
+        if base:
+            change = r["median_us"] / base["median_us"] - 1
+            status = "✓"
+            if change > args.threshold:
+                status = "✗ 回归"
+                regressions.append(name)
+            elif change < -args.threshold:
+                status = "↑ 提升"
+            row += [f"{base['median_us']:.1f}", f"{change * 100:+.1f}%", status]
+        else:
+            row += ["-", "-", "新增" if baseline else "-"]
+        rows.append(row)
+
+    headers = ["基准", "中位数(μs)", "最小(μs)", "波动(IQR)", "每项(μs)", "基线(μs)", "变化", "状态"]
+    print()
+    print(tabulate(rows, headers=headers, tablefmt="github"))
+
+    output = {
+        "environment": environment(),
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "threshold": args.threshold,
+        "results": results,
+        "skipped": skipped,
+    }
+    if args.save:
+        # 只更新本次运行的基准，保留基线中其他基准的结果
+        existing = load_baseline(args.baseline) or {}
+        merged = dict(existing.get("results", {}))
+        merged.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({**output, "results": merged}, f, ensure_ascii=False, indent=2)
+        print(f"\n基线已保存到 {args.baseline}")
+    if args.json:
+        output["regressions"] = regressions
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+
+    if regressions:
+        print(f"\n✗ {len(regressions)} 个基准超过回归阈值 {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+        return 1
+    if baseline is None and not args.save:
+        print(f"\n未找到基线 {args.baseline}，可使用 --save 生成")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""
+会话回放测试：把线上录制的会话按原始节奏回放到当前版本，对比各阶段延迟
+
+录制：在 config.yaml 中开启 session_record，每个连接生成一个 JSONL 录制文件，包含
+收到的 opus 音频帧与 JSON 控制消息（带时间戳），以及识别结果、大模型流式分片、合成音频及各自的耗时。
+
+回放：在本进程内创建 WebSocketServer（不监听端口），为每份录制按 _handle_connection 的方式创建
+ConnectionHandler，用模拟的 WebSocket 按录制时间点送入消息，走与线上相同的消息路由和处理流程。
+ASR / LLM / TTS 替换为 type 为 replay 的提供者，按录制时的耗时返回录制的结果，外部服务的波动不影响结果；
+VAD 使用当前配置的模型，记忆关闭，意图识别由 --intent 指定。
+
+输出每个阶段录制时与回放时的 p50/p95 对比；--baseline 指定上次回放的 JSON 结果时，
+p50 超过阈值的阶段视为性能回退，以退出码 1 结束，便于在 CI 中对比两个版本。
+
+用法：
+    python performance_tester_replay.py data/recordings
+    python performance_tester_replay.py data/recordings/20250101-120000_xxx.jsonl --copies 20 \\
+        --json replay_result.json --baseline replay_baseline.json
+"""
+
+import os
+import sys
+import copy
+import glob
+import json
+import time
+import asyncio
+import argparse
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from tabulate import tabulate
+
+from core.utils.session_replay import Recording, get_replay_store
+from core.utils.turn_trace import STAGE_ORDER, RESPONSE_LATENCY, TOTAL, get_trace_recorder
+
+PERCENTILES = (50, 95)
+STAGES = list(STAGE_ORDER[1:]) + [RESPONSE_LATENCY, TOTAL]
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class ReplayWebSocket:
+    """按录制时间点送入消息的模拟 WebSocket"""
+
+    def __init__(self, recording: Recording, device_id: str, idle: float, tail: float):
+        headers = recording.headers
+        headers["device-id"] = device_id
+        headers.setdefault("client-id", device_id)
+        self.request = SimpleNamespace(
+            headers=headers,
+            path=f"/xiaozhi/v1/?device-id={device_id}&client-id={headers['client-id']}",
+        )
+        self.remote_address = ("127.0.0.1", 0)
+        self.closed = False
+        self.recording = recording
+        self.idle = idle
+        self.tail = tail
+        self.sent_messages = 0
+        self.sent_audio_frames = 0
+        self._last_send = time.monotonic()
+        self._closed_event = asyncio.Event()
+
+    async def send(self, message):
+        if self.closed:
+            return
+        self._last_send = time.monotonic()
+        if isinstance(message, bytes):
+            self.sent_audio_frames += 1
+        else:
+            self.sent_messages += 1
+
+    async def close(self, code=1000, reason=""):
+        self.closed = True
+        self._closed_event.set()
+
+    async def _sleep_until(self, deadline: float) -> bool:
+        """等待到指定时间，连接被关闭时返回False"""
+        delay = deadline - time.monotonic()
+        if delay > 0:
+            try:
+                await asyncio.wait_for(self._closed_event.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+        return not self.closed
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        t0 = time.monotonic()
+        for t, message in self.recording.inbound:
+            if not await self._sleep_until(t0 + t / 1000):
+                return
+            yield message
+        # 消息送完后至少等到录制结束的时间点，再等服务端空闲 idle 秒，最多额外等待 tail 秒
+        if not await self._sleep_until(t0 + self.recording.duration_ms / 1000):
+            return
+        deadline = time.monotonic() + self.tail
+        while time.monotonic() < deadline:
+            idle_until = self._last_send + self.idle
+            if time.monotonic() >= idle_until:
+                break
+            if not await self._sleep_until(min(idle_until, deadline)):
+                return
+
+
+def build_replay_config(args) -> Dict[str, Any]:
+    from config.settings import load_config
+
+    config = copy.deepcopy(load_config())
+    config["read_config_from_api"] = False
+    config.setdefault("server", {}).setdefault("auth", {})["enabled"] = False
+    config["session_record"] = {"enabled": False}
+    config.setdefault("turn_trace", {})["ring_size"] = 100000
+    config["ASR"]["ReplayASR"] = {"type": "replay", "output_dir": "tmp/"}
+    config["LLM"]["ReplayLLM"] = {"type": "replay"}
+    config["TTS"]["ReplayTTS"] = {"type": "replay", "output_dir": "tmp/"}
+    selected = config["selected_module"]
+    selected["ASR"] = "ReplayASR"
+    selected["LLM"] = "ReplayLLM"
+    selected["TTS"] = "ReplayTTS"
+    selected["Memory"] = "nomem"
+    selected["Intent"] = args.intent
+    return config
+
+
+async def replay_one(server, recording: Recording, device_id: str, args) -> Dict[str, Any]:
+    from core.connection import ConnectionHandler
+
+    websocket = ReplayWebSocket(recording, device_id, args.idle, args.tail)
+    handler = ConnectionHandler(
+        server.config,
+        server._vad,
+        server._asr,
+        server._llm,
+        server._memory,
+        server._intent,
+        server,
+    )
+    store = get_replay_store()
+    session = store.bind(handler.session_id, recording)
+    server.active_connections.add(handler)
+    started = time.monotonic()
+    try:
+        await handler.handle_connection(websocket)
+    finally:
+        server.active_connections.discard(handler)
+        store.unbind(handler.session_id)
+    turns = get_trace_recorder().get_recent(limit=100000, session_id=handler.session_id)
+    return {
+        "recording": os.path.basename(recording.path),
+        "session_id": handler.session_id,
+        "wall_s": round(time.monotonic() - started, 2),
+        "recorded_turns": recording.turns,
+        "replayed_turns": list(reversed(turns)),
+        "sent_messages": websocket.sent_messages,
+        "sent_audio_frames": websocket.sent_audio_frames,
+        "misses": dict(session.misses),
+    }
+
+
+def stage_stats(turns: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    stats = {}
+    for stage in STAGES:
+        values = [t["stages_ms"][stage] for t in turns if stage in t["stages_ms"]]
+        if not values:
+            continue
+        stats[stage] = {"count": len(values)}
+        for p in PERCENTILES:
+            stats[stage][f"p{p}"] = round(percentile(values, p), 2)
+    return stats
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    recorded = [t for r in results for t in r["recorded_turns"]]
+    replayed = [t for r in results for t in r["replayed_turns"]]
+    status_counts: Dict[str, int] = {}
+    for turn in replayed:
+        status_counts[turn["status"]] = status_counts.get(turn["status"], 0) + 1
+    misses = {"asr": 0, "llm": 0, "tts": 0}
+    for result in results:
+        for kind, count in result["misses"].items():
+            misses[kind] += count
+    return {
+        "sessions": len(results),
+        "recorded_turns": len(recorded),
+        "replayed_turns": len(replayed),
+        "turn_status": status_counts,
+        "misses": misses,
+        "recorded": stage_stats(recorded),
+        "replayed": stage_stats(replayed),
+    }
+
+
+def compare_baseline(summary, baseline, threshold) -> List[List[Any]]:
+    """返回 p50 超过阈值的阶段"""
+    regressions = []
+    for stage, current in summary["replayed"].items():
+        previous = baseline.get("summary", {}).get("replayed", {}).get(stage)
+        if not previous or not previous.get("p50"):
+            continue
+        change = current["p50"] / previous["p50"] - 1
+        if change > threshold:
+            regressions.append(
+                [stage, f"{previous['p50']:.1f}", f"{current['p50']:.1f}", f"{change:+.1%}"]
+            )
+    return regressions
+
+
+def print_summary(summary: Dict[str, Any]):
+    status = summary["turn_status"]
+    overview = [
+        ["会话数", summary["sessions"]],
+        ["录制轮次", summary["recorded_turns"]],
+        ["回放轮次", summary["replayed_turns"]],
+        ["回放状态", ", ".join(f"{k}={v}" for k, v in status.items()) or "-"],
+        ["录制结果不足(asr/llm/tts)", "/".join(str(v) for v in summary["misses"].values())],
+    ]
+    print(tabulate(overview, headers=["项目", "值"], tablefmt="github"))
+    print()
+
+    headers = ["阶段(ms)"]
+    for p in PERCENTILES:
+        headers += [f"录制p{p}", f"回放p{p}", "变化"]
+    rows = []
+    for stage in STAGES:
+        recorded = summary["recorded"].get(stage)
+        replayed = summary["replayed"].get(stage)
+        if not recorded and not replayed:
+            continue
+        row = [stage]
+        for p in PERCENTILES:
+            before = recorded[f"p{p}"] if recorded else None
+            after = replayed[f"p{p}"] if replayed else None
+            row += [
+                f"{before:.1f}" if before is not None else "-",
+                f"{after:.1f}" if after is not None else "-",
+                f"{after - before:+.1f}" if before is not None and after is not None else "-",
+            ]
+        rows.append(row)
+    print(tabulate(rows, headers=headers, tablefmt="github"))
+
+
+def load_recordings(paths: List[str]) -> List[Recording]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.jsonl"))))
+        else:
+            files.append(path)
+    return [Recording(f) for f in files]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="会话回放测试：按录制节奏回放并对比延迟")
+    parser.add_argument("recordings", nargs="+", help="录制文件或录制目录")
+    parser.add_argument("--copies", type=int, default=1, help="每份录制同时回放的份数")
+    parser.add_argument("--concurrency", type=int, default=10, help="同时回放的会话数")
+    parser.add_argument(
+        "--intent",
+        default="function_call",
+        help="回放使用的意图识别配置，录制中的工具调用需要 function_call",
+    )
+    parser.add_argument(
+        "--idle", type=float, default=2, help="录制结束后服务端无新消息多久视为会话结束(秒)"
+    )
+    parser.add_argument("--tail", type=float, default=30, help="录制结束后最多再等待的时间(秒)")
+    parser.add_argument("--json", default="", help="回放结果输出的 JSON 文件路径")
+    parser.add_argument("--baseline", default="", help="用于对比的上次回放 JSON 结果")
+    parser.add_argument(
+        "--threshold", type=float, default=0.15, help="与基线相比 p50 变慢超过该比例视为回退"
+    )
+    args = parser.parse_args()
+
+    recordings = load_recordings(args.recordings)
+    if not recordings:
+        print("没有找到录制文件")
+        return 1
+
+    from core.websocket_server import WebSocketServer
+
+    config = build_replay_config(args)
+    get_trace_recorder(config)
+    server = WebSocketServer(config)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def run(recording: Recording, copy_index: int):
+        device_id = recording.device_id or "replay"
+        if args.copies > 1:
+            device_id = f"{device_id}-{copy_index}"
+        async with semaphore:
+            return await replay_one(server, recording, device_id, args)
+
+    started = time.monotonic()
+    results = await asyncio.gather(
+        *(run(r, i) for r in recordings for i in range(args.copies))
+    )
+    summary = summarize(results)
+    summary["wall_s"] = round(time.monotonic() - started, 2)
+    print()
+    print_summary(summary)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_baseline(summary, baseline, args.threshold)
+        if regressions:
+            print(f"\n与基线相比 p50 变慢超过 {args.threshold:.0%} 的阶段：")
+            print(
+                tabulate(
+                    regressions, headers=["阶段", "基线p50", "本次p50", "变化"], tablefmt="github"
+                )
+            )
+            exit_code = 1
+        else:
+            print("\n与基线相比未发现性能回退")
+
+    if args.json:
+        result = {
+            "config": {
+                "recordings": [os.path.basename(r.path) for r in recordings],
+                "copies": args.copies,
+                "concurrency": args.concurrency,
+                "intent": args.intent,
+            },
+            "timestamp": time.time(),
+            "summary": summary,
+            "sessions": results,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.json}")
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(asyncio.run(main()))
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,709 @@
+"""
+VAD 推理性能与准确性测试
+
+性能：模拟 N 路连接同时送入音频（测试语音 + 静音，各路从不同位置开始），对比各推理方式：
+- per_chunk：当前方式，torch 模型每路每个 512 采样点（32ms）分块单独调用一次，所有连接共用模型内部状态
+- batched：torch 模型，所有分块经 VADBatcher 在攒批窗口内合并推理，每路保存自己的循环状态
+- onnx：ONNX Runtime 版（silero_onnx），每路每个分块单独推理，每路保存自己的循环状态
+- onnx_batched：ONNX Runtime 版，跨连接批量推理
+
+默认不按实时节奏、尽可能快地推理，测量最大吞吐；--realtime 时每路按 32ms 一块的实际节奏送入，
+测量真实负载下的 CPU 占用和批量推理带来的额外等待延迟。
+
+统计指标：
+- 吞吐：每秒推理的分块数
+- CPU：进程 CPU 时间（含所有线程），折算为每路每秒音频消耗的 CPU 毫秒数，以及单核可承载的实时路数
+- 延迟：单次推理调用的耗时 p50/p99（batched 模式包含攒批等待）
+
+准确性（--accuracy）：以 torch 模型逐段单独推理（每段音频开始前重置状态）的结果为基准，比较
+- onnx：ONNX Runtime 版，每段音频独立状态
+- shared：当前线上方式，多段音频交错送入共用状态的 torch 模型（模拟多个连接同时说话）
+统计语音概率的平均/最大绝对误差、逐块语音判断一致率、滑动窗口后“有人说话”判断一致率，
+以及语音起点的平均偏差（块）。音频可来自 wav 文件，也可来自会话录制（--recordings）中设备上传的音频。
+
+能量门限（--gate）：在以空闲为主的音频上对比开启/关闭能量门限，测试语音前后各加 --idle-seconds 秒不同能量的
+背景噪声合成，语音段位置已知；也可用 --labels 提供带标注的音频。统计推理分块数、跳过比例、VAD CPU 时间、
+标注语音段的起点漏检率、起点平均延迟和误触发次数。
+
+用法：
+    python performance_tester_vad.py --streams 1,50,300 --seconds 10
+    python performance_tester_vad.py --streams 300 --realtime --seconds 20 --json vad_result.json
+    python performance_tester_vad.py --accuracy --wav config/assets --recordings data/recordings
+    python performance_tester_vad.py --gate --noise-levels -70,-55,-45 --idle-seconds 10
+"""
+
+import os
+import sys
+import copy
+import glob
+import json
+import time
+import wave
+import asyncio
+import argparse
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import numpy as np
+from tabulate import tabulate
+
+SPEECH_WAV = "config/assets/wakeup_words.wav"
+SAMPLE_RATE = 16000
+CHUNK_SAMPLES = 512
+CHUNK_SECONDS = CHUNK_SAMPLES / SAMPLE_RATE
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def read_wav(path) -> np.ndarray:
+    """读取 wav 并转换为 16kHz 单声道 float32（不依赖 ffmpeg）"""
+    with wave.open(path, "rb") as wf:
+        channels = wf.getnchannels()
+        rate = wf.getframerate()
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    samples = samples.astype(np.float32)
+    if rate != SAMPLE_RATE:
+        target = int(len(samples) * SAMPLE_RATE / rate)
+        samples = np.interp(
+            np.linspace(0, len(samples) - 1, target), np.arange(len(samples)), samples
+        )
+    return samples.astype(np.float32) / 32768.0
+
+
+def read_recording(path) -> np.ndarray:
+    """解码会话录制中设备上传的 opus 音频帧"""
+    import opuslib_next
+    from core.utils.session_replay import Recording
+
+    decoder = opuslib_next.Decoder(SAMPLE_RATE, 1)
+    pcm = bytearray()
+    for _, message in Recording(path).inbound:
+        if isinstance(message, bytes):
+            try:
+                pcm.extend(decoder.decode(message, 960))
+            except opuslib_next.OpusError:
+                continue
+    return np.frombuffer(bytes(pcm), dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def to_chunks(audio: np.ndarray) -> List[np.ndarray]:
+    count = len(audio) // CHUNK_SAMPLES
+    return [audio[i * CHUNK_SAMPLES : (i + 1) * CHUNK_SAMPLES].copy() for i in range(count)]
+
+
+def load_chunks(path=SPEECH_WAV, silence_seconds=2.0) -> List[np.ndarray]:
+    """测试语音补静音后切分为 512 采样点的 float32 分块"""
+    silence = np.zeros(int(SAMPLE_RATE * silence_seconds), dtype=np.float32)
+    return to_chunks(np.concatenate([read_wav(path), silence]))
+
+
+def stream_chunks(chunks, stream_index, count) -> List[np.ndarray]:
+    """第 stream_index 路的分块序列，各路从不同位置开始，批次中语音与静音混合"""
+    offset = (stream_index * 7) % len(chunks)
+    return [chunks[(offset + i) % len(chunks)] for i in range(count)]
+
+
+def create_vad(config, vad_name: str, batch: bool, window_ms=5, max_batch=64):
+    from core.utils.vad import create_instance
+
+    vad_config = copy.deepcopy(config["VAD"][vad_name])
+    vad_config["batch_enabled"] = batch
+    vad_config["batch_window_ms"] = window_ms
+    vad_config["batch_max_size"] = max_batch
+    return create_instance(vad_config.get("type", vad_name), vad_config)
+
+
+def infer_chunk(vad, chunk, state):
+    """单个分块推理：torch 版与线上一致直接调用共用状态的模型，ONNX 版传入该路自己的状态"""
+    if hasattr(vad, "model"):
+        import torch
+
+        with torch.no_grad():
+            return vad.model(torch.from_numpy(chunk), SAMPLE_RATE).item(), None
+    probs, states = vad._forward_batch([chunk], [state])
+    return probs[0], states[0]
+
+
+async def run_per_chunk(vad, streams: List[List[np.ndarray]], realtime: bool):
+    latencies = []
+    states = [None] * len(streams)
+    steps = len(streams[0])
+    started = time.perf_counter()
+    for step in range(steps):
+        for i, chunks in enumerate(streams):
+            t = time.perf_counter()
+            _, states[i] = infer_chunk(vad, chunks[step], states[i])
+            latencies.append(time.perf_counter() - t)
+        if realtime:
+            # 逐块推理在事件循环中同步执行，按 32ms 节拍等待下一批音频
+            delay = started + (step + 1) * CHUNK_SECONDS - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+    return latencies
+
+
+async def run_batched(vad, streams: List[List[np.ndarray]], realtime: bool):
+    latencies = []
+
+    async def stream(chunks, start_delay):
+        await asyncio.sleep(start_delay)
+        started = time.perf_counter()
+        state = None
+        for step, chunk in enumerate(chunks):
+            t = time.perf_counter()
+            _, state = await vad.batcher.infer([chunk], state)
+            latencies.append(time.perf_counter() - t)
+            if realtime:
+                delay = started + (step + 1) * CHUNK_SECONDS - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+    # 实时模式下各路错开开始时间，模拟设备音频到达时刻不对齐
+    await asyncio.gather(
+        *(
+            stream(chunks, (i % 32) * CHUNK_SECONDS / 32 if realtime else 0)
+            for i, chunks in enumerate(streams)
+        )
+    )
+    return latencies
+
+
+def measure(mode, vad, streams, realtime) -> Dict[str, Any]:
+    runner = run_batched if vad.batcher is not None else run_per_chunk
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    latencies = asyncio.run(runner(vad, streams, realtime))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    total_chunks = sum(len(s) for s in streams)
+    audio_seconds = total_chunks * CHUNK_SECONDS
+    return {
+        "mode": mode,
+        "streams": len(streams),
+        "chunks": total_chunks,
+        "wall_s": round(wall, 3),
+        "cpu_s": round(cpu, 3),
+        "chunks_per_s": round(total_chunks / wall, 1),
+        "cpu_ms_per_stream_s": round(cpu * 1000 / audio_seconds, 3),
+        "realtime_streams_per_core": round(audio_seconds / cpu, 1) if cpu else 0,
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+# 测试方式 -> (使用的VAD配置, 是否批量推理)
+MODES = {
+    "per_chunk": ("torch", False),
+    "batched": ("torch", True),
+    "onnx": ("onnx", False),
+    "onnx_batched": ("onnx", True),
+}
+
+
+def voice_decisions(probs, vad):
+    """按线上的双阈值和滑动窗口规则，得到逐块语音判断和“有人说话”判断"""
+    last_is_voice = False
+    window = deque(maxlen=5)
+    is_voice_list, have_voice_list = [], []
+    for prob in probs:
+        if prob >= vad.vad_threshold:
+            is_voice = True
+        elif prob <= vad.vad_threshold_low:
+            is_voice = False
+        else:
+            is_voice = last_is_voice
+        last_is_voice = is_voice
+        window.append(is_voice)
+        is_voice_list.append(is_voice)
+        have_voice_list.append(window.count(True) >= vad.frame_window_threshold)
+    return is_voice_list, have_voice_list
+
+
+def onsets(have_voice: List[bool]) -> List[int]:
+    return [
+        i for i, v in enumerate(have_voice) if v and (i == 0 or not have_voice[i - 1])
+    ]
+
+
+def torch_isolated_probs(vad, segments) -> List[List[float]]:
+    """基准：每段音频开始前重置状态，逐块单独推理"""
+    result = []
+    for chunks in segments:
+        vad.model.reset_states()
+        result.append([infer_chunk(vad, chunk, None)[0] for chunk in chunks])
+    return result
+
+
+def torch_shared_probs(vad, segments) -> List[List[float]]:
+    """当前线上方式：各段音频逐块交错送入共用状态的模型"""
+    vad.model.reset_states()
+    result = [[] for _ in segments]
+    for step in range(max(len(chunks) for chunks in segments)):
+        for i, chunks in enumerate(segments):
+            if step < len(chunks):
+                result[i].append(infer_chunk(vad, chunks[step], None)[0])
+    return result
+
+
+def onnx_probs(vad, segments) -> List[List[float]]:
+    result = []
+    for chunks in segments:
+        state = None
+        probs = []
+        for chunk in chunks:
+            prob, state = infer_chunk(vad, chunk, state)
+            probs.append(prob)
+        result.append(probs)
+    return result
+
+
+def compare(name, reference, candidate, vad, max_onset_offset=10) -> Dict[str, Any]:
+    diffs = []
+    voice_agree = have_agree = total = 0
+    onset_offsets = []
+    missed_onsets = reference_onsets = 0
+    for ref_probs, cand_probs in zip(reference, candidate):
+        diffs.extend(abs(a - b) for a, b in zip(ref_probs, cand_probs))
+        ref_voice, ref_have = voice_decisions(ref_probs, vad)
+        cand_voice, cand_have = voice_decisions(cand_probs, vad)
+        voice_agree += sum(a == b for a, b in zip(ref_voice, cand_voice))
+        have_agree += sum(a == b for a, b in zip(ref_have, cand_have))
+        total += len(ref_probs)
+        cand_onsets = onsets(cand_have)
+        for onset in onsets(ref_have):
+            reference_onsets += 1
+            nearest = min((abs(c - onset) for c in cand_onsets), default=None)
+            if nearest is None or nearest > max_onset_offset:
+                missed_onsets += 1
+            else:
+                onset_offsets.append(nearest)
+    return {
+        "name": name,
+        "chunks": total,
+        "prob_mae": round(sum(diffs) / len(diffs), 5) if diffs else 0,
+        "prob_max_diff": round(max(diffs), 5) if diffs else 0,
+        "voice_agreement": round(voice_agree / total, 5) if total else 0,
+        "have_voice_agreement": round(have_agree / total, 5) if total else 0,
+        "onsets": reference_onsets,
+        "missed_onsets": missed_onsets,
+        "onset_offset_chunks": (
+            round(sum(onset_offsets) / len(onset_offsets), 2) if onset_offsets else 0
+        ),
+    }
+
+
+def expand_paths(paths: List[str], pattern: str) -> List[str]:
+    """展开文件和目录参数，目录取其中匹配 pattern 的文件"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, pattern))))
+        elif path:
+            files.append(path)
+    return files
+
+
+def load_segments(wav_paths: List[str], recording_paths: List[str]):
+    """读取准确性测试的音频，返回 [(名称, 分块列表)]"""
+    segments = []
+    for path in expand_paths(wav_paths, "*.wav"):
+        segments.append((os.path.basename(path), to_chunks(read_wav(path))))
+    for path in expand_paths(recording_paths, "*.jsonl"):
+        segments.append((os.path.basename(path), to_chunks(read_recording(path))))
+    return [(name, chunks) for name, chunks in segments if chunks]
+
+
+def run_accuracy(config, args) -> Dict[str, Any]:
+    segments = load_segments(args.wav, args.recordings)
+    if not segments:
+        print("没有找到测试音频")
+        return {}
+    print(f"▶ 准确性测试：{len(segments)} 段音频")
+    chunk_lists = [chunks for _, chunks in segments]
+    torch_vad = create_vad(config, args.torch_vad, False)
+    reference = torch_isolated_probs(torch_vad, chunk_lists)
+    candidates = {"shared": torch_shared_probs(torch_vad, chunk_lists)}
+    try:
+        onnx_vad = create_vad(config, args.onnx_vad, False)
+        candidates["onnx"] = onnx_probs(onnx_vad, chunk_lists)
+    except Exception as e:
+        print(f"⏭ 跳过 onnx: {type(e).__name__}: {e}")
+
+    results = [
+        compare(name, reference, probs, torch_vad) for name, probs in candidates.items()
+    ]
+    headers = [
+        "对比",
+        "分块数",
+        "概率MAE",
+        "概率最大误差",
+        "逐块判断一致率",
+        "有人说话判断一致率",
+        "语音起点数",
+        "漏检起点",
+        "起点平均偏差(块)",
+    ]
+    rows = [
+        [
+            r["name"],
+            r["chunks"],
+            r["prob_mae"],
+            r["prob_max_diff"],
+            f"{r['voice_agreement']:.2%}",
+            f"{r['have_voice_agreement']:.2%}",
+            r["onsets"],
+            r["missed_onsets"],
+            r["onset_offset_chunks"],
+        ]
+        for r in results
+    ]
+    print()
+    print("基准：torch 模型，每段音频独立状态")
+    print(tabulate(rows, headers=headers, tablefmt="github"))
+    return {"segments": [name for name, _ in segments], "results": results}
+
+
+FRAME_SAMPLES = 960  # 设备每个音频包 60ms
+
+
+def make_noise(samples: int, level_db: float, rng) -> np.ndarray:
+    """指定能量（dBFS）的白噪声"""
+    return (rng.standard_normal(samples) * 10 ** (level_db / 20)).astype(np.float32)
+
+
+def labeled_clips(wav_paths, label_dirs, noise_levels, idle_seconds, seed=0):
+    """带语音段标注的测试音频，返回 [(名称, float32音频, [(开始秒, 结束秒)])]：
+    - 合成：测试语音前后各加 idle_seconds 秒背景噪声，按不同噪声能量各生成一段，语音段位置已知
+    - 标注文件：目录中的 xxx.wav 与同名 xxx.json（内容为 [[开始秒, 结束秒], ...]）"""
+    rng = np.random.default_rng(seed)
+    clips = []
+    for path in wav_paths:
+        speech = read_wav(path)
+        idle = int(SAMPLE_RATE * idle_seconds)
+        for level in noise_levels:
+            audio = np.concatenate(
+                [
+                    make_noise(idle, level, rng),
+                    speech + make_noise(len(speech), level, rng),
+                    make_noise(idle, level, rng),
+                ]
+            )
+            label = [(idle_seconds, idle_seconds + len(speech) / SAMPLE_RATE)]
+            clips.append((f"{os.path.basename(path)}@{level:g}dB", audio, label))
+    for directory in label_dirs:
+        for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+            label_path = os.path.splitext(path)[0] + ".json"
+            if not os.path.exists(label_path):
+                continue
+            with open(label_path, "r", encoding="utf-8") as f:
+                label = [tuple(segment) for segment in json.load(f)]
+            clips.append((os.path.basename(path), read_wav(path), label))
+    return clips
+
+
+def gate_conn():
+    from core.utils.pcm_buffer import PCMRingBuffer
+
+    return SimpleNamespace(
+        client_audio_buffer=PCMRingBuffer(),
+        client_voice_window=deque(maxlen=5),
+        last_is_voice=False,
+        client_have_voice=False,
+        client_voice_stop=False,
+        last_activity_time=0.0,
+        vad_model_state=None,
+        vad_energy_gate=None,
+    )
+
+
+def run_clip(vad, audio):
+    """按设备的 60ms 音频包送入，走与 is_vad 相同的门限、推理和状态更新流程（不含 opus 解码），
+    返回 (逐块“有人说话”判断, 推理的分块数)"""
+    if hasattr(vad, "model"):
+        vad.model.reset_states()
+    conn = gate_conn()
+    pcm = (np.clip(audio, -1, 1) * 32767).astype(np.int16)
+    have_voice = []
+    inferred = 0
+    for i in range(0, len(pcm) - FRAME_SAMPLES + 1, FRAME_SAMPLES):
+        conn.client_audio_buffer.write(pcm[i : i + FRAME_SAMPLES])
+        chunks = conn.client_audio_buffer.read_chunks()
+        measures, skip = vad._apply_energy_gate(conn, chunks)
+        if skip:
+            probs = [0.0] * len(chunks)
+        else:
+            probs = vad._infer_chunks(conn, chunks)
+            inferred += len(chunks)
+        for prob in probs:
+            vad._update_voice_state(conn, [prob])
+            have_voice.append(conn.client_voice_window.count(True) >= vad.frame_window_threshold)
+        if measures is not None:
+            for (energy_db, zcr), prob in zip(measures, probs):
+                conn.vad_energy_gate.update(energy_db, zcr, prob >= vad.vad_threshold)
+        if conn.client_voice_stop:
+            # 与服务端一致：一句话结束后重置语音状态
+            conn.client_have_voice = False
+            conn.client_voice_stop = False
+    return have_voice, inferred
+
+
+def evaluate_onsets(have_voice, labels, tolerance_s=0.1):
+    """每个标注的语音段内是否检测到语音起点，以及起点相对标注开始的延迟"""
+    onset_times = [i * CHUNK_SECONDS for i in onsets(have_voice)]
+    missed, delays = 0, []
+    for start, end in labels:
+        hits = [t for t in onset_times if start - tolerance_s <= t <= end]
+        if hits:
+            delays.append(max(0.0, hits[0] - start))
+        else:
+            missed += 1
+    false_onsets = sum(
+        1
+        for t in onset_times
+        if not any(start - tolerance_s <= t <= end for start, end in labels)
+    )
+    return missed, delays, false_onsets
+
+
+def run_gate(config, args) -> Dict[str, Any]:
+    from core.utils.vad import create_instance
+
+    vad_name = args.gate_vad or config["selected_module"]["VAD"]
+    vad_config = copy.deepcopy(config["VAD"][vad_name])
+    vad_config["batch_enabled"] = False
+    vad_config["energy_gate"] = True
+    vad = create_instance(vad_config.get("type", vad_name), vad_config)
+    gate_config = vad.energy_gate_config
+
+    noise_levels = [float(x) for x in args.noise_levels.split(",") if x.strip()]
+    clips = labeled_clips(
+        expand_paths(args.wav, "*.wav"), args.labels, noise_levels, args.idle_seconds
+    )
+    if not clips:
+        print("没有找到测试音频")
+        return {}
+    print(f"▶ 能量门限测试：{len(clips)} 段音频，VAD={vad_name}")
+
+    results = []
+    for enabled in (False, True):
+        vad.energy_gate_config = gate_config if enabled else None
+        total = inferred = segments = missed = false_onsets = 0
+        delays = []
+        cpu_start = time.process_time()
+        for _, audio, labels in clips:
+            have_voice, clip_inferred = run_clip(vad, audio)
+            clip_missed, clip_delays, clip_false = evaluate_onsets(have_voice, labels)
+            total += len(have_voice)
+            inferred += clip_inferred
+            segments += len(labels)
+            missed += clip_missed
+            delays.extend(clip_delays)
+            false_onsets += clip_false
+        cpu = time.process_time() - cpu_start
+        results.append(
+            {
+                "gate": enabled,
+                "chunks": total,
+                "inferred": inferred,
+                "skipped_ratio": round(1 - inferred / total, 4) if total else 0,
+                "cpu_s": round(cpu, 3),
+                "segments": segments,
+                "missed_onsets": missed,
+                "missed_rate": round(missed / segments, 4) if segments else 0,
+                "onset_delay_ms": round(sum(delays) / len(delays) * 1000, 1) if delays else 0,
+                "false_onsets": false_onsets,
+            }
+        )
+
+    headers = [
+        "能量门限",
+        "分块数",
+        "推理分块数",
+        "跳过比例",
+        "CPU(s)",
+        "语音段",
+        "漏检起点",
+        "漏检率",
+        "起点平均延迟(ms)",
+        "误触发",
+    ]
+    rows = [
+        [
+            "开启" if r["gate"] else "关闭",
+            r["chunks"],
+            r["inferred"],
+            f"{r['skipped_ratio']:.1%}",
+            r["cpu_s"],
+            r["segments"],
+            r["missed_onsets"],
+            f"{r['missed_rate']:.2%}",
+            r["onset_delay_ms"],
+            r["false_onsets"],
+        ]
+        for r in results
+    ]
+    print()
+    print(tabulate(rows, headers=headers, tablefmt="github"))
+    off, on = results
+    if off["cpu_s"]:
+        print(f"\nVAD CPU 降低 {1 - on['cpu_s'] / off['cpu_s']:.1%}")
+    return {
+        "vad": vad_name,
+        "gate_config": gate_config,
+        "noise_levels": noise_levels,
+        "idle_seconds": args.idle_seconds,
+        "clips": [name for name, _, _ in clips],
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VAD 推理性能与准确性测试")
+    parser.add_argument("--streams", default="1,50,300", help="模拟的连接路数，逗号分隔")
+    parser.add_argument("--seconds", type=float, default=10, help="每路音频时长(秒)")
+    parser.add_argument(
+        "--modes",
+        default="per_chunk,batched,onnx,onnx_batched",
+        help=f"测试的推理方式，逗号分隔，可选 {','.join(MODES)}",
+    )
+    parser.add_argument("--realtime", action="store_true", help="按实时节奏送入音频")
+    parser.add_argument("--window-ms", type=float, default=5, help="批量推理攒批窗口(毫秒)")
+    parser.add_argument("--max-batch", type=int, default=64, help="单次推理最多合并的分块数")
+    parser.add_argument("--threads", type=int, default=1, help="torch 推理线程数")
+    parser.add_argument("--torch-vad", default="SileroVAD", help="torch 版 VAD 的配置名")
+    parser.add_argument("--onnx-vad", default="SileroVADOnnx", help="ONNX 版 VAD 的配置名")
+    parser.add_argument("--accuracy", action="store_true", help="进行准确性对比而不是性能测试")
+    parser.add_argument(
+        "--wav", nargs="*", default=["config/assets"], help="准确性测试的 wav 文件或目录"
+    )
+    parser.add_argument(
+        "--recordings", nargs="*", default=[], help="准确性测试使用的会话录制文件或目录"
+    )
+    parser.add_argument(
+        "--gate", action="store_true", help="对比开启/关闭能量门限的 CPU 占用和语音起点漏检率"
+    )
+    parser.add_argument("--gate-vad", default="", help="能量门限测试使用的 VAD 配置名，默认为当前选择的 VAD")
+    parser.add_argument(
+        "--noise-levels", default="-70,-55,-45", help="合成测试音频的背景噪声能量(dBFS)，逗号分隔"
+    )
+    parser.add_argument(
+        "--idle-seconds", type=float, default=10, help="合成测试音频中语音前后的空闲时长(秒)"
+    )
+    parser.add_argument(
+        "--labels", nargs="*", default=[], help="带语音段标注的音频目录（xxx.wav + xxx.json）"
+    )
+    parser.add_argument("--json", default="", help="结果输出的 JSON 文件路径")
+    args = parser.parse_args()
+
+    try:
+        import torch
+
+        torch.set_num_threads(args.threads)
+    except ImportError:
+        # 只测试 ONNX 版时可以不安装 torch
+        pass
+
+    from config.settings import load_config
+
+    config = load_config()
+    if args.accuracy or args.gate:
+        if args.accuracy:
+            key, result = "accuracy", run_accuracy(config, args)
+        else:
+            key, result = "gate", run_gate(config, args)
+        if args.json and result:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"timestamp": time.time(), key: result},
+                    f,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+            print(f"\n结果已写入 {args.json}")
+        return 0 if result else 1
+
+    vad_names = {"torch": args.torch_vad, "onnx": args.onnx_vad}
+    vads = {}
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        backend, batch = MODES[mode]
+        try:
+            vads[mode] = create_vad(
+                config, vad_names[backend], batch, args.window_ms, args.max_batch
+            )
+        except Exception as e:
+            # 缺少可选依赖（如 onnxruntime、torch）时跳过
+            print(f"⏭ 跳过 {mode}: {type(e).__name__}: {e}")
+    modes = list(vads)
+    chunks = load_chunks()
+    steps = max(1, int(args.seconds / CHUNK_SECONDS))
+
+    results = []
+    for stream_count in [int(s) for s in args.streams.split(",") if s.strip()]:
+        streams = [stream_chunks(chunks, i, steps) for i in range(stream_count)]
+        for mode in modes:
+            print(f"▶ {mode} × {stream_count} 路 ...")
+            results.append(measure(mode, vads[mode], streams, args.realtime))
+
+    headers = [
+        "方式",
+        "路数",
+        "分块数",
+        "墙钟(s)",
+        "CPU(s)",
+        "吞吐(块/s)",
+        "每路CPU(ms/音频秒)",
+        "单核实时路数",
+        "延迟p50(ms)",
+        "延迟p99(ms)",
+    ]
+    rows = [
+        [
+            r["mode"],
+            r["streams"],
+            r["chunks"],
+            r["wall_s"],
+            r["cpu_s"],
+            r["chunks_per_s"],
+            r["cpu_ms_per_stream_s"],
+            r["realtime_streams_per_core"],
+            r["latency_p50_ms"],
+            r["latency_p99_ms"],
+        ]
+        for r in results
+    ]
+    print()
+    print(tabulate(rows, headers=headers, tablefmt="github"))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "config": {
+                        "seconds": args.seconds,
+                        "realtime": args.realtime,
+                        "window_ms": args.window_ms,
+                        "max_batch": args.max_batch,
+                        "threads": args.threads,
+                    },
+                    "timestamp": time.time(),
+                    "results": results,
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        print(f"\n结果已写入 {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+语音结束后 ASR/声纹调度开销测试
+
+用不做任何工作的 ASR 和声纹识别，测量 handle_voice_stop 中“并行执行 ASR 和声纹识别”这一步本身的开销：
+- legacy：旧方式，每句新建 ThreadPoolExecutor(max_workers=2)，两个任务各自新建并关闭一个事件循环，
+  并在连接的事件循环中阻塞等待结果
+- pooled：当前方式，内部有同步调用的 ASR（runs_in_loop=False）提交到共享线程池，线程复用自己的事件循环，
+  声纹识别直接在连接的事件循环中执行，两者用 asyncio.gather 并行
+- in_loop：当前方式，异步的 ASR（runs_in_loop=True）与声纹识别都直接在连接的事件循环中执行
+
+--concurrency 个连接同时循环处理语句，统计每句调度开销的 p50/p99（微秒）及相对 legacy 的节省。
+并发时每句耗时还包含排在其他连接之后的等待，此时应看吞吐和事件循环阻塞：
+测试期间另有一个每 1ms 唤醒一次的协程，统计其唤醒延迟的 p99，legacy 在等待结果时会阻塞整个事件循环。
+
+用法：
+    python performance_tester_voice_stop.py --utterances 2000 --concurrency 1,20
+    python performance_tester_voice_stop.py --no-voiceprint --json voice_stop.json
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import concurrent.futures
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from tabulate import tabulate
+
+from core.providers.asr.base import ASRProviderBase
+from core.utils.executor import ConnectionExecutor, get_shared_executor
+
+AUDIO = [bytes(1920)] * 20
+WAV = bytes(44 + 1920 * 20)
+
+
+class _NoopASR(ASRProviderBase):
+    async def speech_to_text(self, opus_data, session_id, audio_format="opus"):
+        return "", None
+
+
+class _PooledASR(_NoopASR):
+    runs_in_loop = False
+
+
+class _InLoopASR(_NoopASR):
+    runs_in_loop = True
+
+
+class _NoopVoiceprint:
+    async def identify_speaker(self, wav_data, session_id):
+        return None
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def legacy_dispatch(asr, conn, audio, wav_data):
+    """旧版 handle_voice_stop 的调度方式"""
+
+    def run_asr():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            return loop.run_until_complete(
+                asr.speech_to_text(audio, conn.session_id, "pcm")
+            )
+        finally:
+            loop.close()
+
+    def run_voiceprint():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            return loop.run_until_complete(
+                conn.voiceprint_provider.identify_speaker(wav_data, conn.session_id)
+            )
+        finally:
+            loop.close()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as thread_executor:
+        asr_future = thread_executor.submit(run_asr)
+        if conn.voiceprint_provider and wav_data:
+            voiceprint_future = thread_executor.submit(run_voiceprint)
+            return asr_future.result(timeout=15), voiceprint_future.result(timeout=15)
+        return asr_future.result(timeout=15), None
+
+
+async def run_connection(mode, asr, conn, count, latencies):
+    wav_data = WAV if conn.voiceprint_provider else None
+    for _ in range(count):
+        start = time.perf_counter()
+        if mode == "legacy":
+            legacy_dispatch(asr, conn, AUDIO, wav_data)
+        else:
+            await asr.run_asr_and_voiceprint(conn, AUDIO, wav_data)
+        latencies.append(time.perf_counter() - start)
+        # 让出事件循环，模拟连接之间交替处理
+        await asyncio.sleep(0)
+
+
+async def loop_monitor(stop: asyncio.Event, lateness: List[float]):
+    """每 1ms 唤醒一次，记录实际唤醒时刻相对预期的延迟"""
+    while not stop.is_set():
+        target = time.perf_counter() + 0.001
+        await asyncio.sleep(0.001)
+        lateness.append(max(0.0, time.perf_counter() - target))
+
+
+async def run_case(mode, concurrency, utterances, voiceprint, config) -> Dict[str, Any]:
+    asr = {"legacy": _NoopASR, "pooled": _PooledASR, "in_loop": _InLoopASR}[mode]()
+    shared = get_shared_executor(config)
+    conns = [
+        SimpleNamespace(
+            session_id=f"bench-{i}",
+            executor=ConnectionExecutor(shared, f"bench-{i}"),
+            voiceprint_provider=_NoopVoiceprint() if voiceprint else None,
+        )
+        for i in range(concurrency)
+    ]
+    per_conn = max(1, utterances // concurrency)
+    latencies: List[float] = []
+    # 预热
+    await run_connection(mode, asr, conns[0], 20, [])
+    stop = asyncio.Event()
+    lateness: List[float] = []
+    monitor = asyncio.create_task(loop_monitor(stop, lateness))
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(run_connection(mode, asr, conn, per_conn, latencies) for conn in conns)
+    )
+    wall = time.perf_counter() - start
+    stop.set()
+    await monitor
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "utterances": len(latencies),
+        "p50_us": percentile(latencies, 50) * 1e6,
+        "p99_us": percentile(latencies, 99) * 1e6,
+        "throughput": len(latencies) / wall if wall > 0 else 0,
+        "loop_stall_p99_ms": percentile(lateness, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="语音结束后 ASR/声纹调度开销测试")
+    parser.add_argument("--utterances", type=int, default=2000, help="每种情况处理的语句数")
+    parser.add_argument("--concurrency", default="1,20", help="同时处理语句的连接数，逗号分隔")
+    parser.add_argument("--modes", default="legacy,pooled,in_loop", help="测试的调度方式，逗号分隔")
+    parser.add_argument("--no-voiceprint", action="store_true", help="不启用声纹识别")
+    parser.add_argument("--json", default="", help="结果输出的 JSON 文件路径")
+    args = parser.parse_args()
+
+    from config.settings import load_config
+
+    config = load_config()
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    results = []
+    for concurrency in [int(c) for c in args.concurrency.split(",") if c.strip()]:
+        for mode in modes:
+            results.append(
+                asyncio.run(
+                    run_case(
+                        mode,
+                        concurrency,
+                        args.utterances,
+                        not args.no_voiceprint,
+                        config,
+                    )
+                )
+            )
+
+    legacy = {r["concurrency"]: r for r in results if r["mode"] == "legacy"}
+    rows = []
+    for r in results:
+        base = legacy.get(r["concurrency"])
+        saved_p50 = base["p50_us"] - r["p50_us"] if base else 0
+        saved_p99 = base["p99_us"] - r["p99_us"] if base else 0
+        r["saved_p50_us"] = saved_p50
+        r["saved_p99_us"] = saved_p99
+        rows.append(
+            [
+                r["mode"],
+                r["concurrency"],
+                r["utterances"],
+                f"{r['p50_us']:.0f}",
+                f"{r['p99_us']:.0f}",
+                f"{saved_p50:.0f}",
+                f"{saved_p99:.0f}",
+                f"{r['throughput']:.0f}",
+                f"{r['loop_stall_p99_ms']:.2f}",
+            ]
+        )
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "方式",
+                "并发连接",
+                "语句数",
+                "p50(µs)",
+                "p99(µs)",
+                "节省p50(µs)",
+                "节省p99(µs)",
+                "句/秒",
+                "循环阻塞p99(ms)",
+            ],
+            tablefmt="github",
+        )
+    )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {"timestamp": time.time(), "results": results},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        print(f"\n结果已写入 {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())